@@ -1,13 +1,191 @@
+from fastapi import Depends, Request
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from starlette.concurrency import run_in_threadpool
 import os
 from dotenv import load_dotenv
-from sqlalchemy.orm import sessionmaker, declarative_base
 load_dotenv()
 
+from app.config.dbPool import (  # noqa: E402
+    InstrumentedAsyncQueuePool, InstrumentedAsyncReplicaQueuePool, InstrumentedQueuePool,
+    InstrumentedReplicaQueuePool, pool_options,
+)
+from app.config.readReplica import DATABASE_REPLICA_URL, replica_router  # noqa: E402
+from app.utils.cache import deferred_invalidations  # noqa: E402
+
 DATABASE_URL = os.getenv("DATABASE_URL")
 DEBUG = os.getenv("DEBUG") == "True"
 
-engine = create_engine(DATABASE_URL, echo=DEBUG)
+# DB_ASYNC=True -> ใช้ AsyncEngine (psycopg 3) ไม่กิน threadpool ตอนรอ Postgres
+DB_ASYNC = os.getenv("DB_ASYNC") == "True"
+
+engine = create_engine(
+    DATABASE_URL, echo=DEBUG, poolclass=InstrumentedQueuePool, **pool_options())
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
+
+DbSession = Session | AsyncSession
+
+
+def to_async_url(url: str) -> str:
+    """postgresql://... หรือ postgresql+psycopg2://... -> postgresql+psycopg://..."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "postgresql":
+        return url
+    return parsed.set(drivername="postgresql+psycopg").render_as_string(hide_password=False)
+
+
+async_engine = create_async_engine(
+    to_async_url(DATABASE_URL), echo=DEBUG,
+    poolclass=InstrumentedAsyncQueuePool, **pool_options()) if DB_ASYNC else None
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False) if DB_ASYNC else None
+
+# streaming replica สำหรับ endpoint อ่าน (ไม่ตั้ง -> ทุกอย่างไป primary แบบเดิม) ดู app/config/readReplica.py
+replica_engine = create_engine(
+    DATABASE_REPLICA_URL, echo=DEBUG, poolclass=InstrumentedReplicaQueuePool,
+    **pool_options()) if DATABASE_REPLICA_URL else None
+ReplicaSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, bind=replica_engine) if replica_engine is not None else None
+
+async_replica_engine = create_async_engine(
+    to_async_url(DATABASE_REPLICA_URL), echo=DEBUG,
+    poolclass=InstrumentedAsyncReplicaQueuePool,
+    **pool_options()) if DB_ASYNC and DATABASE_REPLICA_URL else None
+AsyncReplicaSessionLocal = async_sessionmaker(
+    async_replica_engine, autoflush=False) if async_replica_engine is not None else None
+
+
+async def get_db():
+    if DB_ASYNC:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        await run_in_threadpool(db.close)
+
+
+async def request_user(request: Request) -> str | None:
+    """user_id_line ของ request จาก query / path หรือ JSON body (POST แบบ report)"""
+    user_id_line = (request.query_params.get("user_id_line")
+                    or request.path_params.get("user_id_line"))
+    if user_id_line is None and request.headers.get("content-type", "").startswith("application/json"):
+        try:
+            # FastAPI อ่าน body ไว้แล้วก่อนเรียก dependency -> ไม่ได้อ่าน stream ซ้ำ
+            body = await request.json()
+        except ValueError:
+            return None
+        if isinstance(body, dict):
+            user_id_line = body.get("user_id_line") or body.get("userIdLine")
+    return user_id_line if isinstance(user_id_line, str) else None
+
+
+async def read_from_replica(request: Request) -> bool:
+    """dependency ของ endpoint อ่าน: True = ใช้ replica ได้ (ดู ReplicaRouter.route)"""
+    if replica_engine is None:
+        return False
+    return replica_router.route(await request_user(request)) == "replica"
+
+
+def read_engine(replica: bool):
+    """engine สำหรับ stream ที่เปิด connection เอง (DB_ASYNC -> AsyncEngine)"""
+    if DB_ASYNC:
+        return async_replica_engine if replica else async_engine
+    return replica_engine if replica else engine
+
+
+async def get_read_db(replica: bool = Depends(read_from_replica)):
+    """เหมือน get_db แต่ไป replica เมื่อ read_from_replica อนุญาต ห้ามใช้กับ handler ที่เขียน"""
+    if DB_ASYNC:
+        async with (AsyncReplicaSessionLocal if replica else AsyncSessionLocal)() as db:
+            yield db
+        return
+
+    db = (ReplicaSessionLocal if replica else SessionLocal)()
+    try:
+        yield db
+    finally:
+        await run_in_threadpool(db.close)
+
+
+def get_sync_db():
+    """สำหรับ handler แบบ def ปกติ (เช่น users) ที่ใช้ Session ตรง ๆ"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def pool_status() -> list[dict]:
+    pools = [InstrumentedQueuePool.stats.snapshot(engine.pool)]
+    if async_engine is not None:
+        pools.append(InstrumentedAsyncQueuePool.stats.snapshot(
+            async_engine.sync_engine.pool))
+    if replica_engine is not None:
+        pools.append(InstrumentedReplicaQueuePool.stats.snapshot(replica_engine.pool))
+    if async_replica_engine is not None:
+        pools.append(InstrumentedAsyncReplicaQueuePool.stats.snapshot(
+            async_replica_engine.sync_engine.pool))
+    return pools
+
+
+def start_replica_monitor() -> None:
+    if replica_engine is not None:
+        replica_router.start(replica_engine)
+
+
+def stop_replica_monitor() -> None:
+    if replica_engine is not None:
+        replica_router.stop()
+
+
+def replica_stats() -> dict | None:
+    return replica_router.stats() if replica_engine is not None else None
+
+
+async def run_db(db: DbSession, fn, *args, **kwargs):
+    """
+    รัน fn(session, *args, **kwargs) ที่เขียนแบบ sync ORM
+    - AsyncSession -> run_sync (greenlet บน event loop, ไม่ใช้ thread)
+    - Session      -> threadpool แบบเดิม
+    invalidate_user ใน fn ถูก publish ไป Redis หลัง fn จบ (ดู deferred_invalidations)
+    """
+    async with deferred_invalidations():
+        if isinstance(db, AsyncSession):
+            return await db.run_sync(fn, *args, **kwargs)
+        return await run_in_threadpool(fn, db, *args, **kwargs)
+
+
+def _run_in_new_session(session_factory, fn, *args, **kwargs):
+    with session_factory() as db:
+        return fn(db, *args, **kwargs)
+
+
+async def run_db_session(fn, *args, **kwargs):
+    """
+    เหมือน run_db แต่เปิด session (connection) ของตัวเอง
+    ใช้รันหลายส่วนที่ไม่ขึ้นต่อกันพร้อมกันด้วย asyncio.gather
+    (Session / AsyncSession หนึ่งตัวใช้พร้อมกันหลาย query ไม่ได้) แต่ละ call กิน connection จาก pool หนึ่งตัว
+    """
+    async with deferred_invalidations():
+        if DB_ASYNC:
+            async with AsyncSessionLocal() as db:
+                return await db.run_sync(fn, *args, **kwargs)
+        return await run_in_threadpool(_run_in_new_session, SessionLocal, fn, *args, **kwargs)
+
+
+async def run_read_session(replica: bool, fn, *args, **kwargs):
+    """run_db_session สำหรับส่วนอ่าน replica มาจาก read_from_replica ของ request (ตัดสินครั้งเดียวต่อ request)"""
+    if not replica:
+        return await run_db_session(fn, *args, **kwargs)
+    if DB_ASYNC:
+        async with AsyncReplicaSessionLocal() as db:
+            return await db.run_sync(fn, *args, **kwargs)
+    return await run_in_threadpool(_run_in_new_session, ReplicaSessionLocal, fn, *args, **kwargs)
@@ -0,0 +1,139 @@
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+logger = logging.getLogger(__name__)
+
+
+def _int_env(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+# =========================
+# Pool sizing
+# =========================
+# งบ connection ต่อ worker = (max_connections ของ Postgres - ที่กันไว้ให้ admin/job) / จำนวน uvicorn worker
+WEB_CONCURRENCY = max(1, _int_env("WEB_CONCURRENCY", 1))
+DB_MAX_CONNECTIONS = _int_env("DB_MAX_CONNECTIONS", 0)
+DB_RESERVED_CONNECTIONS = _int_env("DB_RESERVED_CONNECTIONS", 10)
+
+# แจ้งเตือนใน log เมื่อรอ connection นานกว่านี้
+DB_POOL_WAIT_WARN_MS = _int_env("DB_POOL_WAIT_WARN_MS", 100)
+
+
+def connection_budget() -> int | None:
+    """จำนวน connection สูงสุดที่ worker นี้ใช้ได้ (None = ไม่ได้ตั้ง DB_MAX_CONNECTIONS)"""
+    if DB_MAX_CONNECTIONS <= 0:
+        return None
+    return max(1, (DB_MAX_CONNECTIONS - DB_RESERVED_CONNECTIONS) // WEB_CONCURRENCY)
+
+
+def pool_options() -> dict:
+    """
+    kwargs สำหรับ create_engine / create_async_engine
+    - DB_POOL_SIZE / DB_MAX_OVERFLOW ถ้าตั้งไว้ใช้ค่านั้นตรง ๆ
+    - ถ้าไม่ตั้งแต่มี DB_MAX_CONNECTIONS -> แบ่งงบต่อ worker เป็น pool 2/3 + overflow 1/3
+    - ไม่ตั้งอะไรเลย -> ค่า default ของ SQLAlchemy (5 + 10)
+    """
+    budget = connection_budget()
+    if budget is not None:
+        default_size = max(1, budget * 2 // 3)
+        default_overflow = budget - default_size
+    else:
+        default_size, default_overflow = 5, 10
+
+    return {
+        "pool_size": _int_env("DB_POOL_SIZE", default_size),
+        "max_overflow": _int_env("DB_MAX_OVERFLOW", default_overflow),
+        "pool_timeout": _int_env("DB_POOL_TIMEOUT", 30),
+        "pool_recycle": _int_env("DB_POOL_RECYCLE", 1800),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "True") == "True",
+    }
+
+
+# =========================
+# Pool stats
+# =========================
+class PoolStats:
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.overflow_events = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_checkout(self, waited: float, overflowed: bool) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            if overflowed:
+                self.overflow_events += 1
+
+        if waited * 1000 >= DB_POOL_WAIT_WARN_MS:
+            logger.warning("db pool %s: waited %.1f ms for a connection",
+                           self.name, waited * 1000)
+
+    def record_timeout(self, waited: float) -> None:
+        with self._lock:
+            self.timeouts += 1
+        logger.error("db pool %s: timed out after %.1f ms waiting for a connection",
+                     self.name, waited * 1000)
+
+    def snapshot(self, pool) -> dict:
+        with self._lock:
+            avg_wait = self.wait_total / self.checkouts if self.checkouts else 0.0
+            return {
+                "pool": self.name,
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+                "max_overflow": pool._max_overflow,
+                "timeout_seconds": pool.timeout(),
+                "checkouts": self.checkouts,
+                "overflow_events": self.overflow_events,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": round(avg_wait * 1000, 3),
+                "wait_max_ms": round(self.wait_max * 1000, 3),
+            }
+
+
+class _InstrumentedPoolMixin:
+    stats: PoolStats
+
+    def _do_get(self):
+        overflow_before = self._overflow
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record_timeout(time.perf_counter() - started)
+            raise
+
+        overflowed = self._overflow > overflow_before and self._overflow > 0
+        self.stats.record_checkout(time.perf_counter() - started, overflowed)
+        return conn
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    stats = PoolStats("sync")
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    stats = PoolStats("async")
+
+
+class InstrumentedReplicaQueuePool(_InstrumentedPoolMixin, QueuePool):
+    stats = PoolStats("sync-replica")
+
+
+class InstrumentedAsyncReplicaQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    stats = PoolStats("async-replica")
@@ -0,0 +1,143 @@
+"""
+ส่ง endpoint อ่านไป streaming replica (ตั้ง DATABASE_REPLICA_URL) แบบไม่ให้ user เห็นข้อมูลย้อนหลัง
+
+- read-your-writes: ทุก write ของ user (invalidate_user หลัง commit) -> user นั้นอ่านจาก primary
+  อีก REPLICA_STICKY_SECONDS ทั้งใน worker นี้และ worker อื่นผ่าน pub/sub ของ cache (CACHE_REDIS_URL)
+  ไม่มี pub/sub worker อื่นไม่รู้ว่ามี write -> ตั้ง DATABASE_REPLICA_URL โดยไม่ตั้ง CACHE_REDIS_URL ไม่ได้
+- lag: thread วัด lag ของ replica ทุก REPLICA_LAG_CHECK_SECONDS
+  lag เกิน REPLICA_MAX_LAG_SECONDS / วัดไม่ได้ / ยังไม่เคยวัด -> อ่านจาก primary ทั้งหมด
+  sticky ถูกยืดให้ไม่สั้นกว่า max lag + รอบวัด: ช่วงที่ใช้ replica ได้ write เก่ากว่านั้นถึง replica แล้ว
+- ไม่รู้ user ของ request -> primary
+"""
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.utils.cache import CACHE_REDIS_URL, register_write_listener
+
+logger = logging.getLogger(__name__)
+
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL", "")
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "2"))
+REPLICA_LAG_CHECK_SECONDS = max(0.1, float(os.getenv("REPLICA_LAG_CHECK_SECONDS", "1")))
+
+
+def check_replica_config(replica_url: str, redis_url: str) -> None:
+    """replica ต้องมี pub/sub ของ cache ไม่งั้น read-your-writes ใช้ได้แค่ใน worker ที่รับ write"""
+    if replica_url and not redis_url:
+        raise RuntimeError("DATABASE_REPLICA_URL requires CACHE_REDIS_URL")
+
+
+check_replica_config(DATABASE_REPLICA_URL, CACHE_REDIS_URL)
+
+# replay ทันทุกอย่างที่รับมาแล้ว = lag 0 (primary ไม่มี write นาน ๆ replay_timestamp เก่าได้แม้ไม่ lag)
+# ไม่ได้อยู่ใน recovery (ชี้ไป primary เช่นตอน dev) = lag 0
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+# เกินนี้ค่อยล้าง user ที่หมดช่วง sticky แล้ว (ไม่ให้ dict โตตามจำนวน user ที่เคยเขียน)
+_PRUNE_AT = 10_000
+
+
+class ReplicaRouter:
+    def __init__(self, sticky_seconds: float, max_lag_seconds: float, check_seconds: float):
+        self.sticky_seconds = max(sticky_seconds, max_lag_seconds + check_seconds)
+        self.max_lag_seconds = max_lag_seconds
+        self.check_seconds = check_seconds
+        self._lock = threading.Lock()
+        self._recent: dict[str, float] = {}
+        # ทุก user อ่านจาก primary ถึงเวลานี้ (ต่อ pub/sub ใหม่ ไม่รู้ว่าพลาด write ของใครไป)
+        self._all_until = 0.0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.lag_seconds: float | None = None
+        self.lag_errors = 0
+        self.routes = {"replica": 0, "recent_write": 0, "lag": 0, "unknown_user": 0}
+
+    def mark_write(self, user_id_line: str | None) -> None:
+        now = time.monotonic()
+        until = now + self.sticky_seconds
+        with self._lock:
+            if user_id_line is None:
+                self._all_until = until
+                return
+            self._recent[user_id_line] = until
+            if len(self._recent) > _PRUNE_AT:
+                self._recent = {u: t for u, t in self._recent.items() if t > now}
+
+    def route(self, user_id_line: str | None) -> str:
+        """"replica" หรือเหตุผลที่ต้องอ่านจาก primary"""
+        now = time.monotonic()
+        with self._lock:
+            if user_id_line is None:
+                target = "unknown_user"
+            elif self.lag_seconds is None or self.lag_seconds > self.max_lag_seconds:
+                target = "lag"
+            elif now < self._all_until or self._recent.get(user_id_line, 0.0) > now:
+                target = "recent_write"
+            else:
+                target = "replica"
+            self.routes[target] += 1
+        return target
+
+    def check_lag(self, engine: Engine) -> None:
+        try:
+            with engine.connect() as conn:
+                lag = float(conn.execute(REPLICA_LAG_SQL).scalar_one())
+        except SQLAlchemyError as e:
+            with self._lock:
+                was_up = self.lag_seconds is not None
+                self.lag_seconds = None
+                self.lag_errors += 1
+            if was_up:
+                logger.warning("replica lag check failed (%s), reading from primary",
+                               type(e).__name__)
+            return
+
+        with self._lock:
+            self.lag_seconds = lag
+
+    def start(self, engine: Engine) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._monitor, args=(engine,), name="replica-lag", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+    def _monitor(self, engine: Engine) -> None:
+        while not self._stop.is_set():
+            self.check_lag(engine)
+            self._stop.wait(self.check_seconds)
+
+    def stats(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "lag_seconds": self.lag_seconds,
+                "max_lag_seconds": self.max_lag_seconds,
+                "sticky_seconds": self.sticky_seconds,
+                "sticky_users": sum(1 for t in self._recent.values() if t > now),
+                "lag_errors": self.lag_errors,
+                "routes": dict(self.routes),
+            }
+
+
+replica_router = register_write_listener(ReplicaRouter(
+    REPLICA_STICKY_SECONDS, REPLICA_MAX_LAG_SECONDS, REPLICA_LAG_CHECK_SECONDS))
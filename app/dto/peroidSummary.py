@@ -15,6 +15,15 @@ class SummaryType(str, Enum):
     yearly = "yearly"
 
 
+# =========================
+# Series granularity (GET /period-summary/series)
+# =========================
+class SeriesGranularity(str, Enum):
+    day = "day"
+    week = "week"    # เริ่มวันจันทร์
+    month = "month"
+
+
 # =========================
 # FILTER PAYLOAD
 # =========================
@@ -1,7 +1,27 @@
 
+from datetime import datetime
+from typing import TypedDict
+
 from pydantic import BaseModel
 
 
 class TagCreatePayload(BaseModel):
     userIdLine: str
     name: str
+
+
+class TagSuggestion(BaseModel):
+    id: int
+    name: str
+    slug: str
+    usage_count: int
+
+
+class TagRow(TypedDict):
+    # แถวของ GET /tags ดู to_rows
+    id: int
+    user_id_line: str
+    name: str
+    slug: str
+    usage_count: int
+    created_at: datetime
@@ -1,8 +1,13 @@
 from datetime import datetime
-from typing import List, Optional
-from pydantic import BaseModel
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, TypedDict
+from pydantic import BaseModel, Field
 from enum import Enum
 
+BULK_MAX_ITEMS = 10000
+# tag ต่อรายการ (bulk เต็มจำนวน = ไม่เกิน BULK_MAX_ITEMS * TAGS_MAX_ITEMS link)
+TAGS_MAX_ITEMS = 20
+
 
 class TransactionType(str, Enum):
     income = "income"
@@ -19,13 +24,18 @@ class FilterMode(str, Enum):
     range = "range"
 
 
+class ExportFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+
+
 class TransactionPayload(BaseModel):
     title: str
     amount: float
     type: TransactionType
     userIdLine: str
     transactionAt: datetime
-    tags: Optional[List[str]] = []   # << เพิ่ม
+    tags: Optional[List[str]] = Field([], max_length=TAGS_MAX_ITEMS)
 
 
 class TransactionUpdatePayload(BaseModel):
@@ -38,3 +48,53 @@ class TransactionUpdatePayload(BaseModel):
 class TransactionResponse(BaseModel):
     id: int
     message: str
+
+
+class TransactionRow(TypedDict):
+    # แถวที่ list endpoint ส่งออก (GET /transactions, /transactions/today) ดู to_rows
+    id: int
+    title: str
+    user_id_line: str
+    amount: Decimal
+    type: TransactionType
+    status: Optional[str]
+    source: Optional[str]
+    created_at: Optional[datetime]
+    transaction_at: datetime
+
+
+class TransactionTagRef(TypedDict):
+    id: int
+    name: str
+    slug: str
+
+
+class TransactionWithTagsRow(TypedDict):
+    # GET /transactions/today/v2
+    id: int
+    title: str
+    amount: Decimal
+    type: TransactionType
+    status: Optional[str]
+    source: Optional[str]
+    created_at: Optional[datetime]
+    transaction_at: datetime
+    tags: List[TransactionTagRef]
+
+
+class TransactionBulkPayload(BaseModel):
+    # แต่ละ item คือ TransactionPayload ตรวจทีละรายการเพื่อรายงานผลราย item
+    items: List[Dict[str, Any]] = Field(..., min_length=1, max_length=BULK_MAX_ITEMS)
+
+
+class TransactionBulkItemResult(BaseModel):
+    index: int
+    status: str  # created | error
+    id: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class TransactionBulkResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[TransactionBulkItemResult]
@@ -0,0 +1,42 @@
+"""
+job ที่รันใน process ของ API (APScheduler, เวลา Asia/Bangkok)
+ทุก job ต้อง idempotent และปลอดภัยเมื่อหลาย uvicorn worker รันพร้อมกัน
+(ปิดได้ด้วย SCHEDULER_ENABLED=False แล้วรันผ่าน CLI / cron ภายนอกแทน)
+"""
+import logging
+import os
+from datetime import datetime
+
+from apscheduler.schedulers.background import BackgroundScheduler
+
+from app.jobs.summaryReconcile import run_reconcile_job
+from app.jobs.transactionPartitions import run_partition_job
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "True") == "True"
+SCHEDULER_TIMEZONE = "Asia/Bangkok"
+
+scheduler = BackgroundScheduler(timezone=SCHEDULER_TIMEZONE)
+
+
+def start_scheduler() -> None:
+    if not SCHEDULER_ENABLED or scheduler.running:
+        return
+
+    # รันทันทีตอน start ด้วย: deploy หลังสิ้นเดือนที่ job พลาดไปก็ยังมี partition ครบ
+    scheduler.add_job(run_partition_job, "cron", hour=0, minute=30,
+                      id="transaction_partitions", replace_existing=True,
+                      next_run_time=datetime.now(scheduler.timezone),
+                      coalesce=True, misfire_grace_time=3600)
+    # ตัดยอดสิ้นวัน: ตรวจ/แก้ summary ที่ drift จาก transactions (ดู app/jobs/summaryReconcile.py)
+    scheduler.add_job(run_reconcile_job, "cron", hour=23, minute=0,
+                      id="summary_reconcile", replace_existing=True,
+                      coalesce=True, misfire_grace_time=3600)
+    scheduler.start()
+    logger.info("scheduler started: %s", [job.id for job in scheduler.get_jobs()])
+
+
+def stop_scheduler() -> None:
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
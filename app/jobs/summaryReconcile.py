@@ -0,0 +1,382 @@
+"""
+ตรวจ / สร้าง period_summary และ tag_summary_daily ใหม่จาก transactions แบบ set-based
+
+รันทุกวัน 23:00 จาก scheduler ใน app (ย้อนหลัง RECONCILE_LOOKBACK_DAYS วัน) หรือสั่งเอง
+    python -m app.jobs.summaryReconcile --verify                      # ทั้งประวัติ ไม่เขียน
+    python -m app.jobs.summaryReconcile --start 2026-01-01 --end 2026-12-31
+    python -m app.jobs.summaryReconcile --user Uxxxx --workers 1
+
+- user ถูกแบ่งเป็น shard ละ RECONCILE_SHARD_SIZE คน แต่ละ shard เป็น transaction เดียวบน connection ของตัวเอง
+  และรันพร้อมกัน RECONCILE_WORKERS shard
+- ต่อ shard ต่อตาราง: statement เดียว = ยอดที่ควรเป็น (GROUP BY user, วัน[, tag]) FULL JOIN ยอดที่มีอยู่
+  เขียน (INSERT ... ON CONFLICT DO UPDATE) เฉพาะแถวที่ไม่ตรง, แถวที่ไม่มีรายการแล้วถูกตั้งเป็น 0
+  จำนวนแถวที่เขียน = จำนวนแถวที่ drift, ETag / cache ถูกล้างเฉพาะ user ที่ยอดถูกแก้
+- rollup ตามเองผ่าน trigger ของ period_summary
+- rebuild หาแถวที่ไม่ตรงก่อนโดยไม่ล็อก (statement เดียวเห็น transactions กับ summary ชุดเดียวกัน)
+  แล้วล็อกเฉพาะ user ที่ไม่ตรง (lock_users เดียวกับ API) คำนวณซ้ำและเขียนใน transaction ใหม่
+  ปกติไม่มี drift = ไม่ล็อกใครเลย, API รอเฉพาะ user ที่กำลังถูกแก้
+- รอ lock ได้ไม่เกิน RECONCILE_LOCK_TIMEOUT_MS: user ที่ API ถือ lock นานกว่านั้นถูกข้าม (แก้ในรอบถัดไป)
+"""
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Sequence
+
+from sqlalchemy import Date, and_, case, cast, func, select, tuple_, union
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.config.database import SessionLocal, engine
+from app.jobs.tagSummaryBackfill import tag_summary_select, transaction_filters
+from app.models.periodSummaryModel import PeriodSummary
+from app.models.tagSummaryModel import TagSummaryDaily
+from app.models.transactionModel import Transaction
+from app.utils.cache import invalidate_user
+from app.utils.dataVersion import bump_data_version
+from app.utils.dateRange import THAI_TZ
+from app.utils.summaryDelta import lock_users
+
+logger = logging.getLogger(__name__)
+
+RECONCILE_SHARD_SIZE = int(os.getenv("RECONCILE_SHARD_SIZE", "200"))
+RECONCILE_WORKERS = int(os.getenv("RECONCILE_WORKERS", "4"))
+# job 23:00 ตรวจย้อนหลังกี่วัน (รวมวันนี้) ทั้งประวัติใช้ CLI
+RECONCILE_LOOKBACK_DAYS = int(os.getenv("RECONCILE_LOOKBACK_DAYS", "62"))
+# lock_timeout ของ transaction ที่แก้ยอด: job ไม่ควรค้างรอ (และทำให้ API ต่อคิวหลัง) write ที่ช้า
+RECONCILE_LOCK_TIMEOUT_MS = int(os.getenv("RECONCILE_LOCK_TIMEOUT_MS", "2000"))
+
+# pg_try_advisory_lock ระดับ session: หลาย uvicorn worker ถึงเวลาพร้อมกัน รันจริงตัวเดียว
+RECONCILE_LOCK_KEY = "summary_reconcile"
+
+TABLES = ("period_summary", "tag_summary_daily")
+
+
+def _date_filters(column, start: date | None, end_exclusive: date | None) -> list:
+    filters = []
+    if start is not None:
+        filters.append(column >= start)
+    if end_exclusive is not None:
+        filters.append(column < end_exclusive)
+    return filters
+
+
+# =========================
+# Users / shards
+# =========================
+def users_in_range(db: Session, start: date | None, end_exclusive: date | None) -> list[str]:
+    """user ที่มีรายการ หรือมีแถว summary ในช่วง (แถว summary ค้างของรายการที่ลบไปแล้วก็ต้องถูกตั้งเป็น 0)"""
+    stmt = union(
+        select(Transaction.user_id_line)
+        .where(*_date_filters(Transaction.transaction_at, start, end_exclusive)),
+        select(PeriodSummary.user_id_line)
+        .where(*_date_filters(PeriodSummary.summary_date, start, end_exclusive)),
+        select(TagSummaryDaily.user_id_line)
+        .where(*_date_filters(TagSummaryDaily.summary_date, start, end_exclusive)),
+    )
+    return sorted(db.scalars(stmt))
+
+
+def shards(users: Sequence[str], size: int) -> list[list[str]]:
+    return [list(users[i:i + size]) for i in range(0, len(users), size)]
+
+
+# =========================
+# Per-table diff
+# =========================
+def _period_summary(db: Session, users: Sequence[str], start: date | None,
+                    end_exclusive: date | None, verify: bool) -> list[str]:
+    day = cast(Transaction.transaction_at, Date)
+    computed = (
+        select(
+            Transaction.user_id_line.label("user_id_line"),
+            day.label("summary_date"),
+            func.coalesce(func.sum(case(
+                (Transaction.type == "income", Transaction.amount), else_=0)), 0).label("income"),
+            func.coalesce(func.sum(case(
+                (Transaction.type == "expense", Transaction.amount), else_=0)), 0).label("expense"),
+        )
+        .where(*transaction_filters(start, end_exclusive, user_ids=users))
+        .group_by(Transaction.user_id_line, day)
+        .subquery("c")
+    )
+    existing = (
+        select(PeriodSummary.user_id_line, PeriodSummary.summary_date,
+               PeriodSummary.total_income, PeriodSummary.total_expense,
+               PeriodSummary.total_balance)
+        .where(PeriodSummary.user_id_line.in_(users),
+               *_date_filters(PeriodSummary.summary_date, start, end_exclusive))
+        .subquery("e")
+    )
+
+    income = func.coalesce(computed.c.income, 0)
+    expense = func.coalesce(computed.c.expense, 0)
+    drift = (
+        select(
+            func.coalesce(computed.c.summary_date, existing.c.summary_date),
+            func.coalesce(computed.c.user_id_line, existing.c.user_id_line).label("user_id_line"),
+            income,
+            expense,
+            income - expense,
+            func.now(),
+            func.now(),
+        )
+        .select_from(computed.join(
+            existing,
+            and_(existing.c.user_id_line == computed.c.user_id_line,
+                 existing.c.summary_date == computed.c.summary_date),
+            full=True,
+        ))
+        .where(
+            tuple_(func.coalesce(existing.c.total_income, 0),
+                   func.coalesce(existing.c.total_expense, 0),
+                   func.coalesce(existing.c.total_balance, 0))
+            != tuple_(income, expense, income - expense)
+        )
+    )
+    if verify:
+        return db.scalars(select(drift.subquery().c.user_id_line)).all()
+
+    stmt = insert(PeriodSummary).from_select(
+        [
+            PeriodSummary.summary_date,
+            PeriodSummary.user_id_line,
+            PeriodSummary.total_income,
+            PeriodSummary.total_expense,
+            PeriodSummary.total_balance,
+            PeriodSummary.created_at,
+            PeriodSummary.updated_at,
+        ],
+        drift,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[PeriodSummary.summary_date, PeriodSummary.user_id_line],
+        set_={
+            "total_income": stmt.excluded.total_income,
+            "total_expense": stmt.excluded.total_expense,
+            "total_balance": stmt.excluded.total_balance,
+            "updated_at": func.now(),
+        },
+    )
+    return db.scalars(stmt.returning(PeriodSummary.user_id_line)).all()
+
+
+def _tag_summary_daily(db: Session, users: Sequence[str], start: date | None,
+                       end_exclusive: date | None, verify: bool) -> list[str]:
+    computed = tag_summary_select(start, end_exclusive, user_ids=users).subquery("c")
+    existing = (
+        select(TagSummaryDaily.user_id_line, TagSummaryDaily.summary_date,
+               TagSummaryDaily.tag_id, TagSummaryDaily.total_income,
+               TagSummaryDaily.total_expense)
+        .where(TagSummaryDaily.user_id_line.in_(users),
+               *_date_filters(TagSummaryDaily.summary_date, start, end_exclusive))
+        .subquery("e")
+    )
+
+    income = func.coalesce(computed.c.total_income, 0)
+    expense = func.coalesce(computed.c.total_expense, 0)
+    drift = (
+        select(
+            func.coalesce(computed.c.user_id_line, existing.c.user_id_line).label("user_id_line"),
+            func.coalesce(computed.c.summary_date, existing.c.summary_date),
+            func.coalesce(computed.c.tag_id, existing.c.tag_id),
+            income,
+            expense,
+            func.now(),
+        )
+        .select_from(computed.join(
+            existing,
+            and_(existing.c.user_id_line == computed.c.user_id_line,
+                 existing.c.summary_date == computed.c.summary_date,
+                 existing.c.tag_id == computed.c.tag_id),
+            full=True,
+        ))
+        .where(
+            tuple_(func.coalesce(existing.c.total_income, 0),
+                   func.coalesce(existing.c.total_expense, 0))
+            != tuple_(income, expense)
+        )
+    )
+    if verify:
+        return db.scalars(select(drift.subquery().c.user_id_line)).all()
+
+    stmt = insert(TagSummaryDaily).from_select(
+        [
+            TagSummaryDaily.user_id_line,
+            TagSummaryDaily.summary_date,
+            TagSummaryDaily.tag_id,
+            TagSummaryDaily.total_income,
+            TagSummaryDaily.total_expense,
+            TagSummaryDaily.updated_at,
+        ],
+        drift,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[
+            TagSummaryDaily.user_id_line,
+            TagSummaryDaily.summary_date,
+            TagSummaryDaily.tag_id,
+        ],
+        set_={
+            "total_income": stmt.excluded.total_income,
+            "total_expense": stmt.excluded.total_expense,
+            "updated_at": func.now(),
+        },
+    )
+    return db.scalars(stmt.returning(TagSummaryDaily.user_id_line)).all()
+
+
+def _diff(db: Session, users: Sequence[str], start: date | None, end_exclusive: date | None,
+          verify: bool) -> dict[str, list[str]]:
+    """{ตาราง: user_id_line ของแต่ละแถวที่ drift} verify=False -> เขียนแถวเหล่านั้นด้วย"""
+    return {
+        "period_summary": _period_summary(db, users, start, end_exclusive, verify),
+        "tag_summary_daily": _tag_summary_daily(db, users, start, end_exclusive, verify),
+    }
+
+
+def _is_lock_timeout(e: OperationalError) -> bool:
+    return getattr(e.orig, "pgcode", None) == "55P03"
+
+
+def reconcile_shard(users: Sequence[str], start: date | None, end_exclusive: date | None,
+                    verify: bool = False) -> tuple[dict[str, int], list[str]]:
+    """
+    หนึ่ง shard คืน ({ตาราง: จำนวนแถวที่ drift}, user ที่ข้ามเพราะรอ lock เกิน RECONCILE_LOCK_TIMEOUT_MS)
+    อ่านอย่างเดียวก่อน: ล็อกและเขียนเฉพาะ user ที่ยอดไม่ตรง
+    """
+    with SessionLocal() as db:
+        drifted = _diff(db, users, start, end_exclusive, verify=True)
+        db.rollback()
+
+    mismatched = sorted({user_id_line for rows in drifted.values() for user_id_line in rows})
+    if verify or not mismatched:
+        return {table: len(rows) for table, rows in drifted.items()}, []
+
+    db = SessionLocal()
+    try:
+        db.execute(select(func.set_config(
+            "lock_timeout", f"{RECONCILE_LOCK_TIMEOUT_MS}ms", True)))
+        lock_users(db, mismatched)
+        # คำนวณซ้ำหลังได้ lock: write ของ API ที่ commit ระหว่างนั้นรวมอยู่ในยอดแล้ว
+        fixed = _diff(db, mismatched, start, end_exclusive, verify=False)
+        # user ที่ยอดถูกแก้จริง: ETag / cache ของ user อื่นใน shard ยังใช้ได้
+        changed = {user_id_line for rows in fixed.values() for user_id_line in rows}
+        bump_data_version(db, changed)
+        db.commit()
+    except OperationalError as e:
+        db.rollback()
+        if not _is_lock_timeout(e):
+            raise
+        logger.warning("summary reconcile: lock timeout, skipped %d users", len(mismatched))
+        return dict.fromkeys(TABLES, 0), mismatched
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    for user_id_line in changed:
+        invalidate_user(user_id_line)
+    return {table: len(rows) for table, rows in fixed.items()}, []
+
+
+def reconcile(
+    start: date | None = None,
+    end_exclusive: date | None = None,
+    user_id_line: str | None = None,
+    verify: bool = False,
+    shard_size: int = RECONCILE_SHARD_SIZE,
+    workers: int = RECONCILE_WORKERS,
+) -> dict:
+    """ทุก shard ของช่วง [start, end_exclusive) (None = ไม่จำกัด) คืนสรุปจำนวนแถวที่ drift / แก้"""
+    started = time.perf_counter()
+    if user_id_line is not None:
+        users = [user_id_line]
+    else:
+        with SessionLocal() as db:
+            users = users_in_range(db, start, end_exclusive)
+
+    parts = shards(users, max(1, shard_size))
+    totals = dict.fromkeys(TABLES, 0)
+    skipped: list[str] = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for fixed, locked_out in pool.map(
+                lambda shard: reconcile_shard(shard, start, end_exclusive, verify), parts):
+            for table, rows in fixed.items():
+                totals[table] += rows
+            skipped += locked_out
+
+    return {
+        "mode": "verify" if verify else "rebuild",
+        "start": start,
+        "end_exclusive": end_exclusive,
+        "users": len(users),
+        "shards": len(parts),
+        "drift_rows": totals,
+        "skipped_users": len(skipped),
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+# =========================
+# Scheduler entry
+# =========================
+@contextmanager
+def _single_runner(key: str):
+    """True ถ้าได้ล็อก (ถือ connection ไว้จนจบ job), False ถ้า process อื่นกำลังรันอยู่"""
+    with engine.connect() as conn:
+        got = conn.scalar(select(func.pg_try_advisory_lock(func.hashtext(key))))
+        try:
+            yield got
+        finally:
+            if got:
+                conn.scalar(select(func.pg_advisory_unlock(func.hashtext(key))))
+            conn.rollback()
+
+
+def run_reconcile_job(lookback_days: int = RECONCILE_LOOKBACK_DAYS) -> dict | None:
+    with _single_runner(RECONCILE_LOCK_KEY) as got:
+        if not got:
+            logger.info("summary reconcile: already running in another process, skipped")
+            return None
+
+        end_exclusive = datetime.now(THAI_TZ).date() + timedelta(days=1)
+        result = reconcile(end_exclusive - timedelta(days=lookback_days), end_exclusive)
+
+    drift = result["drift_rows"]
+    if any(drift.values()) or result["skipped_users"]:
+        logger.warning("summary reconcile fixed drift: %s", result)
+    else:
+        logger.info("summary reconcile: no drift (%s)", result)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--start", type=date.fromisoformat, help="วันแรก (YYYY-MM-DD) default ทั้งประวัติ")
+    parser.add_argument("--end", type=date.fromisoformat, help="วันสุดท้าย รวมวันนั้น (YYYY-MM-DD)")
+    parser.add_argument("--user", help="user_id_line เฉพาะคน")
+    parser.add_argument("--verify", action="store_true",
+                        help="นับแถวที่ไม่ตรงอย่างเดียว ไม่เขียน (exit 1 ถ้าเจอ)")
+    parser.add_argument("--shard-size", type=int, default=RECONCILE_SHARD_SIZE)
+    parser.add_argument("--workers", type=int, default=RECONCILE_WORKERS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    end_exclusive = args.end + timedelta(days=1) if args.end else None
+    result = reconcile(args.start, end_exclusive, args.user, args.verify,
+                       args.shard_size, args.workers)
+    logger.info("summary reconcile: %s", result)
+
+    if args.verify and any(result["drift_rows"].values()):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
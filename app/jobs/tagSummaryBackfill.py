@@ -0,0 +1,126 @@
+"""
+สร้าง tag_summary_daily ใหม่จาก transactions
+
+    python -m app.jobs.tagSummaryBackfill
+    python -m app.jobs.tagSummaryBackfill --start 2026-01-01 --end 2026-12-31 --user Uxxxx
+"""
+import argparse
+import logging
+from datetime import date, timedelta
+from typing import Sequence
+
+from sqlalchemy import Date, case, cast, delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.config.database import SessionLocal
+from app.models.tagSummaryModel import TagSummaryDaily
+from app.models.transactionModel import Transaction
+from app.models.transactionTagModel import TransactionTag
+from app.utils.reportTags import OTHERS_TAG_ID
+from app.utils.transactionQueries import ACTIVE
+
+logger = logging.getLogger(__name__)
+
+
+def transaction_filters(
+    start: date | None,
+    end_exclusive: date | None,
+    user_id_line: str | None = None,
+    user_ids: Sequence[str] | None = None,
+) -> list:
+    """รายการ active ในช่วง [start, end_exclusive) ของ user คนเดียว / กลุ่ม user (None = ทั้งหมด)"""
+    filters = [ACTIVE]
+    if start is not None:
+        filters.append(Transaction.transaction_at >= start)
+    if end_exclusive is not None:
+        filters.append(Transaction.transaction_at < end_exclusive)
+    if user_id_line is not None:
+        filters.append(Transaction.user_id_line == user_id_line)
+    if user_ids is not None:
+        filters.append(Transaction.user_id_line.in_(user_ids))
+    return filters
+
+
+def tag_summary_select(
+    start: date | None = None,
+    end_exclusive: date | None = None,
+    user_id_line: str | None = None,
+    user_ids: Sequence[str] | None = None,
+):
+    """ยอดราย (user, วัน, tag) จาก transactions ในช่วง (กรอง transaction_at -> อ่านเฉพาะ partition ของช่วงนั้น)"""
+    day = cast(Transaction.transaction_at, Date)
+    tag_id = func.coalesce(TransactionTag.tag_id, OTHERS_TAG_ID)
+    return (
+        select(
+            Transaction.user_id_line.label("user_id_line"),
+            day.label("summary_date"),
+            tag_id.label("tag_id"),
+            func.coalesce(func.sum(case(
+                (Transaction.type == "income", Transaction.amount), else_=0)), 0).label("total_income"),
+            func.coalesce(func.sum(case(
+                (Transaction.type == "expense", Transaction.amount), else_=0)), 0).label("total_expense"),
+            func.now().label("updated_at"),
+        )
+        .select_from(Transaction)
+        .outerjoin(TransactionTag, TransactionTag.transaction_id == Transaction.id)
+        .where(*transaction_filters(start, end_exclusive, user_id_line, user_ids))
+        .group_by(Transaction.user_id_line, day, tag_id)
+    )
+
+
+def rebuild_tag_summary(
+    db: Session,
+    start: date | None = None,
+    end_exclusive: date | None = None,
+    user_id_line: str | None = None,
+) -> int:
+    """ลบแถวในช่วงแล้ว INSERT ... SELECT ... GROUP BY ใหม่ทั้งช่วง คืนจำนวนแถวที่เขียน"""
+    summary_filters = []
+    if start is not None:
+        summary_filters.append(TagSummaryDaily.summary_date >= start)
+    if end_exclusive is not None:
+        summary_filters.append(TagSummaryDaily.summary_date < end_exclusive)
+    if user_id_line is not None:
+        summary_filters.append(TagSummaryDaily.user_id_line == user_id_line)
+
+    db.execute(delete(TagSummaryDaily).where(*summary_filters))
+
+    result = db.execute(insert(TagSummaryDaily).from_select(
+        [
+            TagSummaryDaily.user_id_line,
+            TagSummaryDaily.summary_date,
+            TagSummaryDaily.tag_id,
+            TagSummaryDaily.total_income,
+            TagSummaryDaily.total_expense,
+            TagSummaryDaily.updated_at,
+        ],
+        tag_summary_select(start, end_exclusive, user_id_line),
+    ))
+    return result.rowcount
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild tag_summary_daily")
+    parser.add_argument("--start", type=date.fromisoformat,
+                        help="วันแรก (YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat,
+                        help="วันสุดท้าย รวมวันนั้น (YYYY-MM-DD)")
+    parser.add_argument("--user", help="user_id_line เฉพาะคน")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    end_exclusive = args.end + timedelta(days=1) if args.end else None
+
+    db = SessionLocal()
+    try:
+        written = rebuild_tag_summary(db, args.start, end_exclusive, args.user)
+        db.commit()
+    finally:
+        db.close()
+
+    logger.info("tag_summary_daily rebuilt: %s rows", written)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+สร้าง partition รายเดือนของ transactions ล่วงหน้า (sql/2026-10-18-05-transactions-partitioning.sql)
+
+รันทุกวันจาก scheduler ใน app (app/jobs/scheduler.py) หรือสั่งเองได้
+    python -m app.jobs.transactionPartitions
+    python -m app.jobs.transactionPartitions --months-ahead 6
+"""
+import argparse
+import logging
+import os
+from datetime import date
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.config.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# มี partition ล่วงหน้าอย่างน้อยกี่เดือนนับจากเดือนปัจจุบัน
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+
+
+def add_months(day: date, months: int) -> date:
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def ensure_partitions(db: Session, months_ahead: int = PARTITION_MONTHS_AHEAD,
+                      today: date | None = None) -> int:
+    """สร้าง partition เดือนนี้ถึงอีก months_ahead เดือนที่ยังไม่มี คืนจำนวนที่สร้างใหม่"""
+    first_month = (today or date.today()).replace(day=1)
+    return db.scalar(select(func.create_transaction_partitions(
+        first_month, add_months(first_month, months_ahead))))
+
+
+def run_partition_job(months_ahead: int = PARTITION_MONTHS_AHEAD) -> int:
+    db = SessionLocal()
+    try:
+        created = ensure_partitions(db, months_ahead)
+        db.commit()
+    finally:
+        db.close()
+
+    if created:
+        logger.info("transactions: created %s monthly partitions", created)
+    return created
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Create upcoming transactions partitions")
+    parser.add_argument("--months-ahead", type=int, default=PARTITION_MONTHS_AHEAD)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    created = run_partition_job(args.months_ahead)
+    logger.info("transactions partitions up to date (%s new)", created)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, String, Date, DateTime, Numeric, func
+from app.config.database import Base
+
+
+class PeriodSummaryRollup(Base):
+    """
+    ยอดรวมรายเดือน/รายปี ต่อ user
+    ดูแลโดย trigger trg_rollup_period_summary จากแถวรายวันใน period_summary
+    """
+    __tablename__ = "period_summary_rollup"
+
+    user_id_line = Column(String(255), primary_key=True)
+    period_level = Column(String(5), primary_key=True)  # month | year
+    period_start = Column(Date, primary_key=True)
+
+    total_income = Column(Numeric(14, 2), nullable=False, default=0)
+    total_expense = Column(Numeric(14, 2), nullable=False, default=0)
+    total_balance = Column(Numeric(14, 2), nullable=False, default=0)
+
+    updated_at = Column(DateTime, server_default=func.now(), nullable=False)
@@ -9,6 +9,9 @@ class Tag(Base):
     user_id_line = Column(Text, nullable=False)
     name = Column(Text, nullable=False)
     slug = Column(Text, nullable=False)
+    # จำนวน transaction_tags ที่อ้าง tag นี้ (trigger บน transaction_tags เป็นคนดูแล)
+    usage_count = Column(BigInteger, nullable=False,
+                         server_default="0", default=0)
 
     created_at = Column(DateTime(timezone=True),
                         server_default=func.now(), nullable=False)
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, BigInteger, String, Date, DateTime, Numeric, func
+from app.config.database import Base
+
+
+class TagSummaryDaily(Base):
+    """
+    ยอดรายวันต่อ tag ของ user ดูแลแบบ delta คู่กับ period_summary
+    รายการที่ไม่มี tag อยู่ใน tag_id = OTHERS_TAG_ID
+    รายการที่มีหลาย tag ถูกนับในทุก tag (เหมือน join ในรายงานเดิม)
+    """
+    __tablename__ = "tag_summary_daily"
+
+    user_id_line = Column(String(255), primary_key=True)
+    summary_date = Column(Date, primary_key=True)
+    tag_id = Column(BigInteger, primary_key=True)
+
+    total_income = Column(Numeric(14, 2), nullable=False, default=0)
+    total_expense = Column(Numeric(14, 2), nullable=False, default=0)
+
+    updated_at = Column(DateTime, server_default=func.now(), nullable=False)
@@ -10,14 +10,19 @@ class TransactionTypeEnum(str, enum.Enum):
 
 
 class Transaction(Base):
+    # partition รายเดือนตาม transaction_at, PK คือ (id, transaction_at) ทั้งใน DB และ ORM (id ยังมาจาก sequence เดียว)
+    # -> UPDATE/DELETE ตอน flush มี transaction_at ใน WHERE ตัดเหลือ partition เดียว
+    # query ควรกรองช่วง transaction_at ด้วยเสมอให้ Postgres ตัด partition ได้
     __tablename__ = "transactions"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     title = Column(String(255), nullable=False)
     user_id_line = Column(String(255), nullable=False)
     amount = Column(Numeric(10, 2), nullable=False)
-    type = Column(Enum(TransactionTypeEnum), nullable=False)
+    # คอลัมน์จริงเป็น VARCHAR(10) + CHECK ไม่ใช่ native enum ของ Postgres
+    type = Column(Enum(TransactionTypeEnum, native_enum=False,
+                  create_constraint=False, length=10), nullable=False)
     status = Column(String(10), default="active")
     source = Column(String(20), default="line")
     created_at = Column(DateTime, default=datetime.now)
-    transaction_at = Column(DateTime, nullable=False)
+    transaction_at = Column(DateTime, primary_key=True, nullable=False)
@@ -5,8 +5,9 @@ from app.config.database import Base
 class TransactionTag(Base):
     __tablename__ = "transaction_tags"
 
-    transaction_id = Column(BigInteger, ForeignKey(
-        "transactions.id", ondelete="CASCADE"), primary_key=True)
+    # ไม่มี FK ไป transactions (partitioned, ไม่มี unique บน id อย่างเดียว)
+    # ลบรายการแล้ว link ถูกลบตามด้วย trigger trg_transactions_delete_tags
+    transaction_id = Column(BigInteger, primary_key=True)
     tag_id = Column(BigInteger, ForeignKey(
         "tags.id", ondelete="CASCADE"), primary_key=True)
     created_at = Column(DateTime(timezone=True),
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, BigInteger, String, DateTime, func
+from app.config.database import Base
+
+
+class UserDataVersion(Base):
+    """
+    version ล่าสุดของข้อมูล user (ETag ของ GET รายงาน)
+    ตั้งใหม่จาก user_data_version_seq ทุกครั้งที่เขียน ดู app/utils/dataVersion.py
+    """
+    __tablename__ = "user_data_version"
+
+    user_id_line = Column(String(255), primary_key=True)
+    version = Column(BigInteger, nullable=False)
+
+    updated_at = Column(DateTime, server_default=func.now(), nullable=False)
@@ -0,0 +1,105 @@
+import asyncio
+from datetime import date, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.orm import Session
+
+from app.config.database import read_from_replica, run_read_session
+from app.dto.report import ReportTagRequest, ReportTagResponse
+from app.dto.transactions import FilterMode
+from app.utils.dataVersion import (
+    data_version, etag_headers, etag_matches, not_modified, request_etag,
+)
+from app.utils.dateRange import resolve_date_range, thai_today_range
+from app.utils.jsonResponse import FastJSONResponse
+from app.utils.reportTags import (
+    report_day_range, tag_report_cache, tag_report_from, tag_report_key, tag_totals_stmt,
+)
+from app.utils.summaryRollup import period_summary_cache, sum_period
+from app.utils.transactionQueries import fetch_rows, today_transactions_with_tags_stmt
+
+router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
+
+
+def _tag_totals(db: Session, user_id_line: str, start_day: date, end_day: date):
+    return db.execute(tag_totals_stmt(user_id_line, start_day, end_day)).all()
+
+
+@router.get("")
+async def get_dashboard(
+    request: Request,
+    user_id_line: str = Query(...),
+    mode: FilterMode = Query(FilterMode.month),
+    date: str | None = None,
+    month: int | None = None,
+    year: int | None = None,
+    start_date: str | None = None,
+    end_date: str | None = None,
+    top_n_enabled: bool = True,
+    top_n: int = Query(5, ge=1, le=50),
+    include_others: bool = True,
+    replica: bool = Depends(read_from_replica),
+):
+    """
+    หน้าแรกของ LIFF ใน request เดียว
+    - today  = GET /transactions/today/v2 (วันนี้ตามเวลาไทย)
+    - period = POST /period-summary/report ของช่วงที่เลือก (mode เหมือน /reports/tags, default เดือนนี้)
+    - tags   = POST /reports/tags ของช่วงเดียวกัน
+
+    สามส่วนไม่ขึ้นต่อกัน query พร้อมกันคนละ connection -> latency เท่าส่วนที่ช้าที่สุด
+    รายงาน tag ใช้ยอดรวมจาก period ไม่ sum ซ้ำ
+    period / tags ใช้ period_summary_cache / tag_report_cache ร่วมกับ endpoint เดิม
+    """
+    payload = ReportTagRequest(
+        user_id_line=user_id_line, mode=mode, date=date, month=month, year=year,
+        start_date=start_date, end_date=end_date,
+        top_n_enabled=top_n_enabled, top_n=top_n, include_others=include_others,
+    )
+    try:
+        start, end = resolve_date_range(
+            mode=mode, date=date, month=month, year=year,
+            start_date=start_date, end_date=end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # อ่าน version ก่อนทุกส่วน (ดู app/utils/dataVersion.py)
+    etag = request_etag(request, await run_read_session(replica, data_version, user_id_line))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    start_day, end_day = report_day_range(start, end)
+    today_start, today_end = thai_today_range()
+
+    summary_task = asyncio.ensure_future(period_summary_cache.get_or_compute(
+        user_id_line, (start_day, end_day),
+        lambda: run_read_session(replica, sum_period, user_id_line, start_day, end_day)))
+
+    async def compute_report():
+        # cache miss: ยอดต่อ tag query พร้อม today / period แล้วใช้ยอดรวมจาก period
+        rows, summary = await asyncio.gather(
+            run_read_session(replica, _tag_totals, user_id_line, start_day, end_day),
+            asyncio.shield(summary_task))
+        return tag_report_from(payload, start, end, summary, rows)
+
+    today, summary, report = await asyncio.gather(
+        run_read_session(replica, fetch_rows, today_transactions_with_tags_stmt(
+            user_id_line, today_start, today_end)),
+        summary_task,
+        tag_report_cache.get_or_compute(
+            user_id_line, tag_report_key(payload, start, end), compute_report),
+    )
+
+    total_income, total_expense, total_balance = summary
+    return FastJSONResponse({
+        "today": today,
+        "period": {
+            "user_id_line": user_id_line,
+            "start_date": start_day,
+            "end_date": end_day - timedelta(days=1),
+            "total_income": total_income,
+            "total_expense": total_expense,
+            "total_balance": total_balance,
+        },
+        # field เดียวกับ response_model ของ /reports/tags
+        "tags": ReportTagResponse.model_validate(report).model_dump(),
+    }, headers=etag_headers(etag))
@@ -0,0 +1,36 @@
+import os
+
+from fastapi import APIRouter
+
+from app.config.database import pool_status, replica_stats
+from app.config.dbPool import WEB_CONCURRENCY, connection_budget, pool_options
+from app.utils.cache import CACHE_BACKEND, cache_bus_stats, cache_stats
+
+router = APIRouter(prefix="/health", tags=["Health"])
+
+
+@router.get("/db-pool")
+def get_db_pool():
+    """สถานะ connection pool ของ worker นี้ (แต่ละ uvicorn worker มี pool ของตัวเอง)"""
+    options = pool_options()
+    return {
+        "pid": os.getpid(),
+        "workers": WEB_CONCURRENCY,
+        "connection_budget": connection_budget(),
+        "config": {
+            "pool_size": options["pool_size"],
+            "max_overflow": options["max_overflow"],
+            "pool_timeout": options["pool_timeout"],
+            "pool_recycle": options["pool_recycle"],
+            "pool_pre_ping": options["pool_pre_ping"],
+        },
+        "pools": pool_status(),
+        "replica": replica_stats(),
+    }
+
+
+@router.get("/cache")
+def get_cache_stats():
+    """hit/miss ของ cache ใน process นี้ และสถานะ pub/sub ที่ล้าง cache ข้าม worker"""
+    return {"pid": os.getpid(), "backend": CACHE_BACKEND,
+            "caches": cache_stats(), "invalidation_bus": cache_bus_stats()}
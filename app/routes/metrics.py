@@ -0,0 +1,103 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.config.database import pool_status, replica_stats
+from app.utils.cache import cache_bus_stats, cache_stats
+from app.utils.createBatcher import (
+    CREATE_BATCH_ENABLED, CREATE_BATCH_MAX_SIZE, CREATE_BATCH_WINDOW_MS, create_batcher,
+)
+from app.utils.metrics import render, snapshot_lines
+
+router = APIRouter(tags=["Health"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _pool_lines() -> list[str]:
+    pools = pool_status()
+    return [
+        *snapshot_lines("db_pool_checked_out", "gauge", "connection ที่ถูกยืมอยู่",
+                        [({"pool": p["pool"]}, p["checked_out"]) for p in pools]),
+        *snapshot_lines("db_pool_overflow", "gauge", "connection เกิน pool_size ตอนนี้",
+                        # QueuePool นับ overflow ติดลบตอนยังใช้ไม่เต็ม pool_size
+                        [({"pool": p["pool"]}, max(0, p["overflow"])) for p in pools]),
+        *snapshot_lines("db_pool_checkouts_total", "counter", "จำนวนครั้งที่ยืม connection",
+                        [({"pool": p["pool"]}, p["checkouts"]) for p in pools]),
+        *snapshot_lines("db_pool_timeouts_total", "counter", "รอ connection จน timeout",
+                        [({"pool": p["pool"]}, p["timeouts"]) for p in pools]),
+    ]
+
+
+def _cache_lines() -> list[str]:
+    caches = cache_stats()
+    return [
+        *snapshot_lines("cache_hits_total", "counter", "cache hit",
+                        [({"cache": c["name"]}, c["hits"]) for c in caches]),
+        *snapshot_lines("cache_misses_total", "counter", "cache miss",
+                        [({"cache": c["name"]}, c["misses"]) for c in caches]),
+        *snapshot_lines("cache_shared_total", "counter",
+                        "miss ที่รอผลของ request อื่นที่กำลังคำนวณ key เดียวกัน (single flight)",
+                        [({"cache": c["name"]}, c["shared"]) for c in caches]),
+        *snapshot_lines("cache_lock_waits_total", "counter",
+                        "miss ที่รอ worker อื่นคำนวณผ่าน lock ใน Redis",
+                        [({"cache": c["name"]}, c["lock_waits"]) for c in caches
+                         if "lock_waits" in c]),
+        *snapshot_lines("cache_errors_total", "counter", "คำสั่ง Redis ที่ล้ม (คำนวณตรงแทน)",
+                        [({"cache": c["name"]}, c["errors"]) for c in caches if "errors" in c]),
+        # redis backend ไม่มีขนาดต่อ worker
+        *snapshot_lines("cache_entries", "gauge", "จำนวน key ใน cache",
+                        [({"cache": c["name"]}, c["size"]) for c in caches
+                         if c["size"] is not None]),
+        *_cache_bus_lines(),
+    ]
+
+
+def _cache_bus_lines() -> list[str]:
+    bus = cache_bus_stats()
+    if bus is None:
+        return []
+    return [
+        *snapshot_lines("cache_invalidations_published_total", "counter",
+                        "invalidate ที่ส่งออกทาง pub/sub", [({}, bus["published"])]),
+        *snapshot_lines("cache_invalidations_received_total", "counter",
+                        "invalidate จาก worker อื่น", [({}, bus["received"])]),
+        *snapshot_lines("cache_bus_connected", "gauge", "listener ต่อ pub/sub อยู่",
+                        [({}, int(bus["connected"]))]),
+    ]
+
+
+def _replica_lines() -> list[str]:
+    replica = replica_stats()
+    if replica is None:
+        return []
+    return [
+        # วัดไม่ได้ -> ไม่มี sample (ดู db_read_routes_total{target="lag"})
+        *snapshot_lines("db_replica_lag_seconds", "gauge", "lag ของ replica จากการวัดครั้งล่าสุด",
+                        [({}, replica["lag_seconds"])] if replica["lag_seconds"] is not None else []),
+        *snapshot_lines("db_replica_sticky_users", "gauge", "user ที่เพิ่งเขียนและอ่านจาก primary อยู่",
+                        [({}, replica["sticky_users"])]),
+        *snapshot_lines("db_read_routes_total", "counter",
+                        "request อ่านแยกตามที่ไป (replica หรือเหตุผลที่ไป primary)",
+                        [({"target": target}, n) for target, n in replica["routes"].items()]),
+    ]
+
+
+def _create_batch_lines() -> list[str]:
+    return [
+        *snapshot_lines("transaction_create_batch_enabled", "gauge", "CREATE_BATCH_ENABLED",
+                        [({}, int(CREATE_BATCH_ENABLED))]),
+        *snapshot_lines("transaction_create_batch_window_seconds", "gauge", "CREATE_BATCH_WINDOW_MS",
+                        [({}, CREATE_BATCH_WINDOW_MS / 1000)]),
+        *snapshot_lines("transaction_create_batch_max_size", "gauge", "CREATE_BATCH_MAX_SIZE",
+                        [({}, CREATE_BATCH_MAX_SIZE)]),
+        *snapshot_lines("transaction_create_batch_pending", "gauge", "request ที่รอในคิวตอนนี้",
+                        [({}, create_batcher.pending)]),
+    ]
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Prometheus text format ของ worker นี้ (แต่ละ uvicorn worker เก็บค่าแยกกัน)"""
+    return PlainTextResponse(render([*_pool_lines(), *_replica_lines(), *_cache_lines(),
+                                    *_create_batch_lines()]),
+                             media_type=PROMETHEUS_CONTENT_TYPE)
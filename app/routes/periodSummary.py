@@ -1,27 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import date, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from datetime import date, datetime, timedelta
 
-from app.config.database import SessionLocal
-from app.models.periodSummaryModel import PeriodSummary
+from app.config.database import DbSession, get_read_db, run_db
 from app.dto.peroidSummary import (
+    SeriesGranularity,
     SummaryFilterPayload,
     SummaryAggregateResponse,
     SummaryType,
 )
+from app.utils.dataVersion import (
+    data_version, etag_headers, etag_matches, not_modified, request_etag,
+)
+from app.utils.dateRange import THAI_TZ
+from app.utils.jsonResponse import FastJSONResponse
+from app.utils.summaryRollup import period_summary_cache, sum_period
+from app.utils.summarySeries import (
+    MAX_SERIES_BUCKETS,
+    MAX_SERIES_DATE,
+    MIN_SERIES_DATE,
+    build_series,
+    default_series_start,
+    series_bucket_count,
+)
 
 router = APIRouter(prefix="/period-summary", tags=["Period Summary"])
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 def _month_range(year: int, month: int) -> tuple[date, date]:
     # [start, end)  end = first day of next month
     if month < 1 or month > 12:
@@ -43,7 +47,12 @@ def _year_range(year: int) -> tuple[date, date]:
 
 
 @router.post("/report", response_model=SummaryAggregateResponse)
-def get_period_summary(payload: SummaryFilterPayload, db: Session = Depends(get_db)):
+async def get_period_summary(
+    payload: SummaryFilterPayload,
+    request: Request,
+    response: Response,
+    db: DbSession = Depends(get_read_db),
+):
     """
     Summary type:
     - daily   -> start_date, end_date
@@ -87,24 +96,64 @@ def get_period_summary(payload: SummaryFilterPayload, db: Session = Depends(get_
     else:
         raise HTTPException(status_code=400, detail="Invalid summary type")
 
-    base = (
-        db.query(PeriodSummary)
-        .filter(PeriodSummary.user_id_line == payload.user_id_line)
-        .filter(PeriodSummary.summary_date >= start)
-        .filter(PeriodSummary.summary_date < end_exclusive)
-    )
+    etag = request_etag(request, await run_db(db, data_version, payload.user_id_line), payload)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers.update(etag_headers(etag))
 
-    # scalar() จะคืนค่าเดียว ไม่ต้อง first() และไม่หลุด None แบบงง ๆ
-    total_income = base.with_entities(func.coalesce(
-        func.sum(PeriodSummary.total_income), 0)).scalar() or 0
-    total_expense = base.with_entities(func.coalesce(
-        func.sum(PeriodSummary.total_expense), 0)).scalar() or 0
-    total_balance = base.with_entities(func.coalesce(
-        func.sum(PeriodSummary.total_balance), 0)).scalar() or 0
+    user_id_line = payload.user_id_line
+    total_income, total_expense, total_balance = await period_summary_cache.get_or_compute(
+        user_id_line, (start, end_exclusive),
+        lambda: run_db(db, sum_period, user_id_line, start, end_exclusive))
 
     return SummaryAggregateResponse(
-        user_id_line=payload.user_id_line,
+        user_id_line=user_id_line,
         total_income=total_income,
         total_expense=total_expense,
         total_balance=total_balance,
     )
+
+
+@router.get("/series")
+async def get_period_series(
+    request: Request,
+    user_id_line: str = Query(...),
+    granularity: SeriesGranularity = Query(SeriesGranularity.month),
+    start: date | None = None,
+    end: date | None = None,
+    by_tag: bool = False,
+    db: DbSession = Depends(get_read_db),
+):
+    """
+    ยอดรายวัน / รายสัปดาห์ (เริ่มวันจันทร์) / รายเดือน ของ [start, end] สำหรับกราฟ ใน query เดียว
+    - bucket ที่ไม่มีรายการได้ 0, bucket แรก/สุดท้ายนับเฉพาะวันในช่วง (ดู start/end ของ bucket)
+    - ไม่ส่ง end = วันนี้ตามเวลาไทย, ไม่ส่ง start = ย้อนหลัง 30 วัน / 12 สัปดาห์ / 12 เดือน
+    - by_tag=true -> แต่ละ bucket มี tags แยกยอดต่อ tag (รายการหลาย tag นับในทุก tag)
+    """
+    # ตรวจขอบก่อนคำนวณวันใด ๆ: end + 1 วันของ 9999-12-31 overflow
+    for value in (start, end):
+        if value is not None and not MIN_SERIES_DATE <= value <= MAX_SERIES_DATE:
+            raise HTTPException(
+                status_code=400,
+                detail=f"start and end must be between {MIN_SERIES_DATE} and {MAX_SERIES_DATE}")
+
+    if end is None:
+        end = datetime.now(THAI_TZ).date()
+    if start is None:
+        start = default_series_start(end, granularity)
+
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be <= end")
+
+    if series_bucket_count(start, end, granularity) > MAX_SERIES_BUCKETS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"too many {granularity.value} buckets (max {MAX_SERIES_BUCKETS})")
+
+    etag = request_etag(request, await run_db(db, data_version, user_id_line))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    return FastJSONResponse(await run_db(
+        db, build_series, user_id_line, start, end, granularity, by_tag),
+        headers=etag_headers(etag))
@@ -1,25 +1,35 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
 
-from app.config.database import SessionLocal
+from app.config.database import DbSession, get_read_db, run_db
 from app.dto.report import ReportTagRequest, ReportTagResponse
-from app.utils.reportTags import build_tag_report
+from app.utils.dataVersion import (
+    data_version, etag_headers, etag_matches, not_modified, request_etag,
+)
+from app.utils.reportTags import build_tag_report_cached, resolve_report_range
 
 router = APIRouter(prefix="/reports", tags=["Reports"])
 
 
-def get_db():
-    db = SessionLocal()
+@router.post("/tags", response_model=ReportTagResponse)
+async def report_by_tags(
+    payload: ReportTagRequest,
+    request: Request,
+    response: Response,
+    db: DbSession = Depends(get_read_db),
+):
+    # ตรวจช่วงวันก่อน ETag: payload ที่ผิดต้องได้ 400 แม้ If-None-Match จะตรง
     try:
-        yield db
-    finally:
-        db.close()
+        start, end = resolve_report_range(payload)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
+    etag = request_etag(request, await run_db(db, data_version, payload.user_id_line), payload)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers.update(etag_headers(etag))
 
-@router.post("/tags", response_model=ReportTagResponse)
-def report_by_tags(payload: ReportTagRequest, db: Session = Depends(get_db)):
     try:
-        return build_tag_report(db, payload)
+        return await build_tag_report_cached(db, payload, start, end)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
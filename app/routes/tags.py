@@ -1,38 +1,102 @@
+import os
+
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from app.config.database import SessionLocal
-from app.dto.tags import TagCreatePayload
+from sqlalchemy import and_, select
+from app.config.database import DbSession, get_db, get_read_db, run_db
+from app.dto.tags import TagCreatePayload, TagRow, TagSuggestion
 from app.models.tagModel import Tag
+from app.utils.cache import invalidate_user, make_cache
+from app.utils.dataVersion import bump_data_version
+from app.utils.jsonResponse import FastJSONResponse, to_rows
+from app.utils.tagIndex import TAG_INDEX_ENABLED, tag_index
 from app.utils.tags import make_slug, normalize_tag_name
 
 router = APIRouter(prefix="/tags", tags=["Tags"])
 
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+tag_search_cache = make_cache(
+    "tag_search",
+    maxsize=int(os.getenv("TAG_SEARCH_CACHE_SIZE", "2048")),
+    ttl=float(os.getenv("TAG_SEARCH_CACHE_TTL", "300")),
+)
 
 
 @router.get("")
-def search_tags(
+async def search_tags(
     user_id_line: str = Query(...),
     q: str = Query("", max_length=50),
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_read_db),
 ):
+    return FastJSONResponse(await tag_search_cache.get_or_compute(
+        user_id_line, q.strip(), lambda: run_db(db, _search_tags, user_id_line, q)))
+
+
+def _search_tags(db: Session, user_id_line: str, q: str):
     query = db.query(Tag).filter(Tag.user_id_line == user_id_line)
     if q.strip():
         like = f"%{q.strip()}%"
         query = query.filter(Tag.name.ilike(like))
-    return query.order_by(Tag.name.asc()).limit(30).all()
+    return to_rows(query.order_by(Tag.name.asc()).limit(30).all(), TagRow)
+
+
+@router.get("/autocomplete", response_model=list[TagSuggestion])
+async def autocomplete_tags(
+    user_id_line: str = Query(...),
+    q: str = Query("", max_length=50),
+    limit: int = Query(10, ge=1, le=30),
+    db: DbSession = Depends(get_read_db),
+):
+    """
+    คำแนะนำ tag ระหว่างพิมพ์ จัดอันดับตาม usage_count
+    - TAG_INDEX_ENABLED (default) -> index ใน memory ต่อ user โหลดครั้งแรกที่ค้น (และทุก TAG_INDEX_TTL)
+    - ปิด -> prefix บน slug (idx_tags_user_slug_prefix) แล้วเติมด้วย trigram บนชื่อ
+    """
+    if TAG_INDEX_ENABLED:
+        return await run_db(db, tag_index.search, user_id_line, q.strip(), limit)
+    return await run_db(db, _autocomplete_tags_db, user_id_line, q.strip(), limit)
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _autocomplete_tags_db(db: Session, user_id_line: str, q: str, limit: int):
+    columns = (Tag.id, Tag.name, Tag.slug, Tag.usage_count)
+    ranking = (Tag.usage_count.desc(), Tag.slug.asc())
+    prefix = _escape_like(make_slug(q))
+
+    rows = db.execute(
+        select(*columns)
+        .where(
+            Tag.user_id_line == user_id_line,
+            Tag.slug.like(f"{prefix}%", escape="\\"),
+        )
+        .order_by(*ranking)
+        .limit(limit)
+    ).mappings().all()
+
+    if len(rows) < limit and prefix:
+        rows += db.execute(
+            select(*columns)
+            .where(
+                Tag.user_id_line == user_id_line,
+                Tag.name.ilike(f"%{prefix}%", escape="\\"),
+                Tag.id.notin_([r["id"] for r in rows]),
+            )
+            .order_by(*ranking)
+            .limit(limit - len(rows))
+        ).mappings().all()
+
+    return [dict(r) for r in rows]
 
 
 @router.post("")
-def create_tag(payload: TagCreatePayload, db: Session = Depends(get_db)):
+async def create_tag(payload: TagCreatePayload, db: DbSession = Depends(get_db)):
+    return await run_db(db, _create_tag, payload)
+
+
+def _create_tag(db: Session, payload: TagCreatePayload):
     name = normalize_tag_name(payload.name)
     if not name:
         raise HTTPException(status_code=400, detail="Tag name is required")
@@ -49,6 +113,10 @@ def create_tag(payload: TagCreatePayload, db: Session = Depends(get_db)):
 
     tag = Tag(user_id_line=payload.userIdLine, name=name, slug=slug)
     db.add(tag)
+    bump_data_version(db, [payload.userIdLine])
     db.commit()
+    invalidate_user(payload.userIdLine)
     db.refresh(tag)
+    tag_index.record(payload.userIdLine, [
+                     {"id": tag.id, "name": tag.name, "slug": tag.slug}])
     return tag
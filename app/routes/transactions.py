@@ -1,51 +1,106 @@
-from zoneinfo import ZoneInfo
-from fastapi import APIRouter, HTTPException, Depends, Query
-from sqlalchemy import and_
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
-from app.dto.transactions import FilterMode, TransactionPayload, TransactionResponse, TransactionUpdatePayload
-from app.config.database import SessionLocal
-from datetime import datetime, timedelta
-from app.models.periodSummaryModel import PeriodSummary
+from app.dto.transactions import (
+    ExportFormat,
+    FilterMode,
+    TransactionBulkPayload,
+    TransactionBulkResponse,
+    TransactionPayload,
+    TransactionResponse,
+    TransactionUpdatePayload,
+)
+from app.config.database import (
+    DB_ASYNC, DbSession, get_db, get_read_db, read_from_replica, run_db,
+)
+from datetime import datetime
 from app.models.transactionModel import Transaction
-from app.models.transactionTagModel import TransactionTag
-from app.utils.dateRange import resolve_date_range
-from sqlalchemy import and_, func, case
-from app.models.tagModel import Tag as TagModel
-from app.models.transactionTagModel import TransactionTag
-from app.utils.tags import make_slug, normalize_tag_name
+from app.utils.dateRange import resolve_date_range, thai_today_range
+from app.utils.jsonResponse import FastJSONResponse
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, encode_cursor
+from app.utils.cache import invalidate_user
+from app.utils.createBatcher import CREATE_BATCH_ENABLED, create_batcher
+from app.utils.dataVersion import (
+    bump_data_version, data_version, etag_headers, etag_matches, not_modified, request_etag,
+)
+from app.utils.summaryDelta import apply_summary_deltas, lock_users
+from app.utils.transactionExport import aiter_export, iter_export
+from app.utils.transactionQueries import (
+    fetch_rows,
+    today_transactions_stmt,
+    today_transactions_with_tags_stmt,
+    transactions_stmt,
+    transactions_with_tags_stmt,
+)
+from app.utils.tagIndex import tag_index
+from app.utils.tagResolver import insert_tag_links, resolve_tag_ids
+from app.utils.tags import clean_tag_names, make_slug
 router = APIRouter(prefix="/transactions", tags=["Transactions"])
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+@router.post("/create", response_model=TransactionResponse)
+async def create_transaction(payload: TransactionPayload, db: DbSession = Depends(get_db)):
+    if CREATE_BATCH_ENABLED:
+        # group commit: รวมกับ request อื่นที่เข้ามาพร้อมกัน (app/utils/createBatcher.py)
+        transaction_id = await create_batcher.submit(payload)
+        return {"id": transaction_id, "message": "Transaction created successfully"}
+    return await run_db(db, _create_transaction, payload)
 
 
-@router.post("/create", response_model=TransactionResponse)
-def create_transaction(payload: TransactionPayload, db: Session = Depends(get_db)):
+def _create_transaction(db: Session, payload: TransactionPayload):
+    # id มาจาก RETURNING ไม่ต้อง refresh หลัง commit
+    # งานหลัง commit อยู่นอก try: ถ้าพลาดต้องไม่ rollback/500 ให้ client ส่งซ้ำแล้วได้รายการซ้ำ
     try:
-        transaction = Transaction(
-            title=payload.title,
-            amount=payload.amount,
-            type=payload.type.value,
-            user_id_line=payload.userIdLine,
-            transaction_at=payload.transactionAt,
-            created_at=datetime.now()
-        )
-        db.add(transaction)
+        transaction_id = db.execute(
+            insert(Transaction).values(
+                title=payload.title,
+                amount=payload.amount,
+                type=payload.type.value,
+                user_id_line=payload.userIdLine,
+                transaction_at=payload.transactionAt,
+                created_at=datetime.now(),
+            ).returning(Transaction.id)
+        ).scalar_one()
+        lock_users(db, [payload.userIdLine])
+        apply_summary_deltas(db, {transaction_id: 1},
+                             {transaction_id: payload.transactionAt})
+        bump_data_version(db, [payload.userIdLine])
         db.commit()
-        db.refresh(transaction)
-        return {"id": transaction.id, "message": "Transaction created successfully"}
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
+    invalidate_user(payload.userIdLine)
+    return {"id": transaction_id, "message": "Transaction created successfully"}
+
 
 @router.get("")
-def get_transactions(
+async def get_transactions(
+    user_id_line: str = Query(...),
+    mode: FilterMode = Query(...),
+    date: str | None = None,
+    month: int | None = None,
+    year: int | None = None,
+    start_date: str | None = None,
+    end_date: str | None = None,
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    db: DbSession = Depends(get_read_db),
+):
+    """
+    ไม่ส่ง limit/cursor -> list ทั้งช่วงแบบเดิม
+    ส่ง limit (และ cursor จาก next_cursor หน้าก่อน) -> {"items": [...], "next_cursor": ...}
+    """
+    start, end, limit, after = _resolve_listing(
+        mode, date, month, year, start_date, end_date, limit, cursor)
+    return FastJSONResponse(await run_db(
+        db, _list_transactions, transactions_stmt(user_id_line, start, end, limit, after), limit))
+
+
+@router.get("/v2")
+async def get_transactions_with_tags(
     user_id_line: str = Query(...),
     mode: FilterMode = Query(...),
     date: str | None = None,
@@ -53,8 +108,19 @@ def get_transactions(
     year: int | None = None,
     start_date: str | None = None,
     end_date: str | None = None,
-    db: Session = Depends(get_db),
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    db: DbSession = Depends(get_read_db),
 ):
+    """เหมือน GET /transactions แต่แต่ละรายการมี tags (รวมใน SQL ด้วย json_agg)"""
+    start, end, limit, after = _resolve_listing(
+        mode, date, month, year, start_date, end_date, limit, cursor)
+    return FastJSONResponse(await run_db(
+        db, _list_transactions,
+        transactions_with_tags_stmt(user_id_line, start, end, limit, after), limit))
+
+
+def _resolve_listing(mode, date, month, year, start_date, end_date, limit, cursor):
     try:
         start, end = resolve_date_range(
             mode=mode,
@@ -67,55 +133,142 @@ def get_transactions(
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-    return (
-        db.query(Transaction)
-        .filter(
-            and_(
-                Transaction.user_id_line == user_id_line,
-                Transaction.transaction_at >= start,
-                Transaction.transaction_at < end,
-                Transaction.status == "active",
-                Transaction.source != "auto",
-            )
+    return start, end, *_resolve_page(limit, cursor)
+
+
+def _resolve_page(
+    limit: int | None, cursor: str | None,
+) -> tuple[int | None, tuple[datetime, int] | None]:
+    """(limit, after) ของ listing: ส่ง cursor อย่างเดียวได้หน้าละ DEFAULT_PAGE_SIZE"""
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if limit is None and after is not None:
+        limit = DEFAULT_PAGE_SIZE
+
+    return limit, after
+
+
+def _list_transactions(db: Session, stmt, limit: int | None):
+    """
+    limit None -> list ทั้งช่วงแบบเดิม
+    ไม่งั้น stmt ดึงมา limit + 1 แถว ถ้าเกินแปลว่ายังมีหน้าถัดไป
+    """
+    rows = fetch_rows(db, stmt)
+    if limit is None:
+        return rows
+
+    items = rows[:limit]
+    last = items[-1] if len(rows) > limit else None
+    next_cursor = encode_cursor(last["transaction_at"], last["id"]) if last else None
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.get("/export")
+async def export_transactions(
+    user_id_line: str = Query(...),
+    mode: FilterMode = Query(...),
+    format: ExportFormat = Query(ExportFormat.csv),
+    date: str | None = None,
+    month: int | None = None,
+    year: int | None = None,
+    start_date: str | None = None,
+    end_date: str | None = None,
+    replica: bool = Depends(read_from_replica),
+):
+    try:
+        start, end = resolve_date_range(
+            mode=mode,
+            date=date,
+            month=month,
+            year=year,
+            start_date=start_date,
+            end_date=end_date,
         )
-        .order_by(Transaction.transaction_at.desc())
-        .all()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # stream เปิด connection ของตัวเอง ไม่ผูกกับ session ของ request
+    chunks = (aiter_export if DB_ASYNC else iter_export)(
+        user_id_line, start, end, format.value, replica)
+
+    media_type = "text/csv" if format == ExportFormat.csv else "application/x-ndjson"
+    filename = f"transactions-{start:%Y%m%d}-{end:%Y%m%d}.{format.value}"
+    return StreamingResponse(
+        chunks,
+        media_type=f"{media_type}; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
 
 
 @router.put("/{transaction_id}")
-def update_transaction(
+async def update_transaction(
+    transaction_id: int,
+    payload: TransactionUpdatePayload,
+    user_id_line: str,
+    db: DbSession = Depends(get_db)
+):
+    return await run_db(db, _update_transaction, transaction_id, payload, user_id_line)
+
+
+def _update_transaction(
+    db: Session,
     transaction_id: int,
     payload: TransactionUpdatePayload,
     user_id_line: str,
-    db: Session = Depends(get_db)
 ):
     tx = db.query(Transaction).filter(
         Transaction.id == transaction_id,
         Transaction.user_id_line == user_id_line,
         Transaction.status == "active"
-    ).first()
+    ).with_for_update().first()
 
     if not tx:
         raise HTTPException(status_code=404, detail="Transaction not found")
 
+    # ล็อกแถวรายการก่อน (request ที่แก้รายการเดียวกันรอกันตรงนี้) แล้วค่อยล็อก user ดู lock_users
+    lock_users(db, [user_id_line])
+
+    # amount/type/วันที่เปลี่ยน -> หักยอดเดิมออก แล้วบวกยอดใหม่กลับเข้า summary
+    affects_summary = (
+        payload.amount is not None
+        or payload.type is not None
+        or payload.transactionAt is not None
+    )
+    if affects_summary:
+        apply_summary_deltas(db, {tx.id: -1}, {tx.id: tx.transaction_at})
+
     if payload.title is not None:
         tx.title = payload.title
     if payload.amount is not None:
         tx.amount = payload.amount
     if payload.type is not None:
         tx.type = payload.type.value
+    if payload.transactionAt is not None:
+        tx.transaction_at = payload.transactionAt
 
+    if affects_summary:
+        db.flush()
+        apply_summary_deltas(db, {tx.id: 1}, {tx.id: tx.transaction_at})
+
+    bump_data_version(db, [user_id_line])
     db.commit()
+    invalidate_user(user_id_line)
     return {"message": "Transaction updated"}
 
 
 @router.delete("/{transaction_id}")
-def delete_transaction(
+async def delete_transaction(
     transaction_id: int,
     user_id_line: str = Query(...),
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
 ):
+    return await run_db(db, _delete_transaction, transaction_id, user_id_line)
+
+
+def _delete_transaction(db: Session, transaction_id: int, user_id_line: str):
     tx = (
         db.query(Transaction)
         .filter(
@@ -123,6 +276,7 @@ def delete_transaction(
             Transaction.user_id_line == user_id_line,
             Transaction.status == "active",
         )
+        .with_for_update()
         .first()
     )
 
@@ -130,66 +284,25 @@ def delete_transaction(
         raise HTTPException(status_code=404, detail="Transaction not found")
 
     tx.status = "inactive"
+    lock_users(db, [user_id_line])
+    apply_summary_deltas(db, {tx.id: -1}, {tx.id: tx.transaction_at})
+    bump_data_version(db, [user_id_line])
     db.commit()
-
-    target_date = tx.transaction_at.date()
-
-    income_sum, expense_sum = db.query(
-        func.coalesce(
-            func.sum(
-                case(
-                    (Transaction.type == "income", Transaction.amount)
-                )
-            ),
-            0
-        ),
-        func.coalesce(
-            func.sum(
-                case(
-                    (Transaction.type == "expense", Transaction.amount)
-                )
-            ),
-            0
-        )
-    ).filter(
-        Transaction.user_id_line == user_id_line,
-        func.date(Transaction.transaction_at) == target_date,
-        Transaction.status == "active"
-    ).first()
-
-    ps = db.query(PeriodSummary).filter(
-        PeriodSummary.user_id_line == user_id_line,
-        PeriodSummary.summary_date == target_date
-    ).first()
-
-    if ps:
-        ps.total_income = income_sum
-        ps.total_expense = expense_sum
-        ps.total_balance = income_sum - expense_sum
-        ps.updated_at = func.now()
-    else:
-        ps = PeriodSummary(
-            user_id_line=user_id_line,
-            summary_date=target_date,
-            total_income=income_sum,
-            total_expense=expense_sum,
-            total_balance=income_sum - expense_sum,
-            created_at=func.now(),
-            updated_at=func.now()
-        )
-        db.add(ps)
-
-    db.commit()
+    invalidate_user(user_id_line)
 
     return {"detail": "Transaction deleted (soft delete) and summary updated"}
 
 
 @router.post("/{transaction_id}/cancel")
-def cancel_transaction(
+async def cancel_transaction(
     transaction_id: int,
     user_id_line: str = Query(...),
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
 ):
+    return await run_db(db, _cancel_transaction, transaction_id, user_id_line)
+
+
+def _cancel_transaction(db: Session, transaction_id: int, user_id_line: str):
     tx = (
         db.query(Transaction)
         .filter(
@@ -197,6 +310,7 @@ def cancel_transaction(
             Transaction.user_id_line == user_id_line,
             Transaction.status == "active",
         )
+        .with_for_update()
         .first()
     )
 
@@ -219,177 +333,198 @@ def cancel_transaction(
     )
 
     db.add(refund)
+    db.flush()
+    lock_users(db, [user_id_line])
 
-    # 3) update summary ของวันนั้น (เหมือนโค้ดเดิมคุณ)
-    target_date = tx.transaction_at.date()
-
-    income_sum, expense_sum = db.query(
-        func.coalesce(
-            func.sum(
-                case((Transaction.type == "income", Transaction.amount))
-            ),
-            0
-        ),
-        func.coalesce(
-            func.sum(
-                case((Transaction.type == "expense", Transaction.amount))
-            ),
-            0
-        )
-    ).filter(
-        Transaction.user_id_line == user_id_line,
-        func.date(Transaction.transaction_at) == target_date,
-        Transaction.status == "active"
-    ).first()
-
-    ps = db.query(PeriodSummary).filter(
-        PeriodSummary.user_id_line == user_id_line,
-        PeriodSummary.summary_date == target_date
-    ).first()
-
-    if ps:
-        ps.total_income = income_sum
-        ps.total_expense = expense_sum
-        ps.total_balance = income_sum - expense_sum
-        ps.updated_at = func.now()
-    else:
-        ps = PeriodSummary(
-            user_id_line=user_id_line,
-            summary_date=target_date,
-            total_income=income_sum,
-            total_expense=expense_sum,
-            total_balance=income_sum - expense_sum,
-            created_at=func.now(),
-            updated_at=func.now()
-        )
-        db.add(ps)
-
+    # 3) หักยอดรายการเดิม + นับรายการคืนยอด ใน statement เดียว
+    apply_summary_deltas(db, {tx.id: -1, refund.id: 1},
+                         {tx.id: tx.transaction_at, refund.id: refund.transaction_at})
+    bump_data_version(db, [user_id_line])
     db.commit()
+    invalidate_user(user_id_line)
 
     return {"detail": "Transaction canceled and refund created"}
 
 
 @router.get("/today")
-def get_today_transactions(user_id_line: str, db: Session = Depends(get_db)):
-    THAI_TZ = ZoneInfo("Asia/Bangkok")
-    now = datetime.now(THAI_TZ)
-
-    start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    end = start + timedelta(days=1)
+async def get_today_transactions(user_id_line: str, db: DbSession = Depends(get_read_db)):
+    return FastJSONResponse(await run_db(db, _get_today_transactions, user_id_line))
 
-    transactions = db.query(Transaction).filter(
-        and_(
-            Transaction.user_id_line == user_id_line,
-            Transaction.transaction_at >= start,
-            Transaction.transaction_at < end,
-            # Transaction.status == "active"
-        )
-    ).order_by(Transaction.transaction_at.desc()).all()
 
-    return transactions
+def _get_today_transactions(db: Session, user_id_line: str):
+    start, end = thai_today_range()
+    return fetch_rows(db, today_transactions_stmt(user_id_line, start, end))
 
 
 @router.post("/create/v2", response_model=TransactionResponse)
-def create_transaction(payload: TransactionPayload, db: Session = Depends(get_db)):
+async def create_transaction(payload: TransactionPayload, db: DbSession = Depends(get_db)):
+    return await run_db(db, _create_transaction_v2, payload)
+
+
+def _create_transaction_v2(db: Session, payload: TransactionPayload):
+    # เหมือน _create_transaction: id จาก RETURNING, งานหลัง commit อยู่นอก try
     try:
-        transaction = Transaction(
-            title=payload.title,
-            amount=payload.amount,
-            type=payload.type.value,
-            user_id_line=payload.userIdLine,
-            transaction_at=payload.transactionAt,
-            created_at=datetime.now(),
-            status="active",
-        )
-        db.add(transaction)
-        db.flush()  # ได้ transaction.id โดยยังไม่ commit
+        transaction_id = db.execute(
+            insert(Transaction).values(
+                title=payload.title,
+                amount=payload.amount,
+                type=payload.type.value,
+                user_id_line=payload.userIdLine,
+                transaction_at=payload.transactionAt,
+                created_at=datetime.now(),
+                status="active",
+            ).returning(Transaction.id)
+        ).scalar_one()
 
         # ---- handle tags (optional) ----
-        tags = payload.tags or []
-        cleaned = []
-        seen = set()
-        for t in tags:
-            n = normalize_tag_name(t)
-            if not n:
-                continue
-            key = n.lower()
-            if key in seen:
-                continue
-            seen.add(key)
-            cleaned.append(n)
-
-        if cleaned:
-            # 1) fetch existing tags for this user & these slugs
-            slugs = [make_slug(x) for x in cleaned]
-            existing = (
-                db.query(TagModel)
-                .filter(TagModel.user_id_line == payload.userIdLine, TagModel.slug.in_(slugs))
-                .all()
-            )
-            by_slug = {x.slug: x for x in existing}
-
-            tag_ids = []
-            for name in cleaned:
-                slug = make_slug(name)
-                tag = by_slug.get(slug)
-                if not tag:
-                    tag = TagModel(user_id_line=payload.userIdLine,
-                                   name=name, slug=slug)
-                    db.add(tag)
-                    db.flush()  # ได้ tag.id
-                    by_slug[slug] = tag
-
-                tag_ids.append(tag.id)
-
-            for tag_id in tag_ids:
-                db.add(TransactionTag(transaction_id=transaction.id, tag_id=tag_id))
-
+        # resolve ทุก tag ในครั้งเดียว + insert link แบบ multi-row
+        # round trip คงที่ไม่ขึ้นกับจำนวน tag และไม่ 500 เมื่อ request อื่นสร้าง tag เดียวกันพร้อมกัน
+        cleaned = clean_tag_names(payload.tags)
+        tag_ids = resolve_tag_ids(
+            db, [(payload.userIdLine, name) for name in cleaned])
+        linked = [
+            {"id": tag_ids[(payload.userIdLine, make_slug(name))],
+             "name": name, "slug": make_slug(name)}
+            for name in cleaned
+        ]
+        insert_tag_links(db, [
+            {"transaction_id": transaction_id, "tag_id": t["id"]} for t in linked
+        ])
+
+        lock_users(db, [payload.userIdLine])
+        apply_summary_deltas(db, {transaction_id: 1},
+                             {transaction_id: payload.transactionAt})
+        bump_data_version(db, [payload.userIdLine])
         db.commit()
-        db.refresh(transaction)
-
-        return {"id": transaction.id, "message": "Transaction created successfully"}
-
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
+    invalidate_user(payload.userIdLine)
+    tag_index.record(payload.userIdLine, linked,
+                     {t["id"]: 1 for t in linked})
+    return {"id": transaction_id, "message": "Transaction created successfully"}
 
-@router.get("/today/v2")
-def get_today_transactions_with_tags(user_id_line: str, db: Session = Depends(get_db)):
-    THAI_TZ = ZoneInfo("Asia/Bangkok")
-    now = datetime.now(THAI_TZ)
-    start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    end = start + timedelta(days=1)
-
-    rows = (
-        db.query(Transaction, TagModel)
-        .outerjoin(TransactionTag, TransactionTag.transaction_id == Transaction.id)
-        .outerjoin(TagModel, TagModel.id == TransactionTag.tag_id)
-        .filter(
-            Transaction.user_id_line == user_id_line,
-            Transaction.transaction_at >= start,
-            Transaction.transaction_at < end,
-        )
-        .order_by(Transaction.transaction_at.desc())
-        .all()
+
+@router.post("/bulk", response_model=TransactionBulkResponse)
+async def create_transactions_bulk(payload: TransactionBulkPayload, db: DbSession = Depends(get_db)):
+    return await run_db(db, _create_transactions_bulk, payload)
+
+
+def _validation_detail(e: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(x) for x in err['loc'])}: {err['msg']}" for err in e.errors()
     )
 
-    result = {}
-    for tx, tag in rows:
-        if tx.id not in result:
-            result[tx.id] = {
-                "id": tx.id,
-                "title": tx.title,
-                "amount": tx.amount,
-                "type": tx.type,
-                "status": tx.status,
-                "source": tx.source,
-                "created_at": tx.created_at,
-                "transaction_at": tx.transaction_at,
-                "tags": []
-            }
-        if tag:
-            result[tx.id]["tags"].append(
-                {"id": tag.id, "name": tag.name, "slug": tag.slug})
-
-    return list(result.values())
+
+def _create_transactions_bulk(db: Session, payload: TransactionBulkPayload):
+    """
+    นำเข้าหลายรายการใน DB transaction เดียว
+    - item ที่ validate ไม่ผ่าน -> รายงาน error ราย item ไม่กระทบรายการอื่น
+    - tag ของทั้ง batch resolve พร้อมกัน, insert transactions / transaction_tags แบบ multi-row
+    - period_summary อัปเดตครั้งเดียวต่อ (user, วัน)
+    """
+    results = [None] * len(payload.items)
+    valid: list[tuple[int, TransactionPayload, list[str]]] = []
+
+    for index, item in enumerate(payload.items):
+        try:
+            tx = TransactionPayload.model_validate(item)
+        except ValidationError as e:
+            results[index] = {"index": index, "status": "error",
+                              "detail": _validation_detail(e)}
+            continue
+        valid.append((index, tx, clean_tag_names(tx.tags)))
+
+    if valid:
+        try:
+            now = datetime.now()
+            ids = db.execute(
+                insert(Transaction).returning(
+                    Transaction.id, sort_by_parameter_order=True),
+                [
+                    {
+                        "title": tx.title,
+                        "amount": tx.amount,
+                        "type": tx.type.value,
+                        "user_id_line": tx.userIdLine,
+                        "transaction_at": tx.transactionAt,
+                        "created_at": now,
+                        "status": "active",
+                        "source": "line",
+                    }
+                    for _, tx, _ in valid
+                ],
+            ).scalars().all()
+
+            tag_ids = resolve_tag_ids(
+                db, [(tx.userIdLine, name) for _, tx, names in valid for name in names])
+
+            links = [
+                {"transaction_id": tx_id,
+                 "tag_id": tag_ids[(tx.userIdLine, make_slug(name))]}
+                for tx_id, (_, tx, names) in zip(ids, valid)
+                for name in names
+            ]
+            insert_tag_links(db, links)
+
+            # ทุก user ของ request ครั้งเดียวก่อนปรับ summary (รวมคนที่ไม่มี tag) ดู lock_users
+            lock_users(db, [tx.userIdLine for _, tx, _ in valid])
+            apply_summary_deltas(
+                db, {tx_id: 1 for tx_id in ids},
+                {tx_id: tx.transactionAt for tx_id, (_, tx, _) in zip(ids, valid)})
+            bump_data_version(db, [tx.userIdLine for _, tx, _ in valid])
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            raise HTTPException(status_code=500, detail=str(e))
+
+        for user_id_line in {tx.userIdLine for _, tx, _ in valid}:
+            invalidate_user(user_id_line)
+        _record_tag_usage(valid, tag_ids)
+
+        for tx_id, (index, _, _) in zip(ids, valid):
+            results[index] = {"index": index, "status": "created", "id": tx_id}
+
+    created = len(valid)
+    return {"created": created, "failed": len(results) - created, "results": results}
+
+
+def _record_tag_usage(valid, tag_ids: dict) -> None:
+    """แจ้ง tag_index ของแต่ละ user ว่ามี tag ใหม่/ถูกใช้เพิ่มกี่ครั้ง"""
+    tags_by_user: dict[str, dict[int, dict]] = {}
+    used_by_user: dict[str, dict[int, int]] = {}
+    for _, tx, names in valid:
+        for name in names:
+            slug = make_slug(name)
+            tag_id = tag_ids[(tx.userIdLine, slug)]
+            tags_by_user.setdefault(tx.userIdLine, {})[tag_id] = {
+                "id": tag_id, "name": name, "slug": slug}
+            used = used_by_user.setdefault(tx.userIdLine, {})
+            used[tag_id] = used.get(tag_id, 0) + 1
+
+    for user_id_line, tags in tags_by_user.items():
+        tag_index.record(user_id_line, tags.values(),
+                         used_by_user[user_id_line])
+
+
+@router.get("/today/v2")
+async def get_today_transactions_with_tags(
+    request: Request,
+    user_id_line: str,
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    db: DbSession = Depends(get_read_db),
+):
+    limit, after = _resolve_page(limit, cursor)
+
+    # ETag: ไม่มีอะไรเปลี่ยน -> 304 ก่อน query รายการ
+    etag = request_etag(request, await run_db(db, data_version, user_id_line))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    start, end = thai_today_range()
+    return FastJSONResponse(await run_db(
+        db, _list_transactions,
+        today_transactions_with_tags_stmt(user_id_line, start, end, limit, after), limit),
+        headers=etag_headers(etag))
@@ -5,21 +5,12 @@ from uuid import uuid4
 
 from app.common.ErrorMessage import USER_NOT_FOUND
 from app.dto.users import UserPayload, UserResponse, UserSyncPayload, UserUpdatePayload
-from app.config.database import SessionLocal
+from app.config.database import get_sync_db as get_db
 from app.models.userModel import User
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
 
-# Dependency สำหรับ DB session
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 # -----------------------------
 # CREATE user
 # -----------------------------
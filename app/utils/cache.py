@@ -0,0 +1,314 @@
+"""
+cache ของ endpoint อ่าน แยก key ตาม user_id_line
+
+- CACHE_BACKEND=memory (default) -> TTLCache ใน process, redis -> RedisCache ร่วมทุก worker (app/utils/cacheRedis.py)
+- ตั้ง CACHE_REDIS_URL -> invalidate_user ส่งต่อทาง pub/sub ให้ทุก worker / container
+  (memory backend ก็ใช้ได้: cache ในแต่ละ worker ถูกล้างตาม write ของ worker อื่น)
+- get_or_compute: miss พร้อมกันหลาย request ของ key เดียวคำนวณครั้งเดียว (single flight)
+"""
+import asyncio
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Hashable, Tuple
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")  # memory | redis
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "")
+
+
+class SingleFlight:
+    """
+    request ที่ขอ key เดียวกันระหว่างที่ยังคำนวณอยู่รอผลเดียวกัน (ต่อ event loop / worker)
+    งานถูกแยกเป็น task: request แรกหลุดไป (client ตัด) คนที่รออยู่ยังได้ผล
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Future] = {}
+        self.shared = 0
+
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+
+class TTLCache:
+    """
+    LRU + TTL ใน process แยก key ตาม user_id_line
+    - invalidate_user() ล้างเฉพาะ key ของ user นั้น
+    - generation ต่อ user กันค่าที่คำนวณจากข้อมูลก่อน commit ถูกเขียนกลับหลัง invalidate
+      เก็บเฉพาะ user ที่กำลังคำนวณอยู่ (write ตอนไม่มีใครคำนวณไม่มีค่าไหนเก่า) -> dict ไม่โตตามจำนวน user
+    """
+
+    backend = "memory"
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data: OrderedDict[Tuple[str, Hashable], Tuple[float, Any]] = OrderedDict()
+        self._by_user: dict[str, set] = {}
+        self._generations: dict[str, int] = {}
+        # จำนวน compute ที่กำลังรันต่อ user
+        self._computing: dict[str, int] = {}
+        # clear() ทั้งก้อน (เช่นหลุดจาก pub/sub) -> ค่าที่กำลังคำนวณทุก user ถือว่าเก่า
+        self._epoch = 0
+        self.flights = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def generation(self, user_id_line: str) -> Hashable:
+        with self._lock:
+            return self._epoch, self._generations.get(user_id_line, 0)
+
+    def _begin(self, user_id_line: str) -> Hashable:
+        """เริ่ม compute: generation ที่ set() ต้องเห็นตรงกันตอนจบ"""
+        with self._lock:
+            self._computing[user_id_line] = self._computing.get(user_id_line, 0) + 1
+            return self._epoch, self._generations.get(user_id_line, 0)
+
+    def _end(self, user_id_line: str) -> None:
+        with self._lock:
+            running = self._computing.pop(user_id_line) - 1
+            if running:
+                self._computing[user_id_line] = running
+            else:
+                self._generations.pop(user_id_line, None)
+
+    def get(self, user_id_line: str, key: Hashable) -> Any:
+        """คืนค่าใน cache หรือ MISSING"""
+        full_key = (user_id_line, key)
+        with self._lock:
+            entry = self._data.get(full_key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._remove(full_key)
+                self.misses += 1
+                return MISSING
+
+            self._data.move_to_end(full_key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, user_id_line: str, key: Hashable, value: Any, generation: Hashable) -> None:
+        full_key = (user_id_line, key)
+        with self._lock:
+            # user มีการเขียนระหว่างที่คำนวณ -> ค่านี้อาจเก่าแล้ว ไม่เก็บ
+            if (self._epoch, self._generations.get(user_id_line, 0)) != generation:
+                return
+
+            self._data[full_key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(full_key)
+            self._by_user.setdefault(user_id_line, set()).add(full_key)
+
+            while len(self._data) > self.maxsize:
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self.evictions += 1
+
+    async def get_or_compute(self, user_id_line: str, key: Hashable,
+                             compute: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        ค่าใน cache หรือ await compute() แล้วเก็บ
+        generation อยู่ใน key ของ flight: request หลัง write ไม่รอผลที่เริ่มคำนวณก่อน write
+        (flight ที่ยังไม่เริ่ม compute ตอน write อ่านข้อมูลหลัง commit อยู่แล้ว ใช้ร่วมกันได้)
+        """
+        value = self.get(user_id_line, key)
+        if value is not MISSING:
+            return value
+
+        async def fill():
+            generation = self._begin(user_id_line)
+            try:
+                result = await compute()
+                self.set(user_id_line, key, result, generation)
+                return result
+            finally:
+                self._end(user_id_line)
+
+        return await self.flights.run(
+            (user_id_line, key, self.generation(user_id_line)), fill)
+
+    def invalidate_user(self, user_id_line: str) -> None:
+        with self._lock:
+            if user_id_line in self._computing:
+                self._generations[user_id_line] = self._generations.get(
+                    user_id_line, 0) + 1
+            for full_key in self._by_user.pop(user_id_line, set()):
+                self._data.pop(full_key, None)
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._generations.clear()
+            self._data.clear()
+            self._by_user.clear()
+
+    def _remove(self, full_key: Tuple[str, Hashable]) -> None:
+        self._data.pop(full_key, None)
+        keys = self._by_user.get(full_key[0])
+        if keys is not None:
+            keys.discard(full_key)
+            if not keys:
+                del self._by_user[full_key[0]]
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "backend": self.backend,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "shared": self.flights.shared,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+_caches: list = []
+# ของใน process ที่ไม่ใช่ cache ของ endpoint แต่ต้องล้างตาม write ของ worker อื่น (เช่น tag_index)
+_local_state: list = []
+# อยากรู้ทุก write ทั้งใน process นี้และจาก worker อื่น (เช่น read-your-writes ของ replica)
+_write_listeners: list = []
+# user ที่รอ publish หลัง callable ของ DB จบ (ดู deferred_invalidations)
+_deferred_publish: contextvars.ContextVar[list | None] = contextvars.ContextVar(
+    "cache_deferred_publish", default=None)
+
+
+def register_cache(cache):
+    _caches.append(cache)
+    return cache
+
+
+def make_cache(name: str, maxsize: int, ttl: float):
+    """cache ตาม CACHE_BACKEND (maxsize ใช้กับ memory, redis คุมขนาดด้วย maxmemory ของ server)"""
+    if CACHE_BACKEND == "redis":
+        if not CACHE_REDIS_URL:
+            raise RuntimeError("CACHE_BACKEND=redis requires CACHE_REDIS_URL")
+        from app.utils.cacheRedis import RedisCache
+        return register_cache(RedisCache(name, ttl))
+    return register_cache(TTLCache(name, maxsize, ttl))
+
+
+def register_local_state(state):
+    """state ต้องมี invalidate_user(user_id_line) และ clear()"""
+    _local_state.append(state)
+    return state
+
+
+def register_write_listener(listener):
+    """listener ต้องมี mark_write(user_id_line | None) None = ไม่รู้ว่า user ไหนเปลี่ยน"""
+    _write_listeners.append(listener)
+    return listener
+
+
+def invalidate_user(user_id_line: str) -> None:
+    """
+    เรียกหลัง commit ทุกครั้งที่ข้อมูลของ user เปลี่ยน
+    ภายใน deferred_invalidations (run_db / run_db_session) แค่จด user ไว้ publish ทีหลัง
+    นอกนั้น (job / CLI ใน thread ของตัวเอง) publish ทันที
+    """
+    for cache in _caches:
+        cache.invalidate_user(user_id_line)
+    for listener in _write_listeners:
+        listener.mark_write(user_id_line)
+    if CACHE_REDIS_URL:
+        deferred = _deferred_publish.get()
+        if deferred is not None:
+            deferred.append(user_id_line)
+        else:
+            _publish([user_id_line])
+
+
+def _publish(user_ids: list[str]) -> None:
+    # write commit ไปแล้ว: publish ล้มต้องไม่กลายเป็น error ของ request
+    try:
+        from app.utils.cacheRedis import invalidation_bus
+        invalidation_bus.publish(user_ids)
+    except Exception as e:
+        logger.warning("cache invalidation publish failed (%s)", type(e).__name__)
+
+
+@asynccontextmanager
+async def deferred_invalidations():
+    """
+    invalidate_user ใน block ไม่คุย Redis ตรงนั้น (DB_ASYNC: callable ของ DB รันบน event loop)
+    จบ block แล้วค่อย publish รวดเดียวใน thread และรอให้เสร็จก่อนตอบ client
+    -> worker อื่นเห็น generation ใหม่ก่อน request ถัดไปของ user นี้ (read-your-writes)
+    """
+    if not CACHE_REDIS_URL:
+        yield
+        return
+
+    pending: list[str] = []
+    token = _deferred_publish.set(pending)
+    try:
+        yield
+    finally:
+        _deferred_publish.reset(token)
+        if pending:
+            # shield: client ตัดระหว่างรอ publish ก็ยังส่งจนจบ
+            await asyncio.shield(asyncio.to_thread(_publish, list(dict.fromkeys(pending))))
+
+
+def apply_remote_invalidation(user_id_line: str | None) -> None:
+    """
+    write จาก worker อื่น: ล้างของใน process นี้ (ไม่ publish ต่อ)
+    None = ไม่รู้ว่าพลาดอะไรไป (เพิ่งต่อ pub/sub ใหม่) -> ล้างทั้งหมด
+    """
+    for state in (*_caches, *_local_state):
+        if user_id_line is None:
+            getattr(state, "clear", lambda: None)()
+        else:
+            state.invalidate_user(user_id_line)
+    for listener in _write_listeners:
+        listener.mark_write(user_id_line)
+
+
+def start_cache_bus() -> None:
+    if CACHE_REDIS_URL:
+        from app.utils.cacheRedis import invalidation_bus
+        invalidation_bus.start()
+
+
+def stop_cache_bus() -> None:
+    if CACHE_REDIS_URL:
+        from app.utils.cacheRedis import invalidation_bus
+        invalidation_bus.stop()
+
+
+def cache_stats() -> list[dict]:
+    return [cache.stats() for cache in _caches]
+
+
+def cache_bus_stats() -> dict | None:
+    if not CACHE_REDIS_URL:
+        return None
+    from app.utils.cacheRedis import invalidation_bus
+    return invalidation_bus.stats()
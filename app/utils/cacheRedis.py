@@ -0,0 +1,314 @@
+"""
+Redis ของ cache (โหลดเฉพาะเมื่อตั้ง CACHE_REDIS_URL) ใช้ได้กับทุก server ที่พูด Redis protocol
+
+RedisCache (CACHE_BACKEND=redis) ค่าเดียวใช้ร่วมทุก worker / container
+- {prefix}:gen:{user}            generation ของ user: token ใหม่ที่ไม่ซ้ำทุก invalidate อายุ CACHE_GENERATION_TTL
+- {prefix}:{cache}:{user}:{hash} pickle ของ (generation ตอนเริ่มคำนวณ, ค่า) อายุ ttl
+  อ่าน gen กับค่าด้วย MGET เดียว gen ไม่ตรง = miss (ค่าเก่าหมดอายุเองตาม ttl)
+  gen หมดอายุหลังค่าทุกค่าของ user หมดไปแล้ว (ไม่มีค่าไหนกลับมา match) -> key ไม่สะสมตามจำนวน user
+  ถ้า Redis evict gen ก่อนเวลา ค่าที่คำนวณก่อน write แรกกลับมา match ได้: ตั้ง maxmemory-policy
+  เป็น allkeys-* ไม่ได้ ใช้ volatile-ttl หรือ noeviction
+- stampede: worker แรกที่ SET NX {key}:lock ได้เป็นคนคำนวณ worker อื่นรอค่าจนถึง CACHE_LOCK_MS
+  แล้วค่อยคำนวณเอง ใน worker เดียวกันรวมด้วย SingleFlight ก่อนถึง Redis
+- Redis ล่ม / timeout -> คำนวณตรงจาก DB (cache ไม่ทำให้ request ล้ม)
+
+InvalidationBus: invalidate_user -> SET gen + PUBLISH ของทุก user ที่เขียน (round trip เดียว)
+ทุก worker subscribe แล้วล้าง TTLCache / tag_index ของตัวเอง
+ค่าใน Redis เป็น pickle: Redis ต้องเป็นของระบบเองเท่านั้น ห้ามเปิดให้ที่อื่นเขียน
+"""
+import asyncio
+import hashlib
+import logging
+import math
+import os
+import pickle
+import socket
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Hashable
+
+import orjson
+import redis
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+
+from app.utils.cache import CACHE_REDIS_URL, MISSING, SingleFlight, apply_remote_invalidation
+
+logger = logging.getLogger(__name__)
+
+CACHE_REDIS_PREFIX = os.getenv("CACHE_REDIS_PREFIX", "acc:cache")
+# คนคำนวณถือ lock ได้นานสุดเท่านี้ (ควรนานกว่า query ที่ช้าที่สุดของ endpoint ที่ cache)
+CACHE_LOCK_MS = int(os.getenv("CACHE_LOCK_MS", "5000"))
+CACHE_LOCK_POLL_MS = int(os.getenv("CACHE_LOCK_POLL_MS", "20"))
+# timeout ต่อคำสั่ง: Redis ช้า/ล่มไม่ควรทำให้ endpoint ช้ากว่าไม่มี cache มากนัก
+CACHE_REDIS_TIMEOUT = float(os.getenv("CACHE_REDIS_TIMEOUT", "0.2"))
+# อายุของ gen ต้องไม่สั้นกว่า ttl ของ cache ใด (ตรวจตอนสร้าง RedisCache)
+CACHE_GENERATION_TTL = int(os.getenv("CACHE_GENERATION_TTL", "86400"))
+
+INVALIDATION_CHANNEL = f"{CACHE_REDIS_PREFIX}:invalidate"
+
+
+def _generation_key(user_id_line: str) -> str:
+    return f"{CACHE_REDIS_PREFIX}:gen:{user_id_line}"
+
+
+_sync_client: redis.Redis | None = None
+_async_client: tuple[asyncio.AbstractEventLoop, aioredis.Redis] | None = None
+
+
+def sync_client() -> redis.Redis:
+    global _sync_client
+    if _sync_client is None:
+        _sync_client = redis.Redis.from_url(
+            CACHE_REDIS_URL, socket_timeout=CACHE_REDIS_TIMEOUT,
+            socket_connect_timeout=CACHE_REDIS_TIMEOUT)
+    return _sync_client
+
+
+def async_client() -> aioredis.Redis:
+    """หนึ่งตัวต่อ event loop (connection ของ redis.asyncio ผูกกับ loop ที่สร้าง)"""
+    global _async_client
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client[0] is not loop:
+        _async_client = (loop, aioredis.Redis.from_url(
+            CACHE_REDIS_URL, socket_timeout=CACHE_REDIS_TIMEOUT,
+            socket_connect_timeout=CACHE_REDIS_TIMEOUT))
+    return _async_client[1]
+
+
+class RedisCache:
+    backend = "redis"
+
+    def __init__(self, name: str, ttl: float):
+        if ttl > CACHE_GENERATION_TTL:
+            raise RuntimeError(
+                f"cache {name}: ttl {ttl}s is longer than CACHE_GENERATION_TTL "
+                f"({CACHE_GENERATION_TTL}s)")
+        self.name = name
+        self.ttl = ttl
+        self._prefix = f"{CACHE_REDIS_PREFIX}:{name}"
+        self._lock = threading.Lock()
+        self.flights = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.lock_waits = 0
+        self.errors = 0
+
+    def _count(self, field: str) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def _value_key(self, user_id_line: str, key: Hashable) -> str:
+        digest = hashlib.blake2b(repr(key).encode(), digest_size=12).hexdigest()
+        return f"{self._prefix}:{user_id_line}:{digest}"
+
+    async def get_or_compute(self, user_id_line: str, key: Hashable,
+                             compute: Callable[[], Awaitable[Any]]) -> Any:
+        client = async_client()
+        value_key = self._value_key(user_id_line, key)
+        try:
+            generation, raw = await client.mget(_generation_key(user_id_line), value_key)
+        except RedisError as e:
+            self._count("errors")
+            logger.warning("cache %s: redis read failed (%s), computing directly",
+                           self.name, type(e).__name__)
+            return await compute()
+
+        generation = generation or b""
+        value = self._decode(raw, generation)
+        if value is not MISSING:
+            self._count("hits")
+            return value
+
+        self._count("misses")
+        return await self.flights.run(
+            (value_key, generation),
+            lambda: self._fill(client, value_key, generation, compute))
+
+    def _decode(self, raw: bytes | None, generation: bytes) -> Any:
+        if raw is None:
+            return MISSING
+        try:
+            stored_generation, value = pickle.loads(raw)
+        except Exception:
+            # ค่าจาก deploy ก่อนที่ class เปลี่ยนไปแล้ว -> คำนวณใหม่ทับ
+            return MISSING
+        return value if stored_generation == generation else MISSING
+
+    async def _fill(self, client: aioredis.Redis, value_key: str, generation: bytes,
+                    compute: Callable[[], Awaitable[Any]]) -> Any:
+        lock_key = f"{value_key}:lock"
+        try:
+            leader = await client.set(lock_key, b"1", nx=True, px=CACHE_LOCK_MS)
+            if not leader:
+                self._count("lock_waits")
+                value = await self._wait_for(client, value_key, lock_key, generation)
+                if value is not MISSING:
+                    return value
+        except RedisError:
+            self._count("errors")
+            leader = False
+
+        try:
+            value = await compute()
+            await client.set(value_key, pickle.dumps((generation, value)),
+                             ex=max(1, math.ceil(self.ttl)))
+            return value
+        except RedisError as e:
+            self._count("errors")
+            logger.warning("cache %s: redis write failed (%s)", self.name, type(e).__name__)
+            return value
+        finally:
+            if leader:
+                try:
+                    await client.delete(lock_key)
+                except RedisError:
+                    self._count("errors")
+
+    async def _wait_for(self, client: aioredis.Redis, value_key: str, lock_key: str,
+                        generation: bytes) -> Any:
+        """รอค่าที่ worker อื่นกำลังคำนวณ MISSING = lock หาย/หมดเวลาแล้วยังไม่มีค่า"""
+        deadline = time.monotonic() + CACHE_LOCK_MS / 1000
+        while time.monotonic() < deadline:
+            await asyncio.sleep(CACHE_LOCK_POLL_MS / 1000)
+            raw, locked = await client.mget(value_key, lock_key)
+            value = self._decode(raw, generation)
+            if value is not MISSING or locked is None:
+                return value
+        return MISSING
+
+    def invalidate_user(self, user_id_line: str) -> None:
+        # SET gen ทำที่ InvalidationBus.publish ครั้งเดียวต่อ write ใช้ร่วมทุก RedisCache
+        pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "backend": self.backend,
+                "size": None,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "shared": self.flights.shared,
+                "lock_waits": self.lock_waits,
+                "errors": self.errors,
+            }
+
+
+class InvalidationBus:
+    """
+    publish: SET gen (token ใหม่) + PUBLISH [origin, user] ของทุก user ใน pipeline เดียว (blocking: เรียกนอก event loop)
+    listener: thread ต่อ worker ล้าง cache ใน process ตามข้อความของ worker อื่น
+    ต่อ pub/sub ใหม่ทุกครั้ง (รวมครั้งแรก) ล้างของใน process ทั้งหมด: ข้อความระหว่างหลุดหายไปแล้ว
+    """
+
+    def __init__(self):
+        self.origin = f"{socket.gethostname()}:{os.getpid()}"
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.published = 0
+        self.received = 0
+        self.errors = 0
+        self.connected = False
+
+    def _count(self, field: str) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def publish(self, user_ids: list[str]) -> None:
+        try:
+            pipe = sync_client().pipeline(transaction=False)
+            for user_id_line in user_ids:
+                pipe.set(_generation_key(user_id_line), uuid.uuid4().bytes,
+                         ex=CACHE_GENERATION_TTL)
+                pipe.publish(INVALIDATION_CHANNEL, orjson.dumps([self.origin, user_id_line]))
+            pipe.execute()
+            with self._lock:
+                self.published += len(user_ids)
+        except RedisError as e:
+            # write commit ไปแล้ว: ไม่ทำให้ request ล้ม แต่ cache ของ worker อื่นเก่าได้ถึง ttl
+            self._count("errors")
+            logger.warning("cache invalidation publish failed for %d users (%s)",
+                           len(user_ids), type(e).__name__)
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        # fork (uvicorn --workers) หลัง import -> origin ต้องเป็น pid ของ worker จริง
+        self.origin = f"{socket.gethostname()}:{os.getpid()}"
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._listen, name="cache-invalidation",
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+    def _listen(self) -> None:
+        backoff = 0.5
+        while not self._stop.is_set():
+            pubsub = None
+            try:
+                # socket_timeout ของ client ปกติสั้นเกินสำหรับรอข้อความ -> client แยก
+                pubsub = redis.Redis.from_url(
+                    CACHE_REDIS_URL, socket_connect_timeout=CACHE_REDIS_TIMEOUT,
+                    health_check_interval=30,
+                ).pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                apply_remote_invalidation(None)
+                self.connected = True
+                backoff = 0.5
+                while not self._stop.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        self._receive(message["data"])
+            except RedisError as e:
+                self._count("errors")
+                logger.warning("cache invalidation listener disconnected (%s), retrying in %.1fs",
+                               type(e).__name__, backoff)
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30)
+            finally:
+                self.connected = False
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except RedisError:
+                        pass
+
+    def _receive(self, data: bytes) -> None:
+        """ข้อความเสียข้อความเดียวต้องไม่ทำให้ listener ตาย (invalidate หยุดเงียบ ๆ)"""
+        try:
+            self._handle(data)
+        except Exception as e:
+            self._count("errors")
+            logger.warning("cache invalidation message ignored (%s)", type(e).__name__)
+
+    def _handle(self, data: bytes) -> None:
+        origin, user_id_line = orjson.loads(data)
+        if not isinstance(user_id_line, str):
+            raise TypeError("user_id_line must be a string")
+        if origin == self.origin:
+            return
+        self._count("received")
+        apply_remote_invalidation(user_id_line)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "origin": self.origin,
+                "connected": self.connected,
+                "published": self.published,
+                "received": self.received,
+                "errors": self.errors,
+            }
+
+
+invalidation_bus = InvalidationBus()
@@ -0,0 +1,195 @@
+"""
+group commit ของ POST /transactions/create (เปิดด้วย CREATE_BATCH_ENABLED=True)
+
+request ที่เข้ามาพร้อมกันรอในคิวของ worker ไม่เกิน CREATE_BATCH_WINDOW_MS
+หรือจนครบ CREATE_BATCH_MAX_SIZE รายการ แล้วถูกเขียนด้วย INSERT ... RETURNING หลายแถว
++ summary delta + commit ครั้งเดียว (fsync เดียวแทนหนึ่งครั้งต่อ request)
+แต่ละ request ยังได้ id ของตัวเอง
+
+batch ที่ล้ม (เช่นมีรายการเดียวที่ DB ปฏิเสธ) ถูก rollback ทั้งก้อนแล้วเขียนซ้ำทีละรายการ
+ใน savepoint ของแต่ละรายการ (ยัง commit ครั้งเดียว)
+-> error ไปถึงเฉพาะ request ที่ผิด request อื่นยังสำเร็จตามปกติ
+"""
+import asyncio
+import contextvars
+import logging
+import os
+import time
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.config.database import run_db_session
+from app.dto.transactions import TransactionPayload
+from app.models.transactionModel import Transaction
+from app.utils.cache import deferred_invalidations, invalidate_user
+from app.utils.dataVersion import bump_data_version
+from app.utils.metrics import CREATE_BATCH_FALLBACKS, CREATE_BATCH_SIZE, CREATE_BATCH_WAIT_SECONDS
+from app.utils.summaryDelta import apply_summary_deltas, lock_users
+
+logger = logging.getLogger(__name__)
+
+CREATE_BATCH_ENABLED = os.getenv("CREATE_BATCH_ENABLED", "False") == "True"
+# request แรกของ batch รอนานสุดเท่านี้ (latency ที่เพิ่มตอนโหลดต่ำ)
+CREATE_BATCH_WINDOW_MS = float(os.getenv("CREATE_BATCH_WINDOW_MS", "5"))
+CREATE_BATCH_MAX_SIZE = int(os.getenv("CREATE_BATCH_MAX_SIZE", "100"))
+
+
+def _insert_rows(db: Session, payloads: list[TransactionPayload]) -> list[int]:
+    now = datetime.now()
+    return db.execute(
+        insert(Transaction).returning(Transaction.id, sort_by_parameter_order=True),
+        [
+            {
+                "title": p.title,
+                "amount": p.amount,
+                "type": p.type.value,
+                "user_id_line": p.userIdLine,
+                "transaction_at": p.transactionAt,
+                "created_at": now,
+                "status": "active",
+                "source": "line",
+            }
+            for p in payloads
+        ],
+    ).scalars().all()
+
+
+def _commit_rows(db: Session, ids: list[int], payloads: list[TransactionPayload]) -> None:
+    """summary delta + data version ของแถวที่ insert แล้ว แล้ว commit"""
+    if ids:
+        lock_users(db, [p.userIdLine for p in payloads])
+        apply_summary_deltas(
+            db, {tx_id: 1 for tx_id in ids},
+            {tx_id: p.transactionAt for tx_id, p in zip(ids, payloads)})
+        bump_data_version(db, [p.userIdLine for p in payloads])
+    db.commit()
+
+
+def insert_transactions(db: Session, payloads: list[TransactionPayload]) -> list[int]:
+    """เขียนทุกรายการ + summary delta ใน transaction เดียว คืน id ตามลำดับ payloads"""
+    ids = _insert_rows(db, payloads)
+    _commit_rows(db, ids, payloads)
+    return ids
+
+
+def insert_each(db: Session, payloads: list[TransactionPayload]) -> list[int | Exception]:
+    """
+    insert ทีละรายการใน savepoint ของตัวเอง: รายการที่ DB ปฏิเสธถูก rollback เฉพาะตัว
+    แล้ว summary delta ของรายการที่ผ่าน + commit ครั้งเดียว (ล็อก user ทีเดียวตามลำดับเหมือน path ปกติ)
+    ส่วนหลัง insert ล้ม = ทั้งก้อนล้ม (raise) ไม่มีรายการไหน commit ไปครึ่งเดียว
+    """
+    results: list[int | Exception] = []
+    for payload in payloads:
+        try:
+            with db.begin_nested():
+                results.append(_insert_rows(db, [payload])[0])
+        except Exception as e:
+            results.append(e)
+
+    written = [(r, p) for r, p in zip(results, payloads) if not isinstance(r, Exception)]
+    _commit_rows(db, [r for r, _ in written], [p for _, p in written])
+    return results
+
+
+class CreateBatcher:
+    """คิวต่อ event loop (หนึ่งตัวต่อ uvicorn worker) ใช้จาก event loop เท่านั้น ไม่ต้องมี lock"""
+
+    def __init__(self, window_ms: float = CREATE_BATCH_WINDOW_MS,
+                 max_size: int = CREATE_BATCH_MAX_SIZE):
+        self.window = window_ms / 1000
+        self.max_size = max(1, max_size)
+        self._pending: list[tuple[TransactionPayload, asyncio.Future, float]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._flushing: set[asyncio.Task] = set()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def submit(self, payload: TransactionPayload) -> int:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((payload, future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_size:
+            self._flush("size")
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush, "window")
+        return await future
+
+    def _flush(self, trigger: str) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        flushed = time.perf_counter()
+        for _, _, queued in batch:
+            CREATE_BATCH_WAIT_SECONDS.observe((), flushed - queued)
+        CREATE_BATCH_SIZE.observe((trigger,), len(batch))
+
+        # context ว่าง: statement ของ batch ไม่ถูกนับเป็นของ request ที่บังเอิญทำให้ flush
+        task = asyncio.get_running_loop().create_task(
+            self._write(batch), context=contextvars.Context())
+        self._flushing.add(task)
+        task.add_done_callback(self._flushing.discard)
+
+    async def _write(self, batch) -> None:
+        payloads = [payload for payload, _, _ in batch]
+        results: list[int | Exception] = []
+        try:
+            results = await self._insert(payloads)
+            async with deferred_invalidations():
+                self._invalidate({p.userIdLine for p, r in zip(payloads, results)
+                                  if not isinstance(r, Exception)})
+        finally:
+            # ทุก future ต้องได้คำตอบเสมอ (รวมตอน task ถูก cancel) ไม่งั้น request ค้างจน client timeout
+            self._resolve(batch, results)
+
+    async def _insert(self, payloads: list[TransactionPayload]) -> list[int | Exception]:
+        try:
+            return await run_db_session(insert_transactions, payloads)
+        except Exception as e:
+            # ไม่ log ตัว exception เต็ม ๆ (มี parameters = ข้อมูลของ user)
+            logger.warning("create batch of %d failed (%s), retrying one by one",
+                           len(payloads), type(e).__name__)
+            CREATE_BATCH_FALLBACKS.inc(())
+
+        try:
+            return await run_db_session(insert_each, payloads)
+        except Exception as e:
+            # fallback ก็ล้ม (pool timeout, connection หลุด ...) -> ทุกรายการในก้อนได้ 500
+            logger.error("create batch fallback of %d failed (%s)",
+                         len(payloads), type(e).__name__)
+            return [e] * len(payloads)
+
+    @staticmethod
+    def _invalidate(user_ids: set[str]) -> None:
+        # ข้อมูล commit แล้ว: cache ล้างไม่สำเร็จไม่ควรทำให้ request ที่เขียนสำเร็จได้ error
+        for user_id_line in user_ids:
+            try:
+                invalidate_user(user_id_line)
+            except Exception as e:
+                logger.warning("cache invalidation after create batch failed (%s)",
+                               type(e).__name__)
+
+    @staticmethod
+    def _resolve(batch, results: list[int | Exception]) -> None:
+        for index, (_, future, _) in enumerate(batch):
+            if future.done():  # client ตัดการเชื่อมต่อไปแล้ว
+                continue
+            result = results[index] if index < len(results) else None
+            if result is None:
+                future.set_exception(HTTPException(status_code=500, detail="create batch aborted"))
+            elif isinstance(result, Exception):
+                future.set_exception(HTTPException(status_code=500, detail=str(result)))
+            else:
+                future.set_result(result)
+
+
+create_batcher = CreateBatcher()
@@ -0,0 +1,84 @@
+"""
+ETag / If-None-Match ของ endpoint อ่านรายงาน จาก version ข้อมูลต่อ user (user_data_version)
+
+- path ที่เขียนข้อมูลเรียก bump_data_version ก่อน commit (transaction เดียวกับข้อมูล)
+- endpoint อ่าน version ก่อน query อื่นทุกตัว แล้วสร้าง ETag จาก version + request
+  If-None-Match ตรง -> 304 ทันที (PK lookup แถวเดียว ไม่มี aggregate ไม่มี body)
+- อ่าน version ก่อนข้อมูลเสมอ: write ที่ commit แทรกระหว่างกันทำให้ได้ข้อมูลใหม่กว่า ETag
+  (request ถัดไปแค่ได้ 200 ซ้ำ) แต่ไม่มีทางได้ข้อมูลเก่าคู่กับ ETag ใหม่
+"""
+import hashlib
+from datetime import datetime
+from typing import Iterable
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.userDataVersionModel import UserDataVersion
+from app.utils.dateRange import THAI_TZ
+
+# client ต้องถามใหม่ทุกครั้ง (ส่ง If-None-Match) และ proxy ห้ามเก็บ (ข้อมูลของ user)
+CACHE_CONTROL = "private, no-cache"
+
+
+def bump_data_version(db: Session, user_ids: Iterable[str]) -> None:
+    """ตั้ง version ใหม่ให้ user ที่ข้อมูลเปลี่ยน (เรียงตาม user กัน deadlock ระหว่าง batch)"""
+    users = sorted(set(user_ids))
+    if not users:
+        return
+
+    stmt = insert(UserDataVersion).values([
+        {"user_id_line": user_id_line,
+         "version": func.nextval("user_data_version_seq"),
+         "updated_at": func.now()}
+        for user_id_line in users
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserDataVersion.user_id_line],
+        set_={"version": stmt.excluded.version, "updated_at": func.now()},
+    )
+    db.execute(stmt)
+
+
+def data_version(db: Session, user_id_line: str) -> int:
+    """0 = ยังไม่เคยเขียนอะไรหลังเปิดใช้ตารางนี้"""
+    return db.scalar(
+        select(UserDataVersion.version).where(UserDataVersion.user_id_line == user_id_line)
+    ) or 0
+
+
+def request_etag(request: Request, version: int, payload: BaseModel | None = None) -> str:
+    """
+    strong ETag ของ representation นี้: version + path + query (+ body ของ POST)
+    รวมวันนี้ (เวลาไทย) ด้วย: ช่วงที่ resolve จาก "วันนี้" (today, เดือนนี้, default ของ series)
+    เปลี่ยนตอนข้ามวันแม้ข้อมูลไม่เปลี่ยน
+    """
+    parts = (
+        request.url.path,
+        sorted(request.query_params.multi_items()),
+        payload.model_dump_json() if payload is not None else "",
+        datetime.now(THAI_TZ).date().isoformat(),
+    )
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=8).hexdigest()
+    return f'"{version}-{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match เทียบแบบ weak (RFC 9110 13.1.2): ตัด W/ ออกก่อนเทียบ
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def etag_headers(etag: str) -> dict[str, str]:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=etag_headers(etag))
@@ -1,5 +1,14 @@
 from datetime import datetime, timedelta
 from typing import Tuple
+from zoneinfo import ZoneInfo
+
+THAI_TZ = ZoneInfo("Asia/Bangkok")
+
+
+def thai_today_range() -> Tuple[datetime, datetime]:
+    """วันนี้ตามเวลาไทย [00:00, 00:00 ของพรุ่งนี้) (ใช้กับ /transactions/today และ /dashboard)"""
+    start = datetime.now(THAI_TZ).replace(hour=0, minute=0, second=0, microsecond=0)
+    return start, start + timedelta(days=1)
 
 
 def _day_range(date: str | None) -> Tuple[datetime, datetime]:
@@ -0,0 +1,31 @@
+from decimal import Decimal
+from typing import Any, Iterable
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+def _default(obj: Any):
+    # Decimal แปลงแบบเดียวกับ jsonable_encoder ของ FastAPI (มีทศนิยม -> float)
+    if isinstance(obj, Decimal):
+        return int(obj) if obj.as_tuple().exponent >= 0 else float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    default_response_class ของทั้ง app: orjson แทน json ของ stdlib
+    datetime / UUID / Enum orjson encode เองใน C, Decimal ผ่าน _default
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def to_rows(objs: Iterable[Any], schema: type) -> list[dict]:
+    """
+    ORM object -> dict เฉพาะ field ที่ประกาศใน schema (TypedDict ใน app/dto)
+    ใช้คู่กับ FastJSONResponse ตรง ๆ เพื่อข้าม jsonable_encoder ที่ไล่ __dict__ ทีละ object
+    """
+    fields = tuple(schema.__annotations__)
+    return [{f: getattr(o, f) for f in fields} for o in objs]
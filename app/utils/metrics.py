@@ -0,0 +1,241 @@
+import contextvars
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Iterable
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# ปิดได้ด้วย METRICS_ENABLED=False -> ไม่ติด middleware / event hook เลย (ไม่มี overhead ต่อ request)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True") == "True"
+# statement ที่ช้ากว่านี้ลง log พร้อม route (0 = ไม่ log)
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+UNMATCHED = "unmatched"   # 404 ไม่ใช้ path จริงเป็น label กัน cardinality บวม
+NO_ROUTE = "-"            # statement นอก request เช่น job / startup
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# =========================
+# Metric types (Prometheus text format 0.0.4)
+# =========================
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...], buckets: Iterable[float]):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # label values -> [count ต่อ bucket (ไม่สะสม) ..., +Inf, sum]
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, values: tuple, amount: float) -> None:
+        index = bisect_left(self.buckets, amount)
+        with self._lock:
+            series = self._series.get(values)
+            if series is None:
+                series = self._series[values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {values: list(series) for values, series in self._series.items()}
+
+        for values, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), series):
+                cumulative += count
+                le = 'le="' + (bound if bound == "+Inf" else _number(float(bound))) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labels, values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, values)} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labels, values)} {cumulative}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._lock = threading.Lock()
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, values: tuple, amount: float = 1) -> None:
+        with self._lock:
+            self._values[values] = self._values.get(values, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            snapshot = dict(self._values)
+        for values, value in sorted(snapshot.items()):
+            lines.append(f"{self.name}{_labels(self.labels, values)} {_number(value)}")
+        return lines
+
+
+def snapshot_lines(name: str, kind: str, help_text: str,
+                   samples: Iterable[tuple[dict, float]]) -> list[str]:
+    """ค่าที่อ่านจากที่อื่นตอน scrape (เช่น pool / cache stats) kind = gauge | counter"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        names = tuple(labels)
+        lines.append(f"{name}{_labels(names, tuple(labels[n] for n in names))} {_number(value)}")
+    return lines
+
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Request latency (รวม stream body)",
+    ("method", "route", "status"), LATENCY_BUCKETS)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds", "เวลารวมที่รอ Postgres ต่อ request",
+    ("method", "route"), LATENCY_BUCKETS)
+REQUEST_APP_SECONDS = Histogram(
+    "http_request_app_seconds", "เวลาฝั่ง Python ต่อ request (latency - เวลา DB)",
+    ("method", "route"), LATENCY_BUCKETS)
+REQUEST_STATEMENTS = Histogram(
+    "http_request_db_statements", "จำนวน statement ที่ส่งไป Postgres ต่อ request",
+    ("method", "route"), STATEMENT_BUCKETS)
+STATEMENT_SECONDS = Histogram(
+    "db_statement_duration_seconds", "เวลาต่อ statement (รวม statement นอก request)",
+    (), LATENCY_BUCKETS)
+SLOW_STATEMENTS = Counter(
+    "db_slow_statements_total", "statement ที่ช้ากว่า SLOW_QUERY_MS",
+    ("method", "route"))
+
+CREATE_BATCH_SIZE = Histogram(
+    "transaction_create_batch_size", "จำนวนรายการต่อ commit ของ group commit (trigger = window | size)",
+    ("trigger",), BATCH_BUCKETS)
+CREATE_BATCH_WAIT_SECONDS = Histogram(
+    "transaction_create_batch_wait_seconds", "เวลาที่ request รอในคิวก่อนถูก flush",
+    (), LATENCY_BUCKETS)
+CREATE_BATCH_FALLBACKS = Counter(
+    "transaction_create_batch_fallbacks_total", "batch ที่ล้มแล้วเขียนซ้ำทีละรายการ", ())
+
+METRICS = (REQUEST_SECONDS, REQUEST_DB_SECONDS, REQUEST_APP_SECONDS,
+           REQUEST_STATEMENTS, STATEMENT_SECONDS, SLOW_STATEMENTS,
+           CREATE_BATCH_SIZE, CREATE_BATCH_WAIT_SECONDS, CREATE_BATCH_FALLBACKS)
+
+
+# =========================
+# Per-request state
+# =========================
+class RequestStats:
+    __slots__ = ("scope", "statements", "db_seconds")
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.statements = 0
+        self.db_seconds = 0.0
+
+    @property
+    def method(self) -> str:
+        return self.scope["method"]
+
+    @property
+    def route(self) -> str:
+        # router ของ Starlette ใส่ route ที่ match ลงใน scope เดียวกันก่อนเรียก handler
+        route = self.scope.get("route")
+        return getattr(route, "path", UNMATCHED)
+
+
+# object เดียวต่อ request ถูกแก้ค่าใน threadpool / greenlet ของ run_db ได้ (contextvar ถูก copy ตาม)
+_current: contextvars.ContextVar[RequestStats | None] = contextvars.ContextVar(
+    "request_stats", default=None)
+
+
+class MetricsMiddleware:
+    """ASGI middleware ล้วน (ไม่ใช้ BaseHTTPMiddleware ที่สร้าง task เพิ่มต่อ request)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = _current.set(stats)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current.reset(token)
+            method, route = stats.method, stats.route
+            REQUEST_SECONDS.observe((method, route, status), elapsed)
+            REQUEST_DB_SECONDS.observe((method, route), stats.db_seconds)
+            REQUEST_APP_SECONDS.observe((method, route), max(0.0, elapsed - stats.db_seconds))
+            REQUEST_STATEMENTS.observe((method, route), stats.statements)
+
+
+# =========================
+# SQL hooks
+# =========================
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._metrics_started
+    STATEMENT_SECONDS.observe((), elapsed)
+
+    stats = _current.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_seconds += elapsed
+
+    if SLOW_QUERY_MS and elapsed * 1000 >= SLOW_QUERY_MS:
+        method, route = (stats.method, stats.route) if stats is not None else (NO_ROUTE, NO_ROUTE)
+        SLOW_STATEMENTS.inc((method, route))
+        # ไม่ log parameters (มีข้อมูลของ user)
+        logger.warning("slow query %.1f ms on %s %s: %s",
+                       elapsed * 1000, method, route, " ".join(statement.split())[:1000])
+
+
+def install_sql_hooks(*engines) -> None:
+    """ติด hook จับเวลาและนับ statement ให้ engine (AsyncEngine ใช้ .sync_engine)"""
+    for engine in engines:
+        if engine is None:
+            continue
+        engine = getattr(engine, "sync_engine", engine)
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def render(extra: Iterable[str] = ()) -> str:
+    lines = [line for metric in METRICS for line in metric.render()]
+    lines.extend(extra)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,22 @@
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(transaction_at: datetime, transaction_id: int) -> str:
+    """cursor ทึบ (opaque) จากแถวสุดท้ายของหน้า: (transaction_at, id)"""
+    raw = json.dumps([transaction_at.isoformat(), transaction_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        at, transaction_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(at), int(transaction_id)
+    except (ValueError, TypeError):
+        raise ValueError("invalid cursor")
@@ -1,16 +1,27 @@
+import os
+from datetime import date, datetime, timedelta
 from typing import List, Dict, Any, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import func, case
+from sqlalchemy import func, select
 
-from app.models.transactionModel import Transaction
 from app.models.tagModel import Tag as TagModel
-from app.models.transactionTagModel import TransactionTag
+from app.models.tagSummaryModel import TagSummaryDaily
 from app.utils.dateRange import resolve_date_range
 from app.dto.reportDto import ReportTagRequest, ReportTagResponse
+from app.config.database import DbSession, run_db
+from app.utils.cache import make_cache
+from app.utils.summaryRollup import sum_period
 
 OTHERS_TAG_ID = 999999
 OTHERS_TAG_NAME = "อื่นๆ"
 
+# cache รายงานต่อ (user, ช่วงวันที่ resolve แล้ว, ตั้งค่า top_n) ล้างเมื่อ user มีการเขียน
+tag_report_cache = make_cache(
+    "tag_report",
+    maxsize=int(os.getenv("TAG_REPORT_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("TAG_REPORT_CACHE_TTL", "300")),
+)
+
 
 def to_top_n_with_others(
     rows: List[Dict[str, Any]],
@@ -49,56 +60,106 @@ def _format_tag_item(idx: int, r: Dict[str, Any], t_inc: float, t_exp: float) ->
     }
 
 
-def build_tag_report(db: Session, payload: ReportTagRequest) -> ReportTagResponse:
-    # 1. Resolve Range
-    start, end = resolve_date_range(
+def report_day_range(start: datetime, end: datetime) -> Tuple[date, date]:
+    """
+    ช่วงเวลา [start, end) -> ช่วงวัน [start_day, end_day)
+    end ที่ไม่ลงเที่ยงคืนพอดี (เช่น 23:59:59 ของ range/7d) นับวันนั้นทั้งวัน
+    """
+    end_day = end.date()
+    if end.time() != datetime.min.time():
+        end_day += timedelta(days=1)
+    return start.date(), end_day
+
+
+def resolve_report_range(payload: ReportTagRequest) -> Tuple[datetime, datetime]:
+    return resolve_date_range(
         mode=payload.mode, date=payload.date, month=payload.month,
         year=payload.year, start_date=payload.start_date, end_date=payload.end_date
     )
 
-    # 2. Summary (Income/Expense รวม)
-    summary_q = db.query(
-        func.coalesce(func.sum(
-            case((Transaction.type == "income", Transaction.amount), else_=0)), 0),
-        func.coalesce(func.sum(
-            case((Transaction.type == "expense", Transaction.amount), else_=0)), 0)
-    ).filter(
-        Transaction.user_id_line == payload.user_id_line,
-        Transaction.transaction_at >= start, Transaction.transaction_at < end,
-        Transaction.status == "active"
-    ).first()
-
-    income_sum, expense_sum = float(summary_q[0]), float(summary_q[1])
-
-    # 3. เตรียม Expression สำหรับ Group By (Fix GroupingError)
-    tag_id_expr = func.coalesce(TagModel.id, OTHERS_TAG_ID)
-    tag_name_expr = func.coalesce(TagModel.name, OTHERS_TAG_NAME)
-
-    # 4. Query Group by Tag
-    rows = (
-        db.query(
-            tag_id_expr.label("tag_id"),
-            tag_name_expr.label("tag_name"),
-            func.coalesce(func.sum(case((Transaction.type == "income",
-                          Transaction.amount), else_=0)), 0).label("income"),
-            func.coalesce(func.sum(case((Transaction.type == "expense",
-                          Transaction.amount), else_=0)), 0).label("expense"),
+
+def tag_report_key(payload: ReportTagRequest, start: datetime, end: datetime) -> tuple:
+    return (start, end, payload.top_n_enabled, payload.top_n, payload.include_others)
+
+
+async def build_tag_report_cached(
+    db: DbSession, payload: ReportTagRequest, start: datetime, end: datetime,
+) -> ReportTagResponse:
+    """
+    build_tag_report ผ่าน tag_report_cache (key ใช้ช่วงที่ resolve แล้ว today/7d จึงเลื่อนวันเองได้)
+    ช่วง [start, end) มาจาก resolve_report_range ที่ route ตรวจไว้ก่อนเทียบ ETag
+    """
+    return await tag_report_cache.get_or_compute(
+        payload.user_id_line, tag_report_key(payload, start, end),
+        lambda: run_db(db, build_tag_report, payload, start, end))
+
+
+def tag_totals_stmt(user_id_line: str, start_day: date, end_day: date):
+    """
+    ยอดรวมต่อ tag ของ [start_day, end_day) จาก tag_summary_daily
+    sum ต่อ tag_id ก่อนแล้วค่อย join tags (join แค่แถวละ tag ไม่ใช่ทุกแถว วัน x tag)
+    """
+    totals = (
+        select(
+            TagSummaryDaily.tag_id.label("tag_id"),
+            func.coalesce(func.sum(TagSummaryDaily.total_income), 0).label("income"),
+            func.coalesce(func.sum(TagSummaryDaily.total_expense), 0).label("expense"),
         )
-        .select_from(Transaction)
-        .outerjoin(TransactionTag, TransactionTag.transaction_id == Transaction.id)
-        .outerjoin(TagModel, TagModel.id == TransactionTag.tag_id)
-        .filter(
-            Transaction.user_id_line == payload.user_id_line,
-            Transaction.transaction_at >= start, Transaction.transaction_at < end,
-            Transaction.status == "active"
+        .where(
+            TagSummaryDaily.user_id_line == user_id_line,
+            TagSummaryDaily.summary_date >= start_day,
+            TagSummaryDaily.summary_date < end_day,
         )
-        # ใช้ expression ตัวเต็มใน group_by
-        .group_by(tag_id_expr, tag_name_expr)
-        .order_by(func.sum(Transaction.amount).desc())
-        .all()
+        .group_by(TagSummaryDaily.tag_id)
+        .subquery()
     )
 
-    # 5. Normalize & Finalize Data
+    return (
+        select(
+            totals.c.tag_id,
+            func.coalesce(TagModel.name, OTHERS_TAG_NAME).label("tag_name"),
+            totals.c.income,
+            totals.c.expense,
+        )
+        .select_from(totals)
+        .outerjoin(TagModel, TagModel.id == totals.c.tag_id)
+        .order_by((totals.c.income + totals.c.expense).desc())
+    )
+
+
+def build_tag_report(
+    db: Session,
+    payload: ReportTagRequest,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> ReportTagResponse:
+    # 1. Resolve Range
+    if start is None or end is None:
+        start, end = resolve_report_range(payload)
+
+    # rollup เก็บเป็นรายวัน -> แปลงเป็นช่วงวัน [start_day, end_day)
+    start_day, end_day = report_day_range(start, end)
+
+    # 2. Summary (Income/Expense รวม) จาก period_summary / rollup
+    summary = sum_period(db, payload.user_id_line, start_day, end_day)
+
+    # 3. Group by Tag จาก tag_summary_daily (แถวไม่เกิน วัน x tag)
+    rows = db.execute(tag_totals_stmt(payload.user_id_line, start_day, end_day)).all()
+
+    return tag_report_from(payload, start, end, summary, rows)
+
+
+def tag_report_from(
+    payload: ReportTagRequest,
+    start: datetime,
+    end: datetime,
+    summary: Tuple[Any, Any, Any],
+    rows,
+) -> ReportTagResponse:
+    """ประกอบรายงานจากผล sum_period และ tag_totals_stmt (GET /dashboard query สองอย่างนี้พร้อมกัน)"""
+    income_sum, expense_sum = float(summary[0]), float(summary[1])
+
+    # 4. Normalize & Finalize Data
     raw = [{"tag_id": int(r.tag_id), "tag_name": str(r.tag_name),
             "income": float(r.income), "expense": float(r.expense)}
            for r in rows if float(r.income) > 0 or float(r.expense) > 0]
@@ -0,0 +1,71 @@
+from datetime import datetime
+from typing import Iterable
+
+from sqlalchemy import BigInteger, DateTime, Integer, String, bindparam, func, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+
+# namespace ของ pg_advisory_xact_lock(int, int) สำหรับ serialize การเขียนราย user
+USER_LOCK_NAMESPACE = 41001
+
+
+def apply_summary_deltas(
+    db: Session,
+    signed_ids: dict[int, int],
+    transaction_at: dict[int, datetime] | None = None,
+) -> None:
+    """
+    ปรับ period_summary และ tag_summary_daily แบบ delta จากแถว transactions ที่ระบุ
+    signed_ids = {transaction_id: +1 | -1}  (+1 = นับเพิ่ม, -1 = หักออก)
+
+    อ่าน amount/type/transaction_at และ transaction_tags จากแถวจริงใน DB
+    (ต้อง flush รายการและ tag ก่อนเรียก) แล้ว INSERT ... ON CONFLICT DO UPDATE ใน function
+    apply_summary_deltas หนึ่งแถวต่อ (user, วัน) และ (user, วัน, tag) ไม่ sum ทั้งวันใหม่
+    ต้นทุนจึงไม่โตตามจำนวนรายการในวันนั้น
+
+    transaction_at = {transaction_id: transaction_at ที่อยู่ใน DB ตอนนี้} ถ้า caller รู้อยู่แล้ว
+    ใช้หา partition ของแต่ละแถวโดยตรง ต้องมีครบทุก id และตรงกับ DB
+    ไม่ส่ง = หาด้วย id อย่างเดียว (probe ทุก partition)
+    หาแถวไม่ครบทุก id (id ผิด หรือ transaction_at ไม่ตรง) -> RuntimeError แทนการนับขาดเงียบ ๆ
+
+    ผู้เรียกต้อง lock_users ทุก user ของ transaction นี้ไว้ก่อนแล้ว
+    """
+    if not signed_ids:
+        return
+
+    # sql/2026-10-18-09-summary-delta-function.sql: SELECT ธรรมดา SQLAlchemy cache ที่ compile แล้วได้
+    # (INSERT ... ON CONFLICT ของ dialect postgresql cache ไม่ได้ -> compile ใหม่ทุกครั้ง)
+    ids = list(signed_ids)
+    matched = db.scalar(select(func.apply_summary_deltas(
+        bindparam("delta_ids", ids, type_=ARRAY(BigInteger)),
+        bindparam("delta_signs", [signed_ids[tx_id] for tx_id in ids], type_=ARRAY(Integer)),
+        bindparam("delta_transaction_at",
+                  None if transaction_at is None else [transaction_at[tx_id] for tx_id in ids],
+                  type_=ARRAY(DateTime)),
+    )))
+    if matched != len(signed_ids):
+        raise RuntimeError(
+            f"summary delta matched {matched} of {len(signed_ids)} transactions")
+
+
+def lock_users(db: Session, user_ids: Iterable[str]) -> None:
+    """
+    advisory lock ราย user ถึงจบ transaction เรียกครั้งเดียวต่อ transaction ก่อน apply_summary_deltas
+    ด้วย user ทุกคนที่จะปรับ summary -> ทุก path ล็อกตามลำดับเดียวกัน ไม่ deadlock
+
+    ต้อง serialize ราย user: trigger rollup ล็อกแถวเดือน/ปีตามลำดับวันที่ที่แต่ละ request เจอ
+    สอง request ของ user เดียวกันจึงล็อกแถว summary สลับกันได้
+    ล็อกหลัง insert transactions / tags / transaction_tags แล้ว (ล็อกแถว tag ตามลำดับของมันเอง
+    ดู tagResolver) ระหว่างถือ lock จึงไม่รอแถวอื่นนอกจาก summary ของ user เดียวกัน
+    และช่วงที่ serialize เหลือแค่ summary delta + commit
+    ลำดับมาจาก WITH ORDINALITY ของ array ที่เรียงแล้ว (ORDER BY ใน subquery ไม่รับประกันลำดับที่เรียก)
+    """
+    user = (
+        func.unnest(bindparam("lock_users", sorted(set(user_ids)), type_=ARRAY(String)))
+        .table_valued("user_id_line", with_ordinality="n")
+        .render_derived(name="u")
+    )
+    db.execute(
+        select(func.pg_advisory_xact_lock(
+            USER_LOCK_NAMESPACE, func.hashtext(user.c.user_id_line)))
+        .order_by(user.c.n))
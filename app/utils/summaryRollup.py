@@ -0,0 +1,125 @@
+import os
+from datetime import date
+from decimal import Decimal
+from typing import List, Tuple
+
+from sqlalchemy import Select, and_, func, literal, or_, select, union_all
+from sqlalchemy.orm import Session
+
+from app.models.periodSummaryModel import PeriodSummary
+from app.models.periodSummaryRollupModel import PeriodSummaryRollup
+from app.utils.cache import make_cache
+
+# ผลของ sum_period ต่อ (user, start, end_exclusive) ใช้ร่วม /period-summary/report กับ /dashboard
+period_summary_cache = make_cache(
+    "period_summary",
+    maxsize=int(os.getenv("PERIOD_SUMMARY_CACHE_SIZE", "4096")),
+    ttl=float(os.getenv("PERIOD_SUMMARY_CACHE_TTL", "300")),
+)
+
+
+def _add_months(d: date, months: int) -> date:
+    index = d.year * 12 + (d.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def split_range(start: date, end_exclusive: date) -> Tuple[List[Tuple[date, date]], List[date], List[date]]:
+    """
+    แบ่ง [start, end_exclusive) เป็นชิ้นที่หยาบที่สุดที่ครอบได้พอดี
+    คืน (ช่วงรายวันหัว/ท้าย, ต้นเดือนที่เต็มเดือน, ต้นปีที่เต็มปี)
+    เช่น 2026-01-15 .. 2027-03-10 -> วัน 15-31 ม.ค., เดือน ก.พ.-ธ.ค. 2026, เดือน ม.ค.-ก.พ. 2027, วัน 1-9 มี.ค.
+    """
+    days: List[Tuple[date, date]] = []
+    months: List[date] = []
+    years: List[date] = []
+
+    if start >= end_exclusive:
+        return days, months, years
+
+    cur = start
+    if cur.day != 1:
+        head_end = min(_add_months(cur.replace(day=1), 1), end_exclusive)
+        days.append((cur, head_end))
+        cur = head_end
+
+    while cur < end_exclusive and _add_months(cur, 1) <= end_exclusive:
+        if cur.month == 1 and _add_months(cur, 12) <= end_exclusive:
+            years.append(cur)
+            cur = _add_months(cur, 12)
+        else:
+            months.append(cur)
+            cur = _add_months(cur, 1)
+
+    if cur < end_exclusive:
+        days.append((cur, end_exclusive))
+
+    return days, months, years
+
+
+def sum_period_stmt(user_id_line: str, start: date, end_exclusive: date) -> Select | None:
+    """statement ของ sum_period (None = ช่วงว่าง)"""
+    days, months, years = split_range(start, end_exclusive)
+
+    parts = []
+    if days:
+        parts.append(
+            select(
+                PeriodSummary.total_income.label("income"),
+                PeriodSummary.total_expense.label("expense"),
+                PeriodSummary.total_balance.label("balance"),
+            ).where(
+                PeriodSummary.user_id_line == user_id_line,
+                or_(*[
+                    and_(PeriodSummary.summary_date >= a,
+                         PeriodSummary.summary_date < b)
+                    for a, b in days
+                ]),
+            )
+        )
+
+    rollup_filters = []
+    if months:
+        rollup_filters.append(and_(
+            PeriodSummaryRollup.period_level == "month",
+            PeriodSummaryRollup.period_start.in_(months),
+        ))
+    if years:
+        rollup_filters.append(and_(
+            PeriodSummaryRollup.period_level == "year",
+            PeriodSummaryRollup.period_start.in_(years),
+        ))
+    if rollup_filters:
+        parts.append(
+            select(
+                PeriodSummaryRollup.total_income.label("income"),
+                PeriodSummaryRollup.total_expense.label("expense"),
+                PeriodSummaryRollup.total_balance.label("balance"),
+            ).where(
+                PeriodSummaryRollup.user_id_line == user_id_line,
+                or_(*rollup_filters),
+            )
+        )
+
+    if not parts:
+        return None
+
+    rows = (union_all(*parts) if len(parts) > 1 else parts[0]).subquery()
+    return select(
+        func.coalesce(func.sum(rows.c.income), literal(0)),
+        func.coalesce(func.sum(rows.c.expense), literal(0)),
+        func.coalesce(func.sum(rows.c.balance), literal(0)),
+    )
+
+
+def sum_period(db: Session, user_id_line: str, start: date, end_exclusive: date) -> Tuple[Decimal, Decimal, Decimal]:
+    """
+    รวม income / expense / balance ของ [start, end_exclusive) ใน query เดียว
+    อ่าน rollup ปี/เดือนสำหรับส่วนที่เต็มช่วง และแถวรายวันเฉพาะหัว/ท้าย
+    จำนวนแถวที่อ่านจึงไม่โตตามความยาวช่วง
+    """
+    stmt = sum_period_stmt(user_id_line, start, end_exclusive)
+    if stmt is None:
+        return Decimal(0), Decimal(0), Decimal(0)
+
+    income, expense, balance = db.execute(stmt).one()
+    return income, expense, balance
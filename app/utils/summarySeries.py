@@ -0,0 +1,245 @@
+from datetime import MAXYEAR, MINYEAR, date, timedelta
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import (
+    Date, DateTime, Select, and_, bindparam, cast, func, or_, select, union_all,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+
+from app.dto.peroidSummary import SeriesGranularity
+from app.models.periodSummaryModel import PeriodSummary
+from app.models.periodSummaryRollupModel import PeriodSummaryRollup
+from app.models.tagModel import Tag as TagModel
+from app.models.tagSummaryModel import TagSummaryDaily
+from app.utils.reportTags import OTHERS_TAG_NAME
+from app.utils.summaryRollup import _add_months, split_range
+
+# กันช่วงยาวเกิน (เช่น day ย้อนหลังหลายปี) ทั้งขนาด response และ array ที่ส่งเข้า query
+MAX_SERIES_BUCKETS = 400
+
+# ช่วงวันที่รับได้: เว้นหนึ่งปีจากขอบของ date ให้ end + 1 วัน, bucket ถัดไป
+# และ start ย้อนหลังตาม DEFAULT_SERIES_BUCKETS ไม่ overflow
+MIN_SERIES_DATE = date(MINYEAR + 1, 1, 1)
+MAX_SERIES_DATE = date(MAXYEAR - 1, 12, 31)
+
+# ไม่ส่ง start -> ย้อนหลังจาก end เท่านี้ bucket (รวม bucket ของ end)
+DEFAULT_SERIES_BUCKETS = {
+    SeriesGranularity.day: 30,
+    SeriesGranularity.week: 12,
+    SeriesGranularity.month: 12,
+}
+
+
+# =========================
+# Buckets
+# =========================
+def bucket_start(d: date, granularity: SeriesGranularity) -> date:
+    if granularity == SeriesGranularity.week:
+        return d - timedelta(days=d.weekday())
+    if granularity == SeriesGranularity.month:
+        return d.replace(day=1)
+    return d
+
+
+def next_bucket(d: date, granularity: SeriesGranularity) -> date:
+    if granularity == SeriesGranularity.week:
+        return d + timedelta(days=7)
+    if granularity == SeriesGranularity.month:
+        return _add_months(d, 1)
+    return d + timedelta(days=1)
+
+
+def default_series_start(end: date, granularity: SeriesGranularity) -> date:
+    first = bucket_start(end, granularity)
+    for _ in range(DEFAULT_SERIES_BUCKETS[granularity] - 1):
+        first = bucket_start(first - timedelta(days=1), granularity)
+    return first
+
+
+def series_buckets(start: date, end_exclusive: date, granularity: SeriesGranularity) -> List[date]:
+    """วันเริ่มของทุก bucket ที่ [start, end_exclusive) แตะ (bucket แรก/สุดท้ายอาจไม่เต็ม)"""
+    buckets = []
+    cur = bucket_start(start, granularity)
+    while cur < end_exclusive:
+        buckets.append(cur)
+        cur = next_bucket(cur, granularity)
+    return buckets
+
+
+def series_bucket_count(start: date, end: date, granularity: SeriesGranularity) -> int:
+    """จำนวน bucket ของ [start, end] (รวม end) เท่ากับ len(series_buckets) แต่ไม่สร้าง list"""
+    if granularity == SeriesGranularity.month:
+        return (end.year - start.year) * 12 + end.month - start.month + 1
+    if granularity == SeriesGranularity.week:
+        return (bucket_start(end, granularity) - bucket_start(start, granularity)).days // 7 + 1
+    return (end - start).days + 1
+
+
+def _bucket_of(column, granularity: SeriesGranularity):
+    # summary_date เป็นวันตามเวลาไทยอยู่แล้ว: cast เป็น timestamp ไม่มี timezone
+    # date_trunc จึงตัดตามปฏิทินของวันนั้นตรง ๆ ไม่ขึ้นกับ TimeZone ของ session
+    if granularity == SeriesGranularity.day:
+        return column
+    return cast(func.date_trunc(granularity.value, cast(column, DateTime)), Date)
+
+
+# =========================
+# Query
+# =========================
+def _daily_rows(user_id_line: str, ranges: List[Tuple[date, date]], granularity: SeriesGranularity):
+    return select(
+        _bucket_of(PeriodSummary.summary_date, granularity).label("bucket"),
+        PeriodSummary.total_income.label("income"),
+        PeriodSummary.total_expense.label("expense"),
+    ).where(
+        PeriodSummary.user_id_line == user_id_line,
+        or_(*[
+            and_(PeriodSummary.summary_date >= a, PeriodSummary.summary_date < b)
+            for a, b in ranges
+        ]),
+    )
+
+
+def _period_rows(user_id_line: str, start: date, end_exclusive: date,
+                 granularity: SeriesGranularity):
+    """
+    แถว (bucket, income, expense) ก่อน sum
+    bucket รายเดือนอ่าน rollup ของเดือนที่เต็ม และแถวรายวันเฉพาะหัว/ท้ายช่วง (เหมือน sum_period)
+    """
+    if granularity != SeriesGranularity.month:
+        return _daily_rows(user_id_line, [(start, end_exclusive)], granularity)
+
+    days, months, years = split_range(start, end_exclusive)
+    # ปีที่เต็มต้องแยกกลับเป็นรายเดือน (rollup ระดับ month มีครบทุกเดือนอยู่แล้ว)
+    months = sorted(months + [_add_months(y, i) for y in years for i in range(12)])
+
+    parts = []
+    if days:
+        parts.append(_daily_rows(user_id_line, days, granularity))
+    if months:
+        parts.append(select(
+            PeriodSummaryRollup.period_start.label("bucket"),
+            PeriodSummaryRollup.total_income.label("income"),
+            PeriodSummaryRollup.total_expense.label("expense"),
+        ).where(
+            PeriodSummaryRollup.user_id_line == user_id_line,
+            PeriodSummaryRollup.period_level == "month",
+            PeriodSummaryRollup.period_start.in_(months),
+        ))
+    return union_all(*parts) if len(parts) > 1 else parts[0]
+
+
+def series_stmt(
+    user_id_line: str,
+    start: date,
+    end_exclusive: date,
+    granularity: SeriesGranularity,
+    by_tag: bool = False,
+) -> Select:
+    """
+    หนึ่งแถวต่อ bucket (by_tag -> ต่อ bucket x tag) ใน statement เดียว
+    bucket มาจาก unnest ของวันเริ่มที่คำนวณใน Python แล้ว LEFT JOIN ยอด -> bucket ที่ไม่มีรายการได้ 0
+    """
+    buckets = (
+        func.unnest(bindparam("series_buckets", series_buckets(start, end_exclusive, granularity),
+                              type_=ARRAY(Date)))
+        .table_valued("bucket")
+        .render_derived(name="b")
+    )
+
+    rows = _period_rows(user_id_line, start, end_exclusive, granularity).subquery()
+    totals = (
+        select(
+            rows.c.bucket,
+            func.sum(rows.c.income).label("income"),
+            func.sum(rows.c.expense).label("expense"),
+        )
+        .group_by(rows.c.bucket)
+        .subquery("totals")
+    )
+
+    income = func.coalesce(totals.c.income, 0)
+    expense = func.coalesce(totals.c.expense, 0)
+    stmt = (
+        select(buckets.c.bucket, income.label("income"), expense.label("expense"))
+        .select_from(buckets)
+        .outerjoin(totals, totals.c.bucket == buckets.c.bucket)
+    )
+    if not by_tag:
+        return stmt.order_by(buckets.c.bucket)
+
+    # tag_summary_daily ไม่มี rollup -> อ่านรายวันทั้งช่วง (แถวไม่เกิน วัน x tag)
+    tag_bucket = _bucket_of(TagSummaryDaily.summary_date, granularity)
+    tag_totals = (
+        select(
+            tag_bucket.label("bucket"),
+            TagSummaryDaily.tag_id.label("tag_id"),
+            func.sum(TagSummaryDaily.total_income).label("income"),
+            func.sum(TagSummaryDaily.total_expense).label("expense"),
+        )
+        .where(
+            TagSummaryDaily.user_id_line == user_id_line,
+            TagSummaryDaily.summary_date >= start,
+            TagSummaryDaily.summary_date < end_exclusive,
+        )
+        .group_by(tag_bucket, TagSummaryDaily.tag_id)
+        .subquery("tag_totals")
+    )
+    return (
+        stmt.add_columns(
+            tag_totals.c.tag_id,
+            func.coalesce(TagModel.name, OTHERS_TAG_NAME).label("tag_name"),
+            tag_totals.c.income.label("tag_income"),
+            tag_totals.c.expense.label("tag_expense"),
+        )
+        .outerjoin(tag_totals, tag_totals.c.bucket == buckets.c.bucket)
+        .outerjoin(TagModel, TagModel.id == tag_totals.c.tag_id)
+        .order_by(buckets.c.bucket,
+                  (tag_totals.c.income + tag_totals.c.expense).desc(), tag_totals.c.tag_id)
+    )
+
+
+def build_series(
+    db: Session,
+    user_id_line: str,
+    start: date,
+    end: date,
+    granularity: SeriesGranularity,
+    by_tag: bool = False,
+) -> Dict[str, Any]:
+    """ช่วง [start, end] (รวม end) -> ยอดต่อ bucket เรียงตามเวลา ไม่มีรายการ = 0"""
+    end_exclusive = end + timedelta(days=1)
+    items: List[Dict[str, Any]] = []
+
+    for row in db.execute(series_stmt(user_id_line, start, end_exclusive, granularity, by_tag)):
+        if not items or items[-1]["bucket"] != row.bucket:
+            bucket_end = min(next_bucket(row.bucket, granularity), end_exclusive)
+            items.append({
+                "bucket": row.bucket,
+                # bucket แรก/สุดท้ายนับเฉพาะวันที่อยู่ในช่วง
+                "start": max(row.bucket, start),
+                "end": bucket_end - timedelta(days=1),
+                "income": row.income,
+                "expense": row.expense,
+                "balance": row.income - row.expense,
+            })
+            if by_tag:
+                items[-1]["tags"] = []
+
+        if by_tag and row.tag_id is not None:
+            items[-1]["tags"].append({
+                "tag_id": row.tag_id,
+                "tag_name": row.tag_name,
+                "income": row.tag_income,
+                "expense": row.tag_expense,
+                "net": row.tag_income - row.tag_expense,
+            })
+
+    return {
+        "user_id_line": user_id_line,
+        "granularity": granularity.value,
+        "start": start,
+        "end": end,
+        "buckets": items,
+    }
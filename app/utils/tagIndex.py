@@ -0,0 +1,173 @@
+import bisect
+import heapq
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from itertools import chain
+from typing import Iterable, List
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.tagModel import Tag
+from app.utils.cache import register_local_state
+from app.utils.tags import make_slug
+
+TAG_INDEX_ENABLED = os.getenv("TAG_INDEX_ENABLED", "True") == "True"
+TAG_INDEX_MAX_USERS = int(os.getenv("TAG_INDEX_MAX_USERS", "2000"))
+# อายุของ index ต่อ user: หลาย worker แต่ไม่มี pub/sub (CACHE_REDIS_URL) worker อื่นไม่รู้ว่ามี write
+# จึงโหลดใหม่จาก DB อย่างช้าทุก TTL วินาที (มี Redis ก็ยังเป็นตาข่ายกันข้อความ invalidate หาย)
+TAG_INDEX_TTL = float(os.getenv("TAG_INDEX_TTL", "60"))
+
+
+def prefix_end(prefix: str) -> str | None:
+    """
+    string แรกที่มากกว่าทุก string ที่ขึ้นต้นด้วย prefix (เทียบตาม code point) None = ไม่มีขอบบน
+    prefix + "\uffff" ไม่พอ: emoji และอักษรนอก BMP มี code point มากกว่า U+FFFF
+    """
+    prefix = prefix.rstrip(chr(sys.maxunicode))
+    if not prefix:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class UserTagIndex:
+    """tag ของ user หนึ่งคน เรียงตาม slug สำหรับค้น prefix ด้วย bisect"""
+
+    def __init__(self, tags: Iterable[dict]):
+        entries = sorted(tags, key=lambda t: t["slug"])
+        self._slugs = [t["slug"] for t in entries]
+        self._entries = entries
+        self._by_id = {t["id"]: t for t in entries}
+
+    def add(self, tag: dict) -> None:
+        if tag["id"] in self._by_id:
+            return
+        i = bisect.bisect_left(self._slugs, tag["slug"])
+        self._slugs.insert(i, tag["slug"])
+        self._entries.insert(i, tag)
+        self._by_id[tag["id"]] = tag
+
+    def bump(self, tag_id: int, n: int = 1) -> None:
+        tag = self._by_id.get(tag_id)
+        if tag is not None:
+            tag["usage_count"] += n
+
+    def search(self, q: str, limit: int) -> List[dict]:
+        """prefix ของ slug ก่อน (ใช้บ่อยสุดขึ้นก่อน) ถ้าไม่ครบเติมด้วยชื่อที่มีคำค้นอยู่ข้างใน"""
+        def rank(t):
+            return (-t["usage_count"], t["slug"])
+
+        prefix = make_slug(q)
+        end = prefix_end(prefix)
+        lo = bisect.bisect_left(self._slugs, prefix)
+        hi = len(self._slugs) if end is None else bisect.bisect_left(self._slugs, end)
+        found = heapq.nsmallest(limit, self._entries[lo:hi], key=rank)
+
+        if len(found) < limit and prefix:
+            inner = (
+                t for t in chain(self._entries[:lo], self._entries[hi:])
+                if prefix in t["slug"]
+            )
+            found += heapq.nsmallest(limit - len(found), inner, key=rank)
+
+        return [dict(t) for t in found]
+
+
+class TagIndexRegistry:
+    """
+    UserTagIndex ต่อ user แบบ LRU โหลดครั้งแรกที่มีการค้น และโหลดใหม่เมื่อเกิน ttl
+    โหลดจาก DB นอก lock: write (record / invalidate) ระหว่างโหลดทำให้ผลที่โหลดได้อาจไม่มี write นั้น
+    -> generation ต่อ user (เก็บเฉพาะ user ที่กำลังโหลด) ไม่ตรงตอนจบ = ใช้ตอบ request นี้แต่ไม่เก็บ
+    """
+
+    def __init__(self, max_users: int, ttl: float):
+        self.max_users = max_users
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._users: OrderedDict[str, UserTagIndex] = OrderedDict()
+        self._loaded_at: dict[str, float] = {}
+        # จำนวนการโหลดที่กำลังรันต่อ user และ write ที่เกิดระหว่างนั้น
+        self._loading: dict[str, int] = {}
+        self._generations: dict[str, int] = {}
+        self._epoch = 0
+
+    def get(self, db: Session, user_id_line: str) -> UserTagIndex:
+        with self._lock:
+            index = self._users.get(user_id_line)
+            if index is not None and time.monotonic() - self._loaded_at[user_id_line] < self.ttl:
+                self._users.move_to_end(user_id_line)
+                return index
+            self._loading[user_id_line] = self._loading.get(user_id_line, 0) + 1
+            generation = self._epoch, self._generations.get(user_id_line, 0)
+
+        try:
+            rows = db.execute(
+                select(Tag.id, Tag.name, Tag.slug, Tag.usage_count)
+                .where(Tag.user_id_line == user_id_line)
+            ).mappings().all()
+        except BaseException:
+            with self._lock:
+                self._end_load(user_id_line)
+            raise
+        index = UserTagIndex(dict(r) for r in rows)
+
+        with self._lock:
+            fresh = (self._epoch, self._generations.get(user_id_line, 0)) == generation
+            self._end_load(user_id_line)
+            if fresh:
+                self._users[user_id_line] = index
+                self._users.move_to_end(user_id_line)
+                self._loaded_at[user_id_line] = time.monotonic()
+                while len(self._users) > self.max_users:
+                    evicted, _ = self._users.popitem(last=False)
+                    self._loaded_at.pop(evicted, None)
+        return index
+
+    def search(self, db: Session, user_id_line: str, q: str, limit: int) -> List[dict]:
+        index = self.get(db, user_id_line)
+        with self._lock:
+            return index.search(q, limit)
+
+    def record(self, user_id_line: str, tags: Iterable[dict], used: dict[int, int] | None = None) -> None:
+        """หลัง commit: เพิ่ม tag ใหม่ และนับการใช้งาน (ถ้า index ของ user นั้นโหลดอยู่)"""
+        with self._lock:
+            self._bump(user_id_line)
+            index = self._users.get(user_id_line)
+            if index is None:
+                return
+            for tag in tags:
+                index.add({**tag, "usage_count": tag.get("usage_count", 0)})
+            for tag_id, n in (used or {}).items():
+                index.bump(tag_id, n)
+
+    def _end_load(self, user_id_line: str) -> None:
+        running = self._loading.pop(user_id_line) - 1
+        if running:
+            self._loading[user_id_line] = running
+        else:
+            self._generations.pop(user_id_line, None)
+
+    def _bump(self, user_id_line: str) -> None:
+        if user_id_line in self._loading:
+            self._generations[user_id_line] = self._generations.get(user_id_line, 0) + 1
+
+    def invalidate_user(self, user_id_line: str) -> None:
+        with self._lock:
+            self._bump(user_id_line)
+            self._users.pop(user_id_line, None)
+            self._loaded_at.pop(user_id_line, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._epoch += 1
+            self._generations.clear()
+            self._users.clear()
+            self._loaded_at.clear()
+
+
+# worker ที่รับ write ปรับ index เองผ่าน record() worker อื่นทิ้งของ user นั้นตาม pub/sub
+# (ไม่มี pub/sub -> ค้างได้ไม่เกิน TAG_INDEX_TTL)
+tag_index = register_local_state(TagIndexRegistry(TAG_INDEX_MAX_USERS, TAG_INDEX_TTL))
@@ -0,0 +1,83 @@
+from typing import Iterable, Tuple
+
+from sqlalchemy import Text, and_, bindparam, func, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.orm import Session
+
+from app.models.tagModel import Tag as TagModel
+from app.models.transactionTagModel import TransactionTag
+from app.utils.tags import make_slug
+
+
+def _unnest(name: str, columns: dict[str, list]):
+    """แถวจาก unnest ของ array ต่อคอลัมน์ (parameter เท่าจำนวนคอลัมน์ ไม่ใช่จำนวนแถว)"""
+    return (
+        func.unnest(*(
+            bindparam(f"{name}_{column}", values, type_=ARRAY(Text))
+            for column, values in columns.items()
+        ))
+        .table_valued(*columns, with_ordinality="n")
+        .render_derived(name=name)
+    )
+
+
+def resolve_tag_ids(db: Session, tags: Iterable[Tuple[str, str]]) -> dict[Tuple[str, str], int]:
+    """
+    tags = [(user_id_line, ชื่อ tag ที่ normalize แล้ว), ...]
+    คืน {(user_id_line, slug): tag_id} สร้าง tag ที่ยังไม่มีให้ด้วย
+
+    - INSERT ... SELECT unnest(...) ON CONFLICT (user_id_line, slug) DO NOTHING RETURNING -> tag ที่สร้างใหม่
+    - SELECT ที่เหลือ (มีอยู่แล้ว หรือ request อื่นเพิ่งสร้างพร้อมกัน) join กับ unnest
+    จำนวน round trip และ parameter คงที่ไม่ขึ้นกับจำนวน tag (bulk ไม่ชนเพดาน 65535 parameter)
+    และไม่ชน uq_tags_user_slug
+    """
+    wanted: dict[Tuple[str, str], str] = {}
+    for user_id_line, name in tags:
+        wanted.setdefault((user_id_line, make_slug(name)), name)
+
+    if not wanted:
+        return {}
+
+    # เรียง key ให้ request ที่สร้าง tag ชุดเดียวกันพร้อมกันชน unique index ตามลำดับเดียวกัน
+    keys = sorted(wanted.items())
+    new = _unnest("new_tags", {
+        "user_id_line": [user_id_line for (user_id_line, _), _ in keys],
+        "name": [name for _, name in keys],
+        "slug": [slug for (_, slug), _ in keys],
+    })
+    stmt = (
+        insert(TagModel)
+        .from_select(["user_id_line", "name", "slug"],
+                     select(new.c.user_id_line, new.c.name, new.c.slug).order_by(new.c.n))
+        .on_conflict_do_nothing(constraint="uq_tags_user_slug")
+        .returning(TagModel.id, TagModel.user_id_line, TagModel.slug)
+    )
+    resolved = {
+        (r.user_id_line, r.slug): r.id for r in db.execute(stmt)
+    }
+
+    missing = [key for key in wanted if key not in resolved]
+    if missing:
+        existing = _unnest("existing_tags", {
+            "user_id_line": [user_id_line for user_id_line, _ in missing],
+            "slug": [slug for _, slug in missing],
+        })
+        rows = db.execute(
+            select(TagModel.id, TagModel.user_id_line, TagModel.slug)
+            .join(existing, and_(TagModel.user_id_line == existing.c.user_id_line,
+                                 TagModel.slug == existing.c.slug))
+        )
+        resolved.update({(r.user_id_line, r.slug): r.id for r in rows})
+
+    return resolved
+
+
+def insert_tag_links(db: Session, links: list[dict]) -> None:
+    """
+    links = [{"transaction_id": ..., "tag_id": ...}, ...]
+    เรียงตาม tag_id ก่อน insert: executemany อาจแบ่งเป็นหลาย statement และ trigger usage_count
+    ล็อกแถว tag ทีละ statement -> ทุก request ล็อก tag ตามลำดับ id เดียวกันแม้ไม่ได้ถือ lock_users
+    """
+    if links:
+        db.execute(insert(TransactionTag),
+                   sorted(links, key=lambda link: (link["tag_id"], link["transaction_id"])))
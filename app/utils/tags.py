@@ -7,3 +7,19 @@ def normalize_tag_name(name: str) -> str:
 
 def make_slug(name: str) -> str:
     return normalize_tag_name(name).lower()
+
+
+def clean_tag_names(tags: list[str] | None) -> list[str]:
+    """normalize + ตัดชื่อว่าง/ซ้ำ (ไม่สนตัวพิมพ์) คงลำดับเดิม"""
+    cleaned = []
+    seen = set()
+    for t in tags or []:
+        n = normalize_tag_name(t)
+        if not n:
+            continue
+        key = n.lower()
+        if key in seen:
+            continue
+        seen.add(key)
+        cleaned.append(n)
+    return cleaned
@@ -0,0 +1,137 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Iterator, Sequence
+
+from sqlalchemy import select
+
+from app.config.database import read_engine
+from app.models.tagModel import Tag as TagModel
+from app.models.transactionModel import Transaction
+from app.models.transactionTagModel import TransactionTag
+from app.utils.transactionQueries import LISTED
+
+EXPORT_CHUNK_SIZE = 1000
+
+EXPORT_COLUMNS = [
+    "id", "title", "amount", "type", "status", "source",
+    "created_at", "transaction_at", "tags",
+]
+
+
+def export_statement(user_id_line: str, start: datetime, end: datetime):
+    # เงื่อนไขเดียวกับ GET /transactions
+    return (
+        select(
+            Transaction.id,
+            Transaction.title,
+            Transaction.amount,
+            Transaction.type,
+            Transaction.status,
+            Transaction.source,
+            Transaction.created_at,
+            Transaction.transaction_at,
+        )
+        .where(
+            Transaction.user_id_line == user_id_line,
+            Transaction.transaction_at >= start,
+            Transaction.transaction_at < end,
+            *LISTED,
+        )
+        .order_by(Transaction.transaction_at.desc(), Transaction.id.desc())
+    )
+
+
+def _tags_statement(ids: list[int]):
+    return (
+        select(TransactionTag.transaction_id, TagModel.name)
+        .join(TagModel, TagModel.id == TransactionTag.tag_id)
+        .where(TransactionTag.transaction_id.in_(ids))
+        .order_by(TransactionTag.transaction_id, TagModel.name)
+    )
+
+
+def _group_tags(rows) -> dict[int, list[str]]:
+    tags: dict[int, list[str]] = {}
+    for transaction_id, name in rows:
+        tags.setdefault(transaction_id, []).append(name)
+    return tags
+
+
+def _type_value(value: Any) -> str:
+    return getattr(value, "value", value)
+
+
+def csv_header() -> str:
+    buf = io.StringIO()
+    csv.writer(buf).writerow(EXPORT_COLUMNS)
+    return buf.getvalue()
+
+
+def format_chunk(rows: Sequence, tags: dict[int, list[str]], fmt: str) -> str:
+    """แปลง 1 chunk เป็นข้อความ csv หรือ ndjson (ไม่รวม header)"""
+    if fmt == "csv":
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        for r in rows:
+            writer.writerow([
+                r.id, r.title, r.amount, _type_value(r.type), r.status, r.source,
+                r.created_at.isoformat() if r.created_at else "",
+                r.transaction_at.isoformat(),
+                "|".join(tags.get(r.id, [])),
+            ])
+        return buf.getvalue()
+
+    return "".join(
+        json.dumps({
+            "id": r.id,
+            "title": r.title,
+            "amount": float(r.amount),
+            "type": _type_value(r.type),
+            "status": r.status,
+            "source": r.source,
+            "created_at": r.created_at.isoformat() if r.created_at else None,
+            "transaction_at": r.transaction_at.isoformat(),
+            "tags": tags.get(r.id, []),
+        }, ensure_ascii=False) + "\n"
+        for r in rows
+    )
+
+
+def iter_export(user_id_line: str, start: datetime, end: datetime, fmt: str,
+                replica: bool = False) -> Iterator[str]:
+    """
+    server-side cursor (stream_results) ดึงทีละ EXPORT_CHUNK_SIZE แถว
+    tag ของแต่ละ chunk ดึงด้วย IN query เดียว -> memory คงที่ไม่ขึ้นกับจำนวนแถว
+    """
+    if fmt == "csv":
+        yield csv_header()
+
+    with read_engine(replica).connect() as conn:
+        result = conn.execution_options(
+            stream_results=True, yield_per=EXPORT_CHUNK_SIZE
+        ).execute(export_statement(user_id_line, start, end))
+
+        for rows in result.partitions():
+            tags = _group_tags(conn.execute(
+                _tags_statement([r.id for r in rows])))
+            yield format_chunk(rows, tags, fmt)
+
+
+async def aiter_export(user_id_line: str, start: datetime, end: datetime, fmt: str,
+                       replica: bool = False) -> AsyncIterator[str]:
+    """เหมือน iter_export แต่ใช้ AsyncEngine (DB_ASYNC=True)"""
+    if fmt == "csv":
+        yield csv_header()
+
+    async with read_engine(replica).connect() as conn:
+        result = await conn.stream(
+            export_statement(user_id_line, start, end)
+            .execution_options(yield_per=EXPORT_CHUNK_SIZE)
+        )
+
+        async for rows in result.partitions():
+            tags = _group_tags(await conn.execute(
+                _tags_statement([r.id for r in rows])))
+            yield format_chunk(rows, tags, fmt)
@@ -0,0 +1,128 @@
+from datetime import datetime
+
+from sqlalchemy import Select, func, literal_column, select, tuple_
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.orm import Session
+
+from app.dto.transactions import TransactionRow, TransactionWithTagsRow
+from app.models.tagModel import Tag as TagModel
+from app.models.transactionModel import Transaction
+from app.models.transactionTagModel import TransactionTag
+
+
+# =========================
+# Column projection
+# =========================
+# read endpoint select เฉพาะคอลัมน์ที่ส่งออกเป็น tuple/mapping ของ Core
+# ไม่สร้าง ORM entity (ไม่มี identity map / attribute instrumentation ต่อแถว)
+def row_columns(model, schema: type) -> list:
+    """คอลัมน์ของ model ตามชื่อ field ใน schema (TypedDict) field ที่ไม่ใช่คอลัมน์ เช่น tags ข้ามไป"""
+    table = model.__table__
+    return [table.c[name] for name in schema.__annotations__ if name in table.c]
+
+
+def fetch_rows(db: Session, stmt) -> list[dict]:
+    return [dict(row) for row in db.execute(stmt).mappings()]
+
+
+TRANSACTION_COLUMNS = row_columns(Transaction, TransactionRow)
+TRANSACTION_WITH_TAGS_COLUMNS = row_columns(Transaction, TransactionWithTagsRow)
+
+NEWEST_FIRST = (Transaction.transaction_at.desc(), Transaction.id.desc())
+
+
+def _keyset(stmt: Select, after: tuple[datetime, int] | None) -> Select:
+    if after is None:
+        return stmt
+    return stmt.where(tuple_(Transaction.transaction_at, Transaction.id) < tuple_(*after))
+
+
+def _in_range(user_id_line: str, start: datetime, end: datetime) -> tuple:
+    return (
+        Transaction.user_id_line == user_id_line,
+        Transaction.transaction_at >= start,
+        Transaction.transaction_at < end,
+    )
+
+
+# ค่าคงที่ฝังลง SQL ตรง ๆ ไม่เป็น bind parameter: planner ต้องเห็นค่าถึงจะใช้ partial index
+# (idx_transactions_listed / idx_transactions_active_amounts) ได้ แม้เป็น generic plan ของ prepared statement
+ACTIVE = Transaction.status == literal_column("'active'")
+
+# GET /transactions แสดงเฉพาะรายการ active ที่ไม่ได้สร้างอัตโนมัติ (/today แสดงทั้งหมด)
+LISTED = (ACTIVE, Transaction.source != literal_column("'auto'"))
+
+
+def _listing(columns, where, limit: int | None, after: tuple[datetime, int] | None) -> Select:
+    """limit ไม่ None -> ดึง limit + 1 แถวไว้ดูว่ามีหน้าถัดไป"""
+    stmt = _keyset(select(*columns).where(*where), after).order_by(*NEWEST_FIRST)
+    return stmt if limit is None else stmt.limit(limit + 1)
+
+
+def tags_json():
+    """
+    tag ของแต่ละรายการรวมเป็น JSON array ใน DB ([] ถ้าไม่มี tag)
+    รายการมาแถวเดียวพร้อม tags ไม่ต้อง join แล้วมารวมกลุ่มใน Python
+    (correlated subquery ใช้ PK ของ transaction_tags ที่ขึ้นต้นด้วย transaction_id)
+    """
+    tag = func.json_build_object(
+        literal_column("'id'"), TagModel.id,
+        literal_column("'name'"), TagModel.name,
+        literal_column("'slug'"), TagModel.slug,
+    )
+    return (
+        select(func.coalesce(
+            func.json_agg(aggregate_order_by(tag, TagModel.id)),
+            literal_column("'[]'::json"),
+        ))
+        .select_from(TransactionTag)
+        .join(TagModel, TagModel.id == TransactionTag.tag_id)
+        .where(TransactionTag.transaction_id == Transaction.id)
+        .scalar_subquery()
+        .label("tags")
+    )
+
+
+# =========================
+# Statements
+# =========================
+def transactions_stmt(
+    user_id_line: str,
+    start: datetime,
+    end: datetime,
+    limit: int | None = None,
+    after: tuple[datetime, int] | None = None,
+) -> Select:
+    """GET /transactions"""
+    return _listing(TRANSACTION_COLUMNS,
+                    (*_in_range(user_id_line, start, end), *LISTED), limit, after)
+
+
+def transactions_with_tags_stmt(
+    user_id_line: str,
+    start: datetime,
+    end: datetime,
+    limit: int | None = None,
+    after: tuple[datetime, int] | None = None,
+) -> Select:
+    """GET /transactions/v2"""
+    return _listing((*TRANSACTION_WITH_TAGS_COLUMNS, tags_json()),
+                    (*_in_range(user_id_line, start, end), *LISTED), limit, after)
+
+
+def today_transactions_stmt(user_id_line: str, start: datetime, end: datetime) -> Select:
+    """GET /transactions/today"""
+    return _listing(TRANSACTION_COLUMNS,
+                    _in_range(user_id_line, start, end), None, None)
+
+
+def today_transactions_with_tags_stmt(
+    user_id_line: str,
+    start: datetime,
+    end: datetime,
+    limit: int | None = None,
+    after: tuple[datetime, int] | None = None,
+) -> Select:
+    """GET /transactions/today/v2"""
+    return _listing((*TRANSACTION_WITH_TAGS_COLUMNS, tags_json()),
+                    _in_range(user_id_line, start, end), limit, after)
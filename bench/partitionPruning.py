@@ -0,0 +1,112 @@
+"""
+ตรวจด้วย EXPLAIN ว่า query หลักอ่านเฉพาะ partition ของ transactions ที่อยู่ในช่วงที่ขอ
+(sql/2026-10-18-05-transactions-partitioning.sql) ต้องตั้ง DATABASE_URL
+
+    python -m bench.partitionPruning
+    python -m bench.partitionPruning --user bench-u0001 --year 2026 --analyze
+
+แต่ละ case เทียบจำนวน partition ใน plan กับจำนวนเดือนที่ช่วงครอบ exit 1 ถ้าไม่ตรง
+"""
+import argparse
+import json
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from app.config.database import SessionLocal
+from app.jobs.tagSummaryBackfill import tag_summary_select
+from app.models.transactionModel import Transaction
+from app.utils.dateRange import resolve_date_range
+from app.utils.transactionQueries import (
+    today_transactions_with_tags_stmt, transactions_stmt, transactions_with_tags_stmt,
+)
+
+PARTITION_PREFIX = "transactions_"
+
+
+def explain(db: Session, stmt, analyze: bool = False) -> dict:
+    """plan (FORMAT JSON) ของ statement ด้วยค่า parameter จริง"""
+    compiled = stmt.compile(dialect=db.bind.dialect,
+                            compile_kwargs={"render_postcompile": True})
+    options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+    raw = db.connection().exec_driver_sql(
+        f"EXPLAIN ({options}) {compiled}", compiled.params).scalar()
+    return (raw if isinstance(raw, list) else json.loads(raw))[0]["Plan"]
+
+
+def plan_nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def scanned_partitions(plan: dict) -> set[str]:
+    return {
+        node["Relation Name"] for node in plan_nodes(plan)
+        if node.get("Relation Name", "").startswith(PARTITION_PREFIX)
+    }
+
+
+def months_between(start: datetime, end_exclusive: datetime) -> int:
+    """จำนวนเดือนที่ช่วง [start, end_exclusive) ครอบ = partition ที่ควรถูกอ่าน"""
+    last = end_exclusive - timedelta(microseconds=1)
+    return (last.year - start.year) * 12 + last.month - start.month + 1
+
+
+def cases(user_id_line: str, year: int):
+    year_start, year_end = resolve_date_range("year", year=year)
+    month_start, month_end = resolve_date_range("month", month=6, year=year)
+    today_start, today_end = resolve_date_range("today")
+    return [
+        ("GET /transactions year", year_start, year_end,
+         transactions_stmt(user_id_line, year_start, year_end)),
+        ("GET /transactions month", month_start, month_end,
+         transactions_stmt(user_id_line, month_start, month_end)),
+        ("GET /transactions/v2 year page", year_start, year_end,
+         transactions_with_tags_stmt(user_id_line, year_start, year_end, limit=50)),
+        ("GET /transactions/today/v2", today_start, today_end,
+         today_transactions_with_tags_stmt(user_id_line, today_start, today_end)),
+        ("tag summary rebuild (user, month)", month_start, month_end,
+         tag_summary_select(month_start.date(), month_end.date(), user_id_line)),
+        ("tag summary rebuild (all, year)", year_start, year_end,
+         tag_summary_select(year_start.date(), year_end.date())),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user", help="default: user ที่มีรายการมากที่สุด")
+    parser.add_argument("--year", type=int, default=date.today().year)
+    parser.add_argument("--analyze", action="store_true", help="EXPLAIN ANALYZE (รัน query จริง)")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        user_id_line = args.user or db.scalar(
+            select(Transaction.user_id_line)
+            .group_by(Transaction.user_id_line)
+            .order_by(func.count().desc())
+            .limit(1))
+        total = db.scalar(text(
+            "SELECT count(*) FROM pg_inherits WHERE inhparent = 'transactions'::regclass"))
+        print(f"user {user_id_line}, transactions has {total} partitions")
+
+        failed = 0
+        for name, start, end, stmt in cases(user_id_line, args.year):
+            plan = explain(db, stmt, args.analyze)
+            scanned = scanned_partitions(plan)
+            expected = months_between(start, end)
+            ok = len(scanned) <= expected
+            failed += not ok
+            timing = f"  {plan['Actual Total Time']:8.1f} ms" if args.analyze else ""
+            names = sorted(scanned)
+            span = f"{names[0]} .. {names[-1]}" if len(names) > 1 else "".join(names)
+            print(f"{'ok  ' if ok else 'FAIL'} {name:<36} {len(scanned):>3} / {expected:<3}"
+                  f" partitions{timing}  {span}")
+
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+ตรวจ plan ของ query หลักบนข้อมูลที่ seed แล้ว (bench.seedData) ต้องตั้ง DATABASE_URL
+fail (exit 1) ถ้า query ที่ควรอ่านผ่าน index กลายเป็น Seq Scan
+หรือ query ที่ควรเป็น Index Only Scan บน partial covering index ไม่ใช่แล้ว
+(sql/2026-10-18-06-covering-indexes.sql)
+
+    python -m bench.planRegression --vacuum
+    python -m bench.planRegression --analyze     # แสดงเวลาและ Heap Fetches จริง
+
+index only scan ต้องการ visibility map ที่อัปเดตแล้ว หลัง seed ใหม่ให้ใช้ --vacuum
+case เดียวกันรันเป็น test ด้วย (tests/test_planRegression.py, skip ถ้าไม่มี DB หรือยังไม่ seed)
+"""
+import argparse
+from dataclasses import dataclass, field
+from datetime import date
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from app.config.database import SessionLocal, engine
+from app.dto.peroidSummary import SeriesGranularity
+from app.jobs.tagSummaryBackfill import tag_summary_select
+from app.models.transactionModel import Transaction
+from app.utils.dateRange import resolve_date_range
+from app.utils.reportTags import report_day_range, tag_totals_stmt
+from app.utils.summaryRollup import sum_period_stmt
+from app.utils.summarySeries import series_stmt
+from app.utils.transactionExport import export_statement
+from app.utils.transactionQueries import (
+    today_transactions_with_tags_stmt, transactions_stmt, transactions_with_tags_stmt,
+)
+from bench.partitionPruning import explain, plan_nodes
+
+VACUUM_TABLES = ("transactions", "transaction_tags", "tags",
+                 "period_summary", "period_summary_rollup", "tag_summary_daily")
+
+SCAN_NODES = ("Seq Scan", "Index Scan", "Index Only Scan", "Bitmap Heap Scan")
+
+
+@dataclass
+class PlanCase:
+    name: str
+    stmt: object
+    # ห้าม Seq Scan บนตารางเหล่านี้ (partition นับเป็นตารางแม่)
+    no_seq_scan: tuple[str, ...] = ()
+    # ทุก scan ของ transactions ต้องเป็น Index Only Scan บน index นี้
+    index_only: str | None = None
+    problems: list[str] = field(default_factory=list)
+
+
+def parents(db: Session) -> dict[str, str]:
+    """partition / index ของ partition -> ชื่อตารางแม่ / index แม่"""
+    rows = db.execute(text("""
+        SELECT child.relname, parent.relname
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+    """))
+    return dict(rows.all())
+
+
+def check(case: PlanCase, plan: dict, parent_of: dict[str, str]) -> None:
+    scans = [node for node in plan_nodes(plan) if node["Node Type"] in SCAN_NODES]
+    for node in scans:
+        table = parent_of.get(node["Relation Name"], node["Relation Name"])
+        index = parent_of.get(node.get("Index Name"), node.get("Index Name"))
+
+        if node["Node Type"] == "Seq Scan" and table in case.no_seq_scan:
+            case.problems.append(f"Seq Scan on {node['Relation Name']}")
+
+        if case.index_only and table == "transactions" and (
+                node["Node Type"] != "Index Only Scan" or index != case.index_only):
+            case.problems.append(
+                f"{node['Node Type']} on {node['Relation Name']} ({index or '-'})"
+                f" แทน Index Only Scan ({case.index_only})")
+
+
+def heap_fetches(plan: dict) -> int:
+    return sum(node.get("Heap Fetches", 0) for node in plan_nodes(plan))
+
+
+def cases(user_id_line: str, year: int) -> list[PlanCase]:
+    year_start, year_end = resolve_date_range("year", year=year)
+    month_start, month_end = resolve_date_range("month", month=6, year=year)
+    today_start, today_end = resolve_date_range("today")
+    # ช่วงไม่เต็มเดือน -> sum_period อ่านทั้ง rollup และแถวรายวันหัว/ท้าย
+    start_day, end_day = report_day_range(year_start.replace(day=15), year_end.replace(day=10))
+    listed = "idx_transactions_listed"
+    return [
+        PlanCase("GET /transactions year",
+                 transactions_stmt(user_id_line, year_start, year_end),
+                 no_seq_scan=("transactions",), index_only=listed),
+        PlanCase("GET /transactions page",
+                 transactions_stmt(user_id_line, year_start, year_end, limit=50),
+                 no_seq_scan=("transactions",), index_only=listed),
+        PlanCase("GET /transactions/v2 page",
+                 transactions_with_tags_stmt(user_id_line, year_start, year_end, limit=50),
+                 no_seq_scan=("transactions", "transaction_tags", "tags"), index_only=listed),
+        PlanCase("GET /transactions/export year",
+                 export_statement(user_id_line, year_start, year_end),
+                 no_seq_scan=("transactions",), index_only=listed),
+        PlanCase("GET /transactions/today/v2",
+                 today_transactions_with_tags_stmt(user_id_line, today_start, today_end),
+                 no_seq_scan=("transactions", "transaction_tags", "tags")),
+        PlanCase("tag summary rebuild (user, month)",
+                 tag_summary_select(month_start.date(), month_end.date(), user_id_line),
+                 no_seq_scan=("transactions", "transaction_tags"),
+                 index_only="idx_transactions_active_amounts"),
+        # tags ทั้งตารางเล็ก planner เลือก Seq Scan + Hash Join ได้ ไม่นับเป็น regression
+        PlanCase("POST /reports/tags tag totals",
+                 tag_totals_stmt(user_id_line, start_day, end_day),
+                 no_seq_scan=("tag_summary_daily",)),
+        PlanCase("period summary sum",
+                 sum_period_stmt(user_id_line, start_day, end_day),
+                 no_seq_scan=("period_summary", "period_summary_rollup")),
+        PlanCase("GET /period-summary/series by tag",
+                 series_stmt(user_id_line, start_day, end_day, SeriesGranularity.month, by_tag=True),
+                 no_seq_scan=("period_summary", "period_summary_rollup", "tag_summary_daily")),
+    ]
+
+
+def vacuum() -> None:
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for table in VACUUM_TABLES:
+            conn.exec_driver_sql(f"VACUUM (ANALYZE) {table}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user", help="default: user ที่มีรายการมากที่สุด")
+    parser.add_argument("--year", type=int, default=date.today().year)
+    parser.add_argument("--analyze", action="store_true", help="EXPLAIN ANALYZE (รัน query จริง)")
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM ANALYZE ก่อนตรวจ")
+    args = parser.parse_args()
+
+    if args.vacuum:
+        vacuum()
+
+    with SessionLocal() as db:
+        user_id_line = args.user or db.scalar(
+            select(Transaction.user_id_line)
+            .group_by(Transaction.user_id_line)
+            .order_by(func.count().desc())
+            .limit(1))
+        parent_of = parents(db)
+        print(f"user {user_id_line}, year {args.year}")
+
+        failed = 0
+        for case in cases(user_id_line, args.year):
+            plan = explain(db, case.stmt, args.analyze)
+            check(case, plan, parent_of)
+            failed += bool(case.problems)
+
+            actual = (f"  {plan['Actual Total Time']:8.1f} ms  heap fetches {heap_fetches(plan)}"
+                      if args.analyze else "")
+            print(f"{'FAIL' if case.problems else 'ok  '} {case.name:<36}"
+                  f" cost {plan['Total Cost']:>10.1f}{actual}")
+            for problem in dict.fromkeys(case.problems):
+                print(f"       {problem}")
+
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
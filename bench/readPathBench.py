@@ -0,0 +1,114 @@
+"""
+เทียบ read path ของ GET /transactions บน DB จริง (ต้องตั้ง DATABASE_URL)
+- orm : db.query(Transaction) -> ORM entity ใน identity map -> to_rows
+- core: select เฉพาะคอลัมน์ (transactions_stmt) -> fetch_rows
+
+วัดเวลาต่อแถว (CPU ฝั่ง Python + DB) และ peak memory ด้วย tracemalloc
+ถ้า user ที่ใช้วัดมีรายการไม่ถึง --rows จะ insert เพิ่มให้ (status active ปี 2026)
+พร้อมปรับ period_summary / tag_summary_daily ตามปกติ
+
+    python -m bench.readPathBench --rows 20000 --repeat 5
+"""
+import argparse
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, select
+
+from app.config.database import SessionLocal
+from app.dto.transactions import TransactionRow
+from app.models.transactionModel import Transaction
+from app.utils.jsonResponse import to_rows
+from app.utils.summaryDelta import apply_summary_deltas, lock_users
+from app.utils.transactionQueries import fetch_rows, transactions_stmt
+
+BENCH_USER = "Ubench-read"
+START = datetime(2026, 1, 1)
+END = datetime(2027, 1, 1)
+
+
+def seed(db, rows: int) -> None:
+    have = db.scalar(select(func.count()).where(
+        Transaction.user_id_line == BENCH_USER))
+    if have >= rows:
+        return
+
+    step = (END - START) / rows
+    ids = db.execute(insert(Transaction).returning(Transaction.id), [
+        {
+            "title": f"bench {i}",
+            "amount": (i % 5000) + 0.25,
+            "type": "income" if i % 3 else "expense",
+            "user_id_line": BENCH_USER,
+            "transaction_at": START + step * i,
+            "created_at": START + timedelta(seconds=i),
+            "status": "active",
+            "source": "line",
+        }
+        for i in range(have, rows)
+    ]).scalars().all()
+    lock_users(db, [BENCH_USER])
+    apply_summary_deltas(db, {tx_id: 1 for tx_id in ids})
+    db.commit()
+
+
+def orm_path(db):
+    query = (
+        db.query(Transaction)
+        .filter(
+            Transaction.user_id_line == BENCH_USER,
+            Transaction.transaction_at >= START,
+            Transaction.transaction_at < END,
+            Transaction.status == "active",
+            Transaction.source != "auto",
+        )
+        .order_by(Transaction.transaction_at.desc(), Transaction.id.desc())
+    )
+    return to_rows(query.all(), TransactionRow)
+
+
+def core_path(db):
+    return fetch_rows(db, transactions_stmt(BENCH_USER, START, END))
+
+
+def measure(fn, repeat: int) -> tuple[float, int, int]:
+    """(เวลา median วินาที, peak memory bytes, จำนวนแถว) วัดเวลาโดยไม่เปิด tracemalloc"""
+    timings = []
+    for _ in range(repeat):
+        with SessionLocal() as db:
+            started = time.perf_counter()
+            rows = fn(db)
+            timings.append(time.perf_counter() - started)
+
+    with SessionLocal() as db:
+        tracemalloc.start()
+        fn(db)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return statistics.median(timings), peak, len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        seed(db, args.rows)
+        if orm_path(db) != core_path(db):
+            raise SystemExit("ผลลัพธ์ของสองแบบไม่ตรงกัน")
+
+    for name, fn in (("orm entities", orm_path), ("core columns", core_path)):
+        fn_time, peak, n = measure(fn, args.repeat)
+        print(f"{name:<13} {n} rows  {fn_time * 1000:8.1f} ms"
+              f"  {fn_time / n * 1e6:6.2f} us/row"
+              f"  peak {peak / 1024 / 1024:7.1f} MiB  {peak / n:6.0f} B/row")
+
+
+if __name__ == "__main__":
+    main()
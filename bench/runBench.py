@@ -0,0 +1,482 @@
+"""
+ยิงทุก endpoint ของ main.app ผ่าน ASGI (httpx.ASGITransport ไม่ผ่าน network)
+บนข้อมูลจาก bench.seedData แล้วรายงาน p50 / p95 / p99, throughput และจำนวน query ต่อ request
+
+    python -m bench.runBench --requests 200 --concurrency 8
+    python -m bench.runBench --save /tmp/bench.json
+    python -m bench.runBench --compare bench/baseline.json --fail-over 0.2
+
+- bench/baseline.json วัดจากโค้ดที่ commit baseline ด้วย python -m bench.runBaseline (ไม่ใช่ --save ของ HEAD)
+- endpoint ที่เขียนข้อมูลใช้ user BENCH_WRITER (ล้างข้อมูลทุกครั้งก่อนเริ่ม) ไม่แตะชุดข้อมูลที่ seed
+- --compare  เทียบ p50/p95 กับไฟล์ baseline, --fail-over 0.2 = exit 1 ถ้า p95 ช้าลงเกิน 20%
+- route ใน app ที่ไม่มี scenario จะถูกเตือนตอนเริ่ม (เพิ่ม endpoint ใหม่แล้วต้องเพิ่มที่ SCENARIOS ด้วย)
+"""
+import argparse
+import asyncio
+import contextvars
+import json
+import random
+import statistics
+import subprocess
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Awaitable, Callable
+
+import httpx
+from fastapi.routing import APIRoute
+from sqlalchemy import event, func, select
+
+from app.config.database import (
+    SessionLocal, async_engine, async_replica_engine, engine, replica_engine,
+)
+from app.models.tagModel import Tag
+from app.models.transactionModel import Transaction
+from bench.seedData import BENCH_PREFIX, purge
+from main import app
+
+BENCH_WRITER = f"{BENCH_PREFIX}writer"
+
+
+# =========================
+# Query counting
+# =========================
+# นับ statement ที่ส่งไป Postgres ของแต่ละ request (contextvar ถูก copy ไป threadpool / greenlet)
+_query_counter: contextvars.ContextVar[list | None] = contextvars.ContextVar(
+    "bench_query_counter", default=None)
+
+
+def _count_query(*_):
+    counter = _query_counter.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+for _engine in (engine, async_engine, replica_engine, async_replica_engine):
+    if _engine is not None:
+        event.listen(getattr(_engine, "sync_engine", _engine), "before_cursor_execute", _count_query)
+
+
+# =========================
+# Scenarios
+# =========================
+@dataclass
+class BenchContext:
+    users: list[str]
+    first_day: date
+    last_day: date
+    tag_names: dict[str, list[str]]
+    rng: random.Random
+    dataset: dict = field(default_factory=dict)
+    writer_ids: list[int] = field(default_factory=list)
+    etags: dict[str, str] = field(default_factory=dict)
+
+    def user(self) -> str:
+        return self.rng.choice(self.users)
+
+    def day(self) -> date:
+        return self.first_day + timedelta(
+            days=self.rng.randrange((self.last_day - self.first_day).days + 1))
+
+    def year(self) -> int:
+        return self.rng.randint(self.first_day.year, self.last_day.year)
+
+    def month(self) -> tuple[int, int]:
+        d = self.day()
+        return d.year, d.month
+
+    def tag_prefix(self, user: str) -> str:
+        names = self.tag_names.get(user) or ["a"]
+        return self.rng.choice(names)[:2]
+
+
+RequestSpec = tuple[str, str, dict]  # (method, url, kwargs ของ httpx)
+
+
+@dataclass
+class Scenario:
+    name: str
+    route: tuple[str, str]  # (method, path ตามที่ประกาศใน router) ใช้เช็คว่าครบทุก route
+    build: Callable[[BenchContext], RequestSpec]
+    prepare: Callable[[httpx.AsyncClient, BenchContext, int], Awaitable[None]] | None = None
+
+
+def _new_item(ctx: BenchContext, user: str = BENCH_WRITER) -> dict:
+    return {
+        "title": "bench",
+        "amount": round(ctx.rng.uniform(10, 500), 2),
+        "type": ctx.rng.choice(["income", "expense"]),
+        "userIdLine": user,
+        "transactionAt": datetime.combine(
+            ctx.day(), datetime.min.time()).replace(hour=12).isoformat(),
+        "tags": ctx.rng.sample(["อาหาร", "เดินทาง", "กาแฟ", "Grab", "BTS"], 2),
+    }
+
+
+async def _prepare_writer_rows(client: httpx.AsyncClient, ctx: BenchContext, n: int) -> None:
+    """PUT / DELETE / cancel ต้องมีรายการของ BENCH_WRITER ให้ใช้ครั้งละหนึ่งรายการ"""
+    r = await client.post("/transactions/bulk", json={
+        "items": [_new_item(ctx) for _ in range(n)]})
+    r.raise_for_status()
+    ctx.writer_ids = [x["id"] for x in r.json()["results"]]
+
+
+def _take_writer_id(ctx: BenchContext) -> int:
+    return ctx.writer_ids.pop()
+
+
+def _year_listing(path: str) -> Callable[[BenchContext], RequestSpec]:
+    return lambda ctx: ("GET", path, {"params": {
+        "user_id_line": ctx.user(), "mode": "year", "year": ctx.year()}})
+
+
+def _page_listing(path: str) -> Callable[[BenchContext], RequestSpec]:
+    return lambda ctx: ("GET", path, {"params": {
+        "user_id_line": ctx.user(), "mode": "year", "year": ctx.year(), "limit": 50}})
+
+
+def _tag_report(ctx: BenchContext) -> RequestSpec:
+    year, month = ctx.month()
+    return "POST", "/reports/tags", {"json": {
+        "user_id_line": ctx.user(), "mode": "month", "month": month, "year": year}}
+
+
+def _period_series(ctx: BenchContext) -> RequestSpec:
+    end = ctx.day()
+    return "GET", "/period-summary/series", {"params": {
+        "user_id_line": ctx.user(), "granularity": "month",
+        "start": end.replace(year=end.year - 1, day=1).isoformat(), "end": end.isoformat(),
+        "by_tag": ctx.rng.random() < 0.5}}
+
+
+def _dashboard(ctx: BenchContext) -> RequestSpec:
+    year, month = ctx.month()
+    return "GET", "/dashboard", {"params": {
+        "user_id_line": ctx.user(), "mode": "month", "month": month, "year": year}}
+
+
+def _dashboard_unchanged(ctx: BenchContext) -> RequestSpec:
+    user = ctx.user()
+    return "GET", "/dashboard", {"params": {"user_id_line": user},
+                                 "headers": {"If-None-Match": ctx.etags[user]}}
+
+
+async def _prepare_etags(client: httpx.AsyncClient, ctx: BenchContext, n: int) -> None:
+    """ETag ปัจจุบันของ dashboard (default เดือนนี้) ทุก user -> request ใน scenario ได้ 304"""
+    for user in ctx.users:
+        r = await client.get("/dashboard", params={"user_id_line": user})
+        r.raise_for_status()
+        ctx.etags[user] = r.headers["etag"]
+
+
+def _period_daily(ctx: BenchContext) -> RequestSpec:
+    start = ctx.day()
+    end = min(ctx.last_day, start + timedelta(days=ctx.rng.randint(1, 120)))
+    return "POST", "/period-summary/report", {"json": {
+        "user_id_line": ctx.user(), "type": "daily",
+        "start_date": start.isoformat(), "end_date": end.isoformat()}}
+
+
+def _period_yearly(ctx: BenchContext) -> RequestSpec:
+    return "POST", "/period-summary/report", {"json": {
+        "user_id_line": ctx.user(), "type": "yearly", "year": ctx.year()}}
+
+
+def _autocomplete(ctx: BenchContext) -> RequestSpec:
+    user = ctx.user()
+    return "GET", "/tags/autocomplete", {"params": {
+        "user_id_line": user, "q": ctx.tag_prefix(user)}}
+
+
+SCENARIOS: list[Scenario] = [
+    Scenario("root", ("GET", "/"), lambda ctx: ("GET", "/", {})),
+    Scenario("transactions.year", ("GET", "/transactions"),
+             _year_listing("/transactions")),
+    Scenario("transactions.page", ("GET", "/transactions"),
+             _page_listing("/transactions")),
+    Scenario("transactions.v2.year", ("GET", "/transactions/v2"),
+             _year_listing("/transactions/v2")),
+    Scenario("transactions.v2.page", ("GET", "/transactions/v2"),
+             _page_listing("/transactions/v2")),
+    Scenario("transactions.today", ("GET", "/transactions/today"),
+             lambda ctx: ("GET", "/transactions/today", {"params": {"user_id_line": ctx.user()}})),
+    Scenario("transactions.today.v2", ("GET", "/transactions/today/v2"),
+             lambda ctx: ("GET", "/transactions/today/v2", {"params": {"user_id_line": ctx.user()}})),
+    Scenario("transactions.export", ("GET", "/transactions/export"),
+             lambda ctx: ("GET", "/transactions/export", {"params": {
+                 "user_id_line": ctx.user(), "mode": "year", "year": ctx.year(),
+                 "format": ctx.rng.choice(["csv", "ndjson"])}})),
+    Scenario("transactions.create", ("POST", "/transactions/create"),
+             lambda ctx: ("POST", "/transactions/create", {"json": _new_item(ctx)})),
+    Scenario("transactions.create.v2", ("POST", "/transactions/create/v2"),
+             lambda ctx: ("POST", "/transactions/create/v2", {"json": _new_item(ctx)})),
+    Scenario("transactions.bulk", ("POST", "/transactions/bulk"),
+             lambda ctx: ("POST", "/transactions/bulk", {"json": {
+                 "items": [_new_item(ctx) for _ in range(100)]}})),
+    Scenario("transactions.update", ("PUT", "/transactions/{transaction_id}"),
+             lambda ctx: ("PUT", f"/transactions/{_take_writer_id(ctx)}", {
+                 "params": {"user_id_line": BENCH_WRITER},
+                 "json": {"amount": round(ctx.rng.uniform(10, 500), 2)}}),
+             _prepare_writer_rows),
+    Scenario("transactions.delete", ("DELETE", "/transactions/{transaction_id}"),
+             lambda ctx: ("DELETE", f"/transactions/{_take_writer_id(ctx)}", {
+                 "params": {"user_id_line": BENCH_WRITER}}),
+             _prepare_writer_rows),
+    Scenario("transactions.cancel", ("POST", "/transactions/{transaction_id}/cancel"),
+             lambda ctx: ("POST", f"/transactions/{_take_writer_id(ctx)}/cancel", {
+                 "params": {"user_id_line": BENCH_WRITER}}),
+             _prepare_writer_rows),
+    Scenario("period_summary.daily", ("POST", "/period-summary/report"), _period_daily),
+    Scenario("period_summary.yearly", ("POST", "/period-summary/report"), _period_yearly),
+    Scenario("period_summary.series", ("GET", "/period-summary/series"), _period_series),
+    Scenario("reports.tags", ("POST", "/reports/tags"), _tag_report),
+    Scenario("dashboard", ("GET", "/dashboard"), _dashboard),
+    Scenario("dashboard.not_modified", ("GET", "/dashboard"), _dashboard_unchanged, _prepare_etags),
+    Scenario("tags.search", ("GET", "/tags"),
+             lambda ctx: ("GET", "/tags", {"params": {"user_id_line": ctx.user(), "q": ""}})),
+    Scenario("tags.autocomplete", ("GET", "/tags/autocomplete"), _autocomplete),
+    Scenario("tags.create", ("POST", "/tags"),
+             lambda ctx: ("POST", "/tags", {"json": {
+                 "userIdLine": BENCH_WRITER, "name": f"bench-{ctx.rng.randrange(10**9)}"}})),
+    Scenario("health.db_pool", ("GET", "/health/db-pool"),
+             lambda ctx: ("GET", "/health/db-pool", {})),
+    Scenario("health.cache", ("GET", "/health/cache"),
+             lambda ctx: ("GET", "/health/cache", {})),
+    Scenario("metrics", ("GET", "/metrics"), lambda ctx: ("GET", "/metrics", {})),
+]
+
+
+def uncovered_routes() -> list[str]:
+    covered = {s.route for s in SCENARIOS}
+    missing = []
+    for route in app.routes:
+        if not isinstance(route, APIRoute):
+            continue
+        for method in route.methods:
+            if (method, route.path) not in covered:
+                missing.append(f"{method} {route.path}")
+    return sorted(missing)
+
+
+# =========================
+# Runner
+# =========================
+def load_context(seed: int) -> BenchContext:
+    with SessionLocal() as db:
+        users = db.scalars(
+            select(Transaction.user_id_line)
+            .where(Transaction.user_id_line.like(f"{BENCH_PREFIX}u%"))
+            .distinct()
+            .order_by(Transaction.user_id_line)
+        ).all()
+        if not users:
+            raise SystemExit("ไม่พบข้อมูล bench ให้รัน python -m bench.seedData ก่อน")
+
+        first_at, last_at, total = db.execute(
+            select(func.min(Transaction.transaction_at),
+                   func.max(Transaction.transaction_at), func.count())
+            .where(Transaction.user_id_line.like(f"{BENCH_PREFIX}u%"))
+        ).one()
+
+        tag_names: dict[str, list[str]] = {}
+        for user_id_line, name in db.execute(
+            select(Tag.user_id_line, Tag.name)
+            .where(Tag.user_id_line.like(f"{BENCH_PREFIX}u%"))
+        ):
+            tag_names.setdefault(user_id_line, []).append(name)
+
+        purge(db, BENCH_WRITER)
+
+    return BenchContext(
+        users=list(users),
+        first_day=first_at.date(),
+        last_day=last_at.date(),
+        tag_names=tag_names,
+        rng=random.Random(seed),
+        dataset={
+            "users": len(users),
+            "transactions": total,
+            "tags": sum(len(v) for v in tag_names.values()),
+            "first_day": first_at.date().isoformat(),
+            "last_day": last_at.date().isoformat(),
+        },
+    )
+
+
+async def _timed_request(client: httpx.AsyncClient, spec: RequestSpec) -> tuple[float, int, int]:
+    method, url, kwargs = spec
+    counter = [0]
+    token = _query_counter.set(counter)
+    try:
+        started = time.perf_counter()
+        r = await client.request(method, url, **kwargs)
+        elapsed = time.perf_counter() - started
+    finally:
+        _query_counter.reset(token)
+    return elapsed, counter[0], r.status_code
+
+
+async def run_scenario(client, ctx: BenchContext, scenario: Scenario,
+                       requests: int, concurrency: int, warmup: int) -> dict:
+    if scenario.prepare is not None:
+        await scenario.prepare(client, ctx, requests + warmup)
+
+    for _ in range(warmup):
+        await _timed_request(client, scenario.build(ctx))
+
+    # สร้าง request ล่วงหน้าเพื่อให้ลำดับ rng ไม่ขึ้นกับลำดับที่ task ทำงาน
+    specs = [scenario.build(ctx) for _ in range(requests)]
+    queue: asyncio.Queue = asyncio.Queue()
+    for spec in specs:
+        queue.put_nowait(spec)
+
+    latencies: list[float] = []
+    queries: list[int] = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        while not queue.empty():
+            elapsed, n, status = await _timed_request(client, queue.get_nowait())
+            latencies.append(elapsed)
+            queries.append(n)
+            if status >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": round(cuts[49] * 1000, 3),
+        "p95_ms": round(cuts[94] * 1000, 3),
+        "p99_ms": round(cuts[98] * 1000, 3),
+        "rps": round(len(latencies) / wall, 1),
+        "queries_per_request": round(statistics.mean(queries), 2),
+    }
+
+
+def _git_rev() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True,
+            stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results: dict, baseline: dict | None) -> None:
+    header = f"{'scenario':<26}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}{'q/req':>7}{'err':>5}"
+    if baseline:
+        header += f"{'Δp50':>9}{'Δp95':>9}"
+    print(header)
+
+    for name, r in results.items():
+        line = (f"{name:<26}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}"
+                f"{r['rps']:>9.1f}{r['queries_per_request']:>7.1f}{r['errors']:>5}")
+        base = (baseline or {}).get(name)
+        if base:
+            line += (f"{_change(r['p50_ms'], base['p50_ms']):>9}"
+                     f"{_change(r['p95_ms'], base['p95_ms']):>9}")
+        print(line)
+
+
+def _change(now: float, before: float) -> str:
+    if not before:
+        return "-"
+    return f"{(now - before) / before:+.0%}"
+
+
+def regressions(results: dict, baseline: dict, threshold: float) -> list[str]:
+    found = []
+    for name, r in results.items():
+        base = baseline.get(name)
+        if base and base["p95_ms"] and (r["p95_ms"] - base["p95_ms"]) / base["p95_ms"] > threshold:
+            found.append(f"{name}: p95 {base['p95_ms']} -> {r['p95_ms']} ms")
+        if base and r["queries_per_request"] > base["queries_per_request"]:
+            found.append(f"{name}: queries/request {base['queries_per_request']}"
+                         f" -> {r['queries_per_request']}")
+    return found
+
+
+async def run(args) -> dict:
+    missing = uncovered_routes()
+    if missing:
+        print("WARNING: route ที่ยังไม่มี scenario:", ", ".join(missing))
+
+    ctx = load_context(args.seed)
+    selected = [s for s in SCENARIOS if not args.only or s.name in args.only]
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for scenario in selected:
+            print(f"\r{scenario.name:<40}", end="", flush=True)
+            results[scenario.name] = await run_scenario(
+                client, ctx, scenario, args.requests, args.concurrency, args.warmup)
+    print("\r" + " " * 40 + "\r", end="")
+
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "git_rev": _git_rev(),
+            "db_async": async_engine is not None,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "dataset": ctx.dataset,
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="จำนวน request ต่อ scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--only", nargs="*", help="ชื่อ scenario ที่จะรัน (default ทั้งหมด)")
+    parser.add_argument("--save", help="บันทึกผลเป็น JSON (ใช้เป็น baseline)")
+    parser.add_argument("--compare", help="ไฟล์ baseline ที่จะเทียบ")
+    parser.add_argument("--fail-over", type=float, default=None,
+                        help="exit 1 ถ้า p95 ช้าลงเกินสัดส่วนนี้ หรือ query ต่อ request เพิ่มขึ้น")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            base_report = json.load(f)
+        baseline = base_report["results"]
+        # วันที่ของชุดข้อมูลเลื่อนตามวันที่ seed เทียบเฉพาะขนาด
+        shape = ("users", "transactions", "tags")
+        base_dataset = base_report["meta"].get("dataset", {})
+        if any(base_dataset.get(k) != report["meta"]["dataset"][k] for k in shape):
+            print("WARNING: dataset ไม่ตรงกับ baseline", base_dataset)
+
+    print(json.dumps(report["meta"], ensure_ascii=False))
+    print_results(report["results"], baseline)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"saved {args.save}")
+
+    if baseline is not None and args.fail_over is not None:
+        found = regressions(report["results"], baseline, args.fail_over)
+        if found:
+            print("REGRESSIONS:")
+            for line in found:
+                print(" ", line)
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
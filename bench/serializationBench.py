@@ -0,0 +1,91 @@
+"""
+เทียบเวลา serialize list ของ transaction ระหว่าง
+- เดิม: คืน ORM object -> jsonable_encoder -> JSONResponse (json ของ stdlib)
+- ใหม่: to_rows(TransactionRow) -> FastJSONResponse (orjson)
+
+ไม่ต้องต่อ DB (สร้าง object ใน memory) วัดเฉพาะต้นทุน serialize
+
+    python -m bench.serializationBench --rows 5000 --repeat 20
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+# engine ถูกสร้างตอน import model แต่ไม่ได้ connect จริง
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/bench")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from app.dto.transactions import TransactionRow  # noqa: E402
+from app.models.transactionModel import Transaction, TransactionTypeEnum  # noqa: E402
+from app.utils.jsonResponse import FastJSONResponse, to_rows  # noqa: E402
+
+
+def make_transactions(n: int) -> list[Transaction]:
+    base = datetime(2026, 1, 1, 8, 0, 0)
+    return [
+        Transaction(
+            id=i + 1,
+            title=f"รายการที่ {i}",
+            user_id_line="Ubench",
+            amount=Decimal(i % 5000) + Decimal("0.25"),
+            type=TransactionTypeEnum.income if i % 3 else TransactionTypeEnum.expense,
+            status="active",
+            source="line",
+            created_at=base + timedelta(minutes=i),
+            transaction_at=base + timedelta(minutes=i),
+        )
+        for i in range(n)
+    ]
+
+
+def old_path(rows) -> bytes:
+    return JSONResponse(jsonable_encoder(rows)).body
+
+
+def new_path(rows) -> bytes:
+    return FastJSONResponse(to_rows(rows, TransactionRow)).body
+
+
+def measure(fn, rows, repeat: int) -> list[float]:
+    fn(rows)  # warm up
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(rows)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = make_transactions(args.rows)
+
+    if json.loads(old_path(rows)) != json.loads(new_path(rows)):
+        raise SystemExit("output ของสองแบบไม่ตรงกัน")
+
+    print(f"{args.rows} rows x {args.repeat} runs")
+    results = {}
+    for name, fn in (("jsonable_encoder + json", old_path),
+                     ("to_rows + orjson", new_path)):
+        timings = measure(fn, rows, args.repeat)
+        results[name] = statistics.median(timings)
+        print(f"  {name:<24} median {results[name]:8.1f} ms"
+              f"   p95 {sorted(timings)[int(len(timings) * 0.95) - 1]:8.1f} ms")
+
+    old, new = results.values()
+    print(f"  speedup x{old / new:.1f}")
+
+
+if __name__ == "__main__":
+    main()
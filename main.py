@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from app.routes.report import router as report_router
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -5,8 +7,33 @@ from app.routes.transactions import router as transactions_router
 from app.routes.users import router as user_router
 from app.routes.periodSummary import router as period_summary
 from app.routes.tags import router as tags
+from app.routes.dashboard import router as dashboard_router
+from app.routes.health import router as health_router
+from app.routes.metrics import router as metrics_router
+from app.config.database import (
+    async_engine, async_replica_engine, engine, replica_engine,
+    start_replica_monitor, stop_replica_monitor,
+)
+from app.utils.jsonResponse import FastJSONResponse
+from app.utils.metrics import METRICS_ENABLED, MetricsMiddleware, install_sql_hooks
+from app.jobs.scheduler import start_scheduler, stop_scheduler
+from app.utils.cache import start_cache_bus, stop_cache_bus
+
 
-app = FastAPI(title="Finance Tracker API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_scheduler()
+    start_cache_bus()
+    start_replica_monitor()
+    yield
+    stop_replica_monitor()
+    stop_cache_bus()
+    stop_scheduler()
+
+
+app = FastAPI(title="Finance Tracker API",
+              default_response_class=FastJSONResponse,
+              lifespan=lifespan)
 
 origins = [
     "*",
@@ -20,12 +47,20 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# latency / เวลา DB / จำนวน statement ต่อ route -> GET /metrics
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    install_sql_hooks(engine, async_engine, replica_engine, async_replica_engine)
+
 # include router
 app.include_router(transactions_router)
 # app.include_router(user_router)
 app.include_router(period_summary)
 app.include_router(tags)
 app.include_router(report_router)
+app.include_router(dashboard_router)
+app.include_router(health_router)
+app.include_router(metrics_router)
 
 
 @app.get("/")
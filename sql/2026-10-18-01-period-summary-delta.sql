@@ -0,0 +1,47 @@
+-- period_summary ถูกดูแลจากฝั่ง API แบบ delta (app/utils/summaryDelta.py)
+-- ทุก create / update / delete / cancel ทำ INSERT ... ON CONFLICT DO UPDATE
+-- บวก/ลบยอดเข้า bucket ของวัน transaction_at ใน transaction เดียวกับการเขียนรายการ
+--
+-- trigger เดิม sum ทั้งวันใหม่ทุกครั้ง, ใช้ created_at แทน transaction_at
+-- และไม่กรอง status = 'active' -> ต้องเอาออก ไม่งั้นยอดจะถูกเขียนทับ/นับซ้ำ
+BEGIN;
+
+DROP TRIGGER IF EXISTS trg_update_period_summary ON transactions;
+DROP FUNCTION IF EXISTS public.update_period_summary();
+
+-- rebuild ยอดทั้งหมดครั้งเดียวตาม transaction_at ให้เป็นฐานที่ถูกต้องก่อนเริ่มใช้ delta
+UPDATE period_summary
+SET total_income = 0,
+    total_expense = 0,
+    total_balance = 0,
+    updated_at = NOW();
+
+INSERT INTO period_summary (
+    summary_date,
+    user_id_line,
+    total_income,
+    total_expense,
+    total_balance,
+    created_at,
+    updated_at
+)
+SELECT
+    transaction_at::date,
+    user_id_line,
+    COALESCE(SUM(CASE WHEN type = 'income' THEN amount END), 0),
+    COALESCE(SUM(CASE WHEN type = 'expense' THEN amount END), 0),
+    COALESCE(SUM(CASE WHEN type = 'income' THEN amount ELSE -amount END), 0),
+    NOW(),
+    NOW()
+FROM transactions
+WHERE status = 'active'
+  AND transaction_at IS NOT NULL
+GROUP BY transaction_at::date, user_id_line
+ON CONFLICT (summary_date, user_id_line)
+DO UPDATE SET
+    total_income = EXCLUDED.total_income,
+    total_expense = EXCLUDED.total_expense,
+    total_balance = EXCLUDED.total_balance,
+    updated_at = NOW();
+
+COMMIT;
@@ -0,0 +1,109 @@
+-- rollup รายเดือน / รายปี ของ period_summary
+-- trigger บน period_summary ส่งต่อ delta (NEW - OLD) ไปยังแถวเดือนและปีเดียวกัน
+-- ใครเขียน period_summary (API, reconcile job) rollup ก็ตามทันใน transaction เดียวกัน
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS period_summary_rollup (
+    user_id_line  VARCHAR(255) NOT NULL,
+    period_level  VARCHAR(5) NOT NULL CHECK (period_level IN ('month', 'year')),
+    period_start  DATE NOT NULL,
+    total_income  NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    total_expense NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    total_balance NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    updated_at    TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (user_id_line, period_level, period_start)
+);
+
+
+CREATE OR REPLACE FUNCTION public.apply_period_rollup(
+    p_user_id_line VARCHAR,
+    p_summary_date DATE,
+    p_income NUMERIC,
+    p_expense NUMERIC
+)
+RETURNS void
+LANGUAGE plpgsql
+AS $function$
+BEGIN
+    IF p_income = 0 AND p_expense = 0 THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO period_summary_rollup AS r (
+        user_id_line, period_level, period_start,
+        total_income, total_expense, total_balance, updated_at
+    )
+    VALUES
+        (p_user_id_line, 'month', date_trunc('month', p_summary_date)::date,
+         p_income, p_expense, p_income - p_expense, NOW()),
+        (p_user_id_line, 'year', date_trunc('year', p_summary_date)::date,
+         p_income, p_expense, p_income - p_expense, NOW())
+    ON CONFLICT (user_id_line, period_level, period_start)
+    DO UPDATE SET
+        total_income = r.total_income + EXCLUDED.total_income,
+        total_expense = r.total_expense + EXCLUDED.total_expense,
+        total_balance = r.total_balance + EXCLUDED.total_balance,
+        updated_at = NOW();
+END;
+$function$;
+
+
+CREATE OR REPLACE FUNCTION public.rollup_period_summary()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $function$
+BEGIN
+    IF TG_OP = 'UPDATE'
+       AND NEW.user_id_line = OLD.user_id_line
+       AND NEW.summary_date = OLD.summary_date THEN
+        PERFORM public.apply_period_rollup(
+            NEW.user_id_line, NEW.summary_date,
+            COALESCE(NEW.total_income, 0) - COALESCE(OLD.total_income, 0),
+            COALESCE(NEW.total_expense, 0) - COALESCE(OLD.total_expense, 0));
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM public.apply_period_rollup(
+            OLD.user_id_line, OLD.summary_date,
+            -COALESCE(OLD.total_income, 0), -COALESCE(OLD.total_expense, 0));
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM public.apply_period_rollup(
+            NEW.user_id_line, NEW.summary_date,
+            COALESCE(NEW.total_income, 0), COALESCE(NEW.total_expense, 0));
+    END IF;
+
+    RETURN NULL;
+END;
+$function$;
+
+DROP TRIGGER IF EXISTS trg_rollup_period_summary ON period_summary;
+
+CREATE TRIGGER trg_rollup_period_summary
+AFTER INSERT OR UPDATE OR DELETE ON period_summary
+FOR EACH ROW
+EXECUTE FUNCTION public.rollup_period_summary();
+
+
+-- backfill จากแถวรายวันที่มีอยู่
+TRUNCATE period_summary_rollup;
+
+INSERT INTO period_summary_rollup (
+    user_id_line, period_level, period_start,
+    total_income, total_expense, total_balance, updated_at
+)
+SELECT user_id_line, 'month', date_trunc('month', summary_date)::date,
+       SUM(COALESCE(total_income, 0)), SUM(COALESCE(total_expense, 0)),
+       SUM(COALESCE(total_income, 0) - COALESCE(total_expense, 0)), NOW()
+FROM period_summary
+GROUP BY user_id_line, date_trunc('month', summary_date)
+UNION ALL
+SELECT user_id_line, 'year', date_trunc('year', summary_date)::date,
+       SUM(COALESCE(total_income, 0)), SUM(COALESCE(total_expense, 0)),
+       SUM(COALESCE(total_income, 0) - COALESCE(total_expense, 0)), NOW()
+FROM period_summary
+GROUP BY user_id_line, date_trunc('year', summary_date);
+
+COMMIT;
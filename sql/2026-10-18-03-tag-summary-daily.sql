@@ -0,0 +1,13 @@
+-- ยอดรายวันต่อ tag สำหรับรายงาน /reports/tags
+-- API อัปเดตแบบ delta ทุกครั้งที่เขียนรายการ (app/utils/summaryDelta.py)
+-- รายการที่ไม่มี tag ใช้ tag_id = 999999 (OTHERS_TAG_ID, "อื่นๆ")
+-- backfill / rebuild: python -m app.jobs.tagSummaryBackfill
+CREATE TABLE IF NOT EXISTS tag_summary_daily (
+    user_id_line  VARCHAR(255) NOT NULL,
+    summary_date  DATE NOT NULL,
+    tag_id        BIGINT NOT NULL,
+    total_income  NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    total_expense NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    updated_at    TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (user_id_line, summary_date, tag_id)
+);
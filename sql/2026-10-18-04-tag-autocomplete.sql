@@ -0,0 +1,69 @@
+-- autocomplete ของ tag
+-- - prefix บน slug: btree text_pattern_ops ใช้ได้กับ LIKE 'abc%' ทุก collation
+-- - คำค้นกลางชื่อ: trigram (pg_trgm) สำหรับ ILIKE '%abc%'
+-- - usage_count: จำนวนครั้งที่ tag ถูกใช้ ไว้จัดอันดับ ดูแลด้วย statement trigger
+BEGIN;
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_tags_user_slug_prefix
+    ON tags (user_id_line, slug text_pattern_ops);
+
+CREATE INDEX IF NOT EXISTS idx_tags_name_trgm
+    ON tags USING gin (name gin_trgm_ops);
+
+
+ALTER TABLE tags ADD COLUMN IF NOT EXISTS usage_count BIGINT NOT NULL DEFAULT 0;
+
+UPDATE tags t
+SET usage_count = c.n
+FROM (
+    SELECT tag_id, COUNT(*) AS n
+    FROM transaction_tags
+    GROUP BY tag_id
+) c
+WHERE c.tag_id = t.id;
+
+
+CREATE OR REPLACE FUNCTION public.count_tag_usage_insert()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $function$
+BEGIN
+    UPDATE tags t
+    SET usage_count = t.usage_count + c.n
+    FROM (SELECT tag_id, COUNT(*) AS n FROM new_rows GROUP BY tag_id) c
+    WHERE c.tag_id = t.id;
+    RETURN NULL;
+END;
+$function$;
+
+CREATE OR REPLACE FUNCTION public.count_tag_usage_delete()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $function$
+BEGIN
+    UPDATE tags t
+    SET usage_count = GREATEST(t.usage_count - c.n, 0)
+    FROM (SELECT tag_id, COUNT(*) AS n FROM old_rows GROUP BY tag_id) c
+    WHERE c.tag_id = t.id;
+    RETURN NULL;
+END;
+$function$;
+
+-- statement-level: bulk insert หลายพันแถวอัปเดต tags ครั้งเดียวต่อ tag
+DROP TRIGGER IF EXISTS trg_tag_usage_insert ON transaction_tags;
+CREATE TRIGGER trg_tag_usage_insert
+AFTER INSERT ON transaction_tags
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION public.count_tag_usage_insert();
+
+DROP TRIGGER IF EXISTS trg_tag_usage_delete ON transaction_tags;
+CREATE TRIGGER trg_tag_usage_delete
+AFTER DELETE ON transaction_tags
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION public.count_tag_usage_delete();
+
+COMMIT;
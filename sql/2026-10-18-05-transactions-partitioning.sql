@@ -0,0 +1,131 @@
+-- transactions แบ่ง partition รายเดือนตาม transaction_at (RANGE)
+-- ทุก query กรอง user_id_line + ช่วง transaction_at -> planner ตัด partition นอกช่วงทิ้ง
+-- ต้นทุนจึงขึ้นกับความยาวช่วงที่ขอ ไม่ใช่ประวัติทั้งหมด (soft delete ไม่เคยลบแถวออก)
+--
+-- - PK ของ partitioned table ต้องมี partition key -> PRIMARY KEY (id, transaction_at)
+--   id ยังมาจาก transactions_id_seq เดิม จึงยัง unique ตามเดิม
+-- - FK transaction_tags.transaction_id -> transactions(id) ทำไม่ได้แล้ว (ไม่มี unique บน id อย่างเดียว)
+--   ON DELETE CASCADE เดิมแทนด้วย trigger ระดับ statement trg_transactions_delete_tags
+-- - partition ล่วงหน้าสร้างโดย create_transaction_partitions() (job app/jobs/transactionPartitions.py)
+--   แถวที่ไม่มี partition รองรับ (เช่นวันที่ไกลในอนาคต) ลง transactions_default
+--   แล้วถูกย้ายเข้า partition ของเดือนนั้นตอนสร้าง
+--
+-- copy ทั้งตารางใน transaction เดียว: ระหว่างรันเขียน transactions ไม่ได้ ควรรันตอนปิด API
+BEGIN;
+
+UPDATE transactions
+SET transaction_at = COALESCE(created_at, NOW())
+WHERE transaction_at IS NULL;
+
+ALTER TABLE transactions RENAME TO transactions_unpartitioned;
+ALTER TABLE transactions_unpartitioned RENAME CONSTRAINT transactions_pkey TO transactions_unpartitioned_pkey;
+ALTER TABLE transaction_tags DROP CONSTRAINT IF EXISTS transaction_tags_transaction_id_fkey;
+
+CREATE TABLE transactions
+(
+    id BIGINT NOT NULL DEFAULT nextval('transactions_id_seq'),
+    title VARCHAR(255),
+    amount DECIMAL(10, 2),
+    type VARCHAR(10) CONSTRAINT transactions_type_check CHECK (type IN ('income', 'expense')),
+    status VARCHAR(10) DEFAULT 'active',
+    source VARCHAR(20) DEFAULT 'line',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    user_id_line VARCHAR(255) NOT NULL,
+    transaction_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (id, transaction_at)
+) PARTITION BY RANGE (transaction_at);
+
+-- sequence ย้ายไปเป็นของตารางใหม่ ไม่ถูก drop ไปพร้อมตารางเดิม
+ALTER SEQUENCE transactions_id_seq OWNED BY transactions.id;
+
+CREATE TABLE transactions_default PARTITION OF transactions DEFAULT;
+
+
+-- สร้าง partition รายเดือน transactions_pYYYY_MM ตั้งแต่เดือนของ first_month ถึง last_month
+-- ที่มีอยู่แล้วข้าม, คืนจำนวน partition ที่สร้างใหม่
+-- แถวในช่วงนั้นที่ค้างอยู่ใน transactions_default ถูกย้ายเข้า partition ใหม่ก่อน attach
+-- (ลบจาก partition ตรง ๆ ไม่ trigger trg_transactions_delete_tags ที่อยู่บน parent)
+CREATE OR REPLACE FUNCTION create_transaction_partitions(first_month DATE, last_month DATE)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    month_start DATE := date_trunc('month', first_month)::date;
+    month_end DATE;
+    partition_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    -- หลาย worker / job เรียกพร้อมกันได้
+    PERFORM pg_advisory_xact_lock(hashtext('create_transaction_partitions'));
+
+    WHILE month_start <= last_month LOOP
+        month_end := (month_start + INTERVAL '1 month')::date;
+        partition_name := format('transactions_p%s', to_char(month_start, 'YYYY_MM'));
+
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I (LIKE transactions INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+                partition_name);
+            EXECUTE format(
+                'WITH moved AS (
+                     DELETE FROM transactions_default
+                     WHERE transaction_at >= %L AND transaction_at < %L
+                     RETURNING *
+                 )
+                 INSERT INTO %I SELECT * FROM moved',
+                month_start, month_end, partition_name);
+            EXECUTE format(
+                'ALTER TABLE transactions ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                partition_name, month_start, month_end);
+            created := created + 1;
+        END IF;
+
+        month_start := month_end;
+    END LOOP;
+
+    RETURN created;
+END;
+$$;
+
+-- partition ครอบข้อมูลเดิมทั้งหมด + ล่วงหน้า 3 เดือน
+SELECT create_transaction_partitions(
+    LEAST(COALESCE(MIN(transaction_at), NOW()), NOW())::date,
+    (NOW() + INTERVAL '3 months')::date
+)
+FROM transactions_unpartitioned;
+
+INSERT INTO transactions (
+    id, title, amount, type, status, source, created_at, user_id_line, transaction_at
+)
+SELECT id, title, amount, type, status, source, created_at, user_id_line, transaction_at
+FROM transactions_unpartitioned;
+
+-- index เดิม (idx_transactions_*, idx_tx_user_date) หายไปพร้อมตารางเดิม
+DROP TABLE transactions_unpartitioned;
+
+-- สร้างหลัง copy ข้อมูล, index บน parent ถูกสร้างให้ทุก partition (รวมที่ attach ภายหลัง)
+CREATE INDEX idx_transactions_user_transaction_at
+ON transactions (user_id_line, transaction_at);
+
+
+-- แทน FK ON DELETE CASCADE เดิม (ลบรายการจริง เช่นล้างข้อมูล user -> ลบ tag link ตาม)
+CREATE OR REPLACE FUNCTION delete_transaction_tags()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    DELETE FROM transaction_tags
+    WHERE transaction_id IN (SELECT id FROM old_rows);
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER trg_transactions_delete_tags
+AFTER DELETE ON transactions
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT
+EXECUTE FUNCTION delete_transaction_tags();
+
+COMMIT;
+
+ANALYZE transactions;
@@ -0,0 +1,49 @@
+-- partial covering index ตาม query ที่ใช้จริง -> index only scan ไม่ต้องไปอ่าน heap ทีละแถว
+-- (ตรวจ plan ด้วย python -m bench.planRegression)
+--
+-- เงื่อนไข status / source ใน query ต้องเป็นค่าคงที่ใน SQL (ไม่ใช่ bind parameter)
+-- planner ถึงพิสูจน์ได้ว่า query อยู่ใน WHERE ของ partial index (ดู LISTED / ACTIVE ใน transactionQueries.py)
+-- index only scan ได้ผลกับหน้าที่ visibility map บอกว่า all-visible -> autovacuum ต้องตามทัน
+BEGIN;
+
+-- GET /transactions, /transactions/v2, /transactions/export
+-- WHERE user_id_line = ? AND transaction_at ช่วง AND status = 'active' AND source <> 'auto'
+-- ORDER BY transaction_at DESC, id DESC (scan ย้อนหลังได้ ไม่ต้อง sort, keyset ใช้ (transaction_at, id) ต่อได้)
+CREATE INDEX IF NOT EXISTS idx_transactions_listed
+ON transactions (user_id_line, transaction_at, id)
+INCLUDE (title, amount, type, status, source, created_at)
+WHERE status = 'active' AND source <> 'auto';
+
+-- ยอดจาก transactions โดยตรง (rebuild tag_summary_daily / period_summary)
+-- อ่านแค่ id (join transaction_tags), type, amount ของรายการ active
+CREATE INDEX IF NOT EXISTS idx_transactions_active_amounts
+ON transactions (user_id_line, transaction_at)
+INCLUDE (id, type, amount)
+WHERE status = 'active';
+
+-- idx_transactions_user_transaction_at ยังใช้กับ /today ที่แสดงทุก status
+
+
+-- index ซ้ำ: ทุก index เพิ่มงานให้ทุก insert / update
+-- transaction_tags: tag_id มีสองตัว, transaction_id เป็นคอลัมน์แรกของ PK อยู่แล้ว
+DROP INDEX IF EXISTS idx_tt_tag_id;
+DROP INDEX IF EXISTS idx_tt_tx;
+
+-- period_summary: unique (summary_date, user_id_line) สองตัว + (user_id_line, summary_date) อีกตัว
+-- เหลือ unique (user_id_line, summary_date) ตัวเดียว ใช้ได้ทั้งอ่านราย user และ ON CONFLICT (summary_date, user_id_line)
+-- (inference ของ ON CONFLICT ไม่สนลำดับคอลัมน์)
+ALTER TABLE period_summary
+ADD CONSTRAINT uq_period_summary_user_date UNIQUE (user_id_line, summary_date);
+
+ALTER TABLE period_summary DROP CONSTRAINT IF EXISTS uq_daily_summary;
+ALTER TABLE period_summary DROP CONSTRAINT IF EXISTS unique_summary_user;
+DROP INDEX IF EXISTS idx_daily_summary_user_date;
+
+-- ตาราง summary (period_summary / rollup / tag_summary_daily) ไม่ใส่ INCLUDE ยอดเงิน:
+-- ถูก UPDATE ทุกครั้งที่มีการเขียนรายการ ถ้ายอดอยู่ใน index จะเสีย HOT update ทุกครั้ง
+-- อ่านผ่าน PK / unique ที่ขึ้นต้นด้วย user_id_line อยู่แล้ว และจำนวนแถวที่อ่านถูกจำกัดด้วย rollup
+
+COMMIT;
+
+ANALYZE transactions;
+ANALYZE period_summary;
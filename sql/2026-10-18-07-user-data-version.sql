@@ -0,0 +1,17 @@
+-- version ของข้อมูลต่อ user สำหรับ ETag / If-None-Match (app/utils/dataVersion.py)
+-- ทุก path ที่เขียน transactions / tags / summary ของ user ตั้ง version ใหม่ใน transaction เดียวกัน
+-- GET รายงานอ่านแถวนี้แถวเดียว (PK) ก่อน query ยอด -> ไม่เปลี่ยน = 304 ไม่มี body
+--
+-- version มาจาก sequence เดียวกันทั้งระบบ: ไม่วนกลับไปซ้ำค่าเก่า
+-- แม้แถวของ user ถูกลบแล้วสร้างใหม่ ETag เก่าที่ client ถือไว้จึงไม่ตรงโดยบังเอิญ
+BEGIN;
+
+CREATE SEQUENCE IF NOT EXISTS user_data_version_seq;
+
+CREATE TABLE IF NOT EXISTS user_data_version (
+    user_id_line VARCHAR(255) PRIMARY KEY,
+    version      BIGINT NOT NULL,
+    updated_at   TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+COMMIT;
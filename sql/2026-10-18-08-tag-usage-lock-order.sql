@@ -0,0 +1,43 @@
+-- trigger usage_count ล็อกแถว tag ตามลำดับ id ก่อน UPDATE
+-- (NO KEY UPDATE ไม่ชนกับ KEY SHARE ที่ FK ของ transaction_tags ถืออยู่)
+-- API serialize การเขียนราย user ด้วย lock_users อยู่แล้ว ส่วนนี้กัน writer อื่น (job / SQL ตรง)
+-- ที่แตะ tag ชุดเดียวกันพร้อมกันไม่ให้ล็อกสลับลำดับกัน
+BEGIN;
+
+CREATE OR REPLACE FUNCTION public.count_tag_usage_insert()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $function$
+BEGIN
+    PERFORM 1 FROM tags
+    WHERE id IN (SELECT tag_id FROM new_rows)
+    ORDER BY id
+    FOR NO KEY UPDATE;
+
+    UPDATE tags t
+    SET usage_count = t.usage_count + c.n
+    FROM (SELECT tag_id, COUNT(*) AS n FROM new_rows GROUP BY tag_id) c
+    WHERE c.tag_id = t.id;
+    RETURN NULL;
+END;
+$function$;
+
+CREATE OR REPLACE FUNCTION public.count_tag_usage_delete()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $function$
+BEGIN
+    PERFORM 1 FROM tags
+    WHERE id IN (SELECT tag_id FROM old_rows)
+    ORDER BY id
+    FOR NO KEY UPDATE;
+
+    UPDATE tags t
+    SET usage_count = GREATEST(t.usage_count - c.n, 0)
+    FROM (SELECT tag_id, COUNT(*) AS n FROM old_rows GROUP BY tag_id) c
+    WHERE c.tag_id = t.id;
+    RETURN NULL;
+END;
+$function$;
+
+COMMIT;
@@ -0,0 +1,104 @@
+-- apply_summary_deltas(ids, signs, transaction_at): ปรับ period_summary และ tag_summary_daily
+-- แบบ delta จากแถว transactions ที่ระบุ (sign +1 = นับเพิ่ม, -1 = หักออก) คืนจำนวนแถวที่หาเจอ
+-- ผู้เรียกคือ app/utils/summaryDelta.py (lock_users ก่อนเรียก, ตรวจจำนวนที่หาเจอเอง)
+--
+-- เดิมสร้าง INSERT ... ON CONFLICT สอง statement ฝั่ง Python ทุกครั้งที่เขียน
+-- SQLAlchemy 2.0 cache statement INSERT ... ON CONFLICT ของ postgresql ไม่ได้
+-- -> สร้างและ compile ใหม่ทุก request (CPU ส่วนใหญ่ของ create) ตอนนี้ฝั่ง Python เหลือ SELECT เดียว
+-- ที่ cache ได้ และ plpgsql เก็บ plan ของ statement ข้างในไว้ให้เอง
+--
+-- transactions แบ่ง partition ตาม transaction_at และ planner ประเมินจำนวนแถวของ unnest ไม่ได้
+-- LATERAL ... LIMIT 1 บังคับให้หาทีละแถวผ่าน PK ของ partition (partition ถูกตัดตอนรัน)
+-- ไม่ส่ง transaction_at = หาให้ก่อนด้วย id อย่างเดียว (probe ทุก partition)
+-- รายการที่ไม่มี tag ลง tag_id = 999999 (OTHERS_TAG_ID, "อื่นๆ") เหมือน migration 03
+BEGIN;
+
+CREATE OR REPLACE FUNCTION public.apply_summary_deltas(
+    p_ids BIGINT[],
+    p_signs INTEGER[],
+    p_transaction_at TIMESTAMP[] DEFAULT NULL
+)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $function$
+DECLARE
+    v_matched INTEGER;
+BEGIN
+    IF p_transaction_at IS NULL THEN
+        -- id ที่ไม่มีอยู่ได้ NULL -> ไม่ตรงกับแถวใดด้านล่าง และถูกนับว่าหาไม่เจอ
+        SELECT array_agg(t.transaction_at ORDER BY d.n)
+        INTO p_transaction_at
+        FROM unnest(p_ids) WITH ORDINALITY AS d(id, n)
+        LEFT JOIN LATERAL (
+            SELECT tx.transaction_at FROM transactions tx WHERE tx.id = d.id LIMIT 1
+        ) t ON true;
+    END IF;
+
+    WITH matched AS MATERIALIZED (
+        SELECT
+            t.id,
+            t.user_id_line,
+            t.transaction_at::date AS day,
+            t.type,
+            d.sign * t.amount AS signed_amount
+        FROM unnest(p_ids, p_signs, p_transaction_at) AS d(id, sign, transaction_at)
+        CROSS JOIN LATERAL (
+            SELECT tx.id, tx.user_id_line, tx.transaction_at, tx.type, tx.amount
+            FROM transactions tx
+            WHERE tx.id = d.id
+              AND tx.transaction_at = d.transaction_at
+            LIMIT 1
+        ) t
+    ),
+    period AS (
+        INSERT INTO period_summary (
+            summary_date, user_id_line,
+            total_income, total_expense, total_balance,
+            created_at, updated_at
+        )
+        SELECT
+            day,
+            user_id_line,
+            COALESCE(SUM(CASE WHEN type = 'income' THEN signed_amount ELSE 0 END), 0),
+            COALESCE(SUM(CASE WHEN type = 'expense' THEN signed_amount ELSE 0 END), 0),
+            COALESCE(SUM(CASE WHEN type = 'income' THEN signed_amount ELSE 0 END), 0)
+                - COALESCE(SUM(CASE WHEN type = 'expense' THEN signed_amount ELSE 0 END), 0),
+            NOW(),
+            NOW()
+        FROM matched
+        GROUP BY day, user_id_line
+        ON CONFLICT (summary_date, user_id_line)
+        DO UPDATE SET
+            total_income = period_summary.total_income + EXCLUDED.total_income,
+            total_expense = period_summary.total_expense + EXCLUDED.total_expense,
+            total_balance = period_summary.total_balance + EXCLUDED.total_balance,
+            updated_at = NOW()
+    ),
+    tagged AS (
+        INSERT INTO tag_summary_daily (
+            user_id_line, summary_date, tag_id,
+            total_income, total_expense, updated_at
+        )
+        SELECT
+            m.user_id_line,
+            m.day,
+            COALESCE(tt.tag_id, 999999),
+            COALESCE(SUM(CASE WHEN m.type = 'income' THEN m.signed_amount ELSE 0 END), 0),
+            COALESCE(SUM(CASE WHEN m.type = 'expense' THEN m.signed_amount ELSE 0 END), 0),
+            NOW()
+        FROM matched m
+        LEFT JOIN transaction_tags tt ON tt.transaction_id = m.id
+        GROUP BY m.user_id_line, m.day, COALESCE(tt.tag_id, 999999)
+        ON CONFLICT (user_id_line, summary_date, tag_id)
+        DO UPDATE SET
+            total_income = tag_summary_daily.total_income + EXCLUDED.total_income,
+            total_expense = tag_summary_daily.total_expense + EXCLUDED.total_expense,
+            updated_at = NOW()
+    )
+    SELECT count(*) INTO v_matched FROM matched;
+
+    RETURN v_matched;
+END;
+$function$;
+
+COMMIT;
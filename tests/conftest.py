@@ -0,0 +1,61 @@
+"""
+python -m pytest (ดู pytest.ini)
+
+test ที่ใช้ fixture db ต้องมี Postgres ที่ migrate แล้ว (DATABASE_URL เหมือนตอนรัน API)
+ไม่ได้ตั้งหรือต่อไม่ได้ -> skip ที่เหลือรันได้โดยไม่มี DB
+"""
+import os
+import uuid
+
+import pytest
+from dotenv import load_dotenv
+
+load_dotenv()
+DATABASE_CONFIGURED = bool(os.getenv("DATABASE_URL"))
+# app.config.database สร้าง engine ตอน import (ยังไม่ connect) ต้องมี URL เสมอ
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/unconfigured")
+
+
+@pytest.fixture(scope="session")
+def db_engine():
+    if not DATABASE_CONFIGURED:
+        pytest.skip("DATABASE_URL not set")
+
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError
+
+    from app.config.database import engine
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    except OperationalError:
+        pytest.skip("database not reachable")
+    return engine
+
+
+@pytest.fixture
+def db(db_engine):
+    from app.config.database import SessionLocal
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def make_user(db_engine):
+    """user_id_line ใหม่ต่อ test ลบแถวทั้งหมดของ user นั้นตอนจบ"""
+    from sqlalchemy import text
+
+    created = []
+
+    def make() -> str:
+        created.append(f"pytest-{uuid.uuid4().hex[:12]}")
+        return created[-1]
+
+    yield make
+
+    with db_engine.begin() as conn:
+        # transactions ก่อน: trigger ลบ transaction_tags, period_summary ก่อน rollup
+        for table in ("transactions", "tag_summary_daily", "tags", "period_summary",
+                      "period_summary_rollup", "user_data_version"):
+            conn.execute(text(f"DELETE FROM {table} WHERE user_id_line = ANY(:users)"),
+                         {"users": created})
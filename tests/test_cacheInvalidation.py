@@ -0,0 +1,142 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.config.database import run_db
+from app.utils import cache
+from app.utils import cacheRedis
+from app.utils.cacheRedis import invalidation_bus
+
+
+@pytest.fixture
+def published(monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_REDIS_URL", "redis://127.0.0.1:1/0")
+    calls = []
+    monkeypatch.setattr(invalidation_bus, "publish",
+                        lambda users: calls.append((list(users), threading.get_ident())))
+    return calls
+
+
+def test_deferred_publish_runs_once_after_block_off_the_loop(published):
+    async def main():
+        loop_thread = threading.get_ident()
+        async with cache.deferred_invalidations():
+            cache.invalidate_user("u1")
+            cache.invalidate_user("u2")
+            cache.invalidate_user("u1")
+            assert published == []
+        return loop_thread
+
+    loop_thread = asyncio.run(main())
+    assert [users for users, _ in published] == [["u1", "u2"]]
+    assert published[0][1] != loop_thread
+
+
+def test_run_db_publishes_after_callable_returns(published):
+    def write(db):
+        cache.invalidate_user("u3")
+        assert published == []
+        return "ok"
+
+    assert asyncio.run(run_db(object(), write)) == "ok"
+    assert [users for users, _ in published] == [["u3"]]
+
+
+def test_publish_failure_does_not_fail_request(monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_REDIS_URL", "redis://127.0.0.1:1/0")
+
+    def down(users):
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(invalidation_bus, "publish", down)
+
+    def write(db):
+        cache.invalidate_user("u4")
+        return "committed"
+
+    assert asyncio.run(run_db(object(), write)) == "committed"
+
+
+def test_listener_survives_malformed_messages(monkeypatch):
+    bus = type(invalidation_bus)()
+    applied = []
+    monkeypatch.setattr("app.utils.cacheRedis.apply_remote_invalidation", applied.append)
+
+    for data in (b"not json", b"[1]", b'{"a": 1}', b'["other-worker", 5]',
+                 b'["other-worker", "u1"]'):
+        bus._receive(data)
+
+    assert applied == ["u1"]
+    assert bus.stats()["errors"] == 4
+    assert bus.stats()["received"] == 1
+
+
+def test_publish_sets_a_fresh_expiring_generation(monkeypatch):
+    sent = []
+
+    class Pipeline:
+        def __getattr__(self, command):
+            return lambda *args, **kwargs: sent.append((command, args, kwargs))
+
+    class Client:
+        def pipeline(self, transaction):
+            return Pipeline()
+
+    monkeypatch.setattr(cacheRedis, "sync_client", Client)
+    bus = type(invalidation_bus)()
+    bus.publish(["u1"])
+    bus.publish(["u1"])
+
+    generations = [(args, kwargs) for command, args, kwargs in sent if command == "set"]
+    assert [args[0] for args, _ in generations] == [cacheRedis._generation_key("u1")] * 2
+    assert generations[0][0][1] != generations[1][0][1]
+    assert all(kwargs == {"ex": cacheRedis.CACHE_GENERATION_TTL} for _, kwargs in generations)
+
+
+def test_redis_cache_ttl_must_fit_in_generation_ttl():
+    with pytest.raises(RuntimeError, match="CACHE_GENERATION_TTL"):
+        cacheRedis.RedisCache("t", cacheRedis.CACHE_GENERATION_TTL + 1)
+
+
+def _compute_with_write(ttl_cache, user, write):
+    """compute ที่มี write (invalidate / clear) เกิดขึ้นระหว่างอ่าน คืนค่าที่ได้ครั้งแรกและครั้งถัดไป"""
+    calls = []
+
+    async def compute():
+        calls.append(None)
+        if len(calls) == 1:
+            write()
+        return len(calls)
+
+    async def main():
+        return [await ttl_cache.get_or_compute(user, "k", compute) for _ in range(2)]
+
+    return asyncio.run(main())
+
+
+def test_value_computed_across_a_write_is_not_cached():
+    ttl_cache = cache.TTLCache("t", maxsize=10, ttl=60)
+    assert _compute_with_write(ttl_cache, "u1", lambda: ttl_cache.invalidate_user("u1")) == [1, 2]
+
+
+def test_value_computed_across_clear_is_not_cached():
+    ttl_cache = cache.TTLCache("t", maxsize=10, ttl=60)
+    assert _compute_with_write(ttl_cache, "u1", ttl_cache.clear) == [1, 2]
+
+
+def test_generations_are_kept_only_while_computing():
+    ttl_cache = cache.TTLCache("t", maxsize=10, ttl=60)
+    for i in range(1000):
+        ttl_cache.invalidate_user(f"u{i}")
+    assert ttl_cache._generations == {}
+
+    seen = []
+
+    def write():
+        ttl_cache.invalidate_user("u1")
+        seen.append(dict(ttl_cache._generations))
+
+    _compute_with_write(ttl_cache, "u1", write)
+    assert seen == [{"u1": 1}]
+    assert ttl_cache._generations == {} and ttl_cache._computing == {}
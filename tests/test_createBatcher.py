@@ -0,0 +1,108 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.dto.transactions import TransactionPayload
+from app.utils import createBatcher
+from app.utils.createBatcher import CreateBatcher, insert_each, insert_transactions
+
+
+def _payload(user_id_line: str, title: str = "t") -> TransactionPayload:
+    return TransactionPayload(title=title, amount=1, type="expense",
+                              userIdLine=user_id_line, transactionAt=datetime(2026, 1, 1))
+
+
+def _submit_all(batcher: CreateBatcher, users: list[str]) -> list:
+    async def run():
+        return await asyncio.wait_for(asyncio.gather(
+            *(batcher.submit(_payload(u)) for u in users), return_exceptions=True), 2)
+    return asyncio.run(run())
+
+
+def test_batch_and_fallback_failing_fails_every_request(monkeypatch):
+    calls = []
+
+    async def down(fn, payloads):
+        calls.append(fn)
+        raise OperationalError("INSERT", {}, Exception("connection lost"))
+
+    invalidated = []
+    monkeypatch.setattr(createBatcher, "run_db_session", down)
+    monkeypatch.setattr(createBatcher, "invalidate_user", invalidated.append)
+
+    results = _submit_all(CreateBatcher(window_ms=1, max_size=10), ["u1", "u2", "u3"])
+
+    assert calls == [insert_transactions, insert_each]
+    assert all(isinstance(r, HTTPException) and r.status_code == 500 for r in results)
+    assert invalidated == []
+
+
+def test_fallback_isolates_failed_item(monkeypatch):
+    async def partial(fn, payloads):
+        if fn is insert_transactions:
+            raise OperationalError("INSERT", {}, Exception("check violation"))
+        return [ValueError("bad") if p.userIdLine == "bad" else i
+                for i, p in enumerate(payloads, start=100)]
+
+    invalidated = []
+    monkeypatch.setattr(createBatcher, "run_db_session", partial)
+    monkeypatch.setattr(createBatcher, "invalidate_user", invalidated.append)
+
+    results = _submit_all(CreateBatcher(window_ms=1, max_size=10), ["u1", "bad", "u2"])
+
+    assert results[0] == 100 and results[2] == 102
+    assert isinstance(results[1], HTTPException)
+    assert sorted(invalidated) == ["u1", "u2"]
+
+
+def test_invalidation_error_does_not_strand_batch(monkeypatch):
+    async def ok(fn, payloads):
+        return list(range(1, len(payloads) + 1))
+
+    def broken(user_id_line):
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(createBatcher, "run_db_session", ok)
+    monkeypatch.setattr(createBatcher, "invalidate_user", broken)
+
+    assert _submit_all(CreateBatcher(window_ms=1, max_size=10), ["u1", "u2"]) == [1, 2]
+
+
+def _written(db, users):
+    db.rollback()
+    return db.execute(text("""
+        SELECT user_id_line, count(*) FROM transactions
+        WHERE user_id_line = ANY(:users) AND transaction_at = '2026-01-01'
+        GROUP BY user_id_line
+    """), {"users": users}).all(), db.execute(text("""
+        SELECT user_id_line, total_expense FROM period_summary
+        WHERE user_id_line = ANY(:users) AND summary_date = '2026-01-01'
+    """), {"users": users}).all()
+
+
+def test_insert_each_rolls_back_only_the_rejected_row(db, make_user):
+    u1, bad, u2 = make_user(), make_user(), make_user()
+    # title เกิน VARCHAR(255): DB ปฏิเสธเฉพาะแถวนี้
+    results = insert_each(db, [_payload(u1), _payload(bad, "x" * 300), _payload(u2)])
+
+    assert isinstance(results[0], int) and isinstance(results[2], int)
+    assert isinstance(results[1], Exception)
+    rows, summary = _written(db, [u1, bad, u2])
+    assert sorted(rows) == sorted([(u1, 1), (u2, 1)])
+    assert sorted(summary) == sorted([(u1, 1), (u2, 1)])
+
+
+def test_insert_each_fails_whole_batch_after_inserts(db, make_user, monkeypatch):
+    def broken(db, deltas, transaction_at=None):
+        raise RuntimeError("summary delta matched 0 of 1 transactions")
+
+    monkeypatch.setattr(createBatcher, "apply_summary_deltas", broken)
+    u1, u2 = make_user(), make_user()
+    with pytest.raises(RuntimeError):
+        insert_each(db, [_payload(u1), _payload(u2)])
+
+    assert _written(db, [u1, u2]) == ([], [])
@@ -0,0 +1,36 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event, text
+
+from app.dto.transactions import TransactionPayload
+from app.routes.transactions import _create_transaction, _create_transaction_v2
+
+
+@pytest.mark.parametrize("create", [_create_transaction, _create_transaction_v2])
+def test_create_returns_id_without_a_round_trip_after_commit(db, make_user, create):
+    user = make_user()
+    events = []
+    engine = db.get_bind()
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        events.append(statement)
+
+    def commit(conn):
+        events.append("COMMIT")
+
+    event.listen(engine, "before_cursor_execute", record)
+    event.listen(engine, "commit", commit)
+    try:
+        result = create(db, TransactionPayload(
+            title="create", amount=12.5, type="expense", userIdLine=user,
+            transactionAt=datetime(2026, 3, 5, 12), tags=["food"]))
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+        event.remove(engine, "commit", commit)
+
+    assert events[-1] == "COMMIT"
+    row = db.execute(text("""
+        SELECT user_id_line, amount, status, transaction_at FROM transactions WHERE id = :id
+    """), {"id": result["id"]}).one()
+    assert tuple(row) == (user, 12.5, "active", datetime(2026, 3, 5, 12))
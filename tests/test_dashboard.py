@@ -0,0 +1,52 @@
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.config.database import read_from_replica
+from app.dto.transactions import TransactionPayload
+from app.routes import dashboard, periodSummary, report
+from app.routes.transactions import _create_transaction_v2
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    for module in (dashboard, periodSummary, report):
+        app.include_router(module.router)
+    app.dependency_overrides[read_from_replica] = lambda: False
+    return TestClient(app)
+
+
+def test_invalid_range_is_rejected(client):
+    r = client.get("/dashboard", params={"user_id_line": "u", "mode": "range"})
+    assert r.status_code == 400
+
+
+def test_dashboard_matches_the_separate_endpoints(db, client, make_user):
+    user = make_user()
+    for day, amount, type_, tags in ((3, 100, "income", ["pay"]), (4, 30, "expense", ["food"]),
+                                     (4, 20, "expense", ["food", "rice"])):
+        _create_transaction_v2(db, TransactionPayload(
+            title="d", amount=amount, type=type_, userIdLine=user,
+            transactionAt=datetime(2026, 3, day, 9), tags=tags))
+
+    params = {"user_id_line": user, "mode": "month", "month": 3, "year": 2026}
+    r = client.get("/dashboard", params=params)
+    assert r.status_code == 200
+    body = r.json()
+
+    period = client.post("/period-summary/report", json={
+        "user_id_line": user, "type": "monthly", "year": 2026, "month": 3}).json()
+    tags = client.post("/reports/tags", json=params).json()
+    # /period-summary/report ส่ง Decimal เป็น string (response_model) dashboard ส่งเป็นตัวเลข
+    for k in ("total_income", "total_expense", "total_balance"):
+        assert body["period"][k] == float(period[k])
+    assert (body["period"]["total_income"], body["period"]["total_expense"]) == (100, 50)
+    assert body["tags"] == tags
+    assert body["period"]["start_date"] == "2026-03-01"
+    assert body["period"]["end_date"] == "2026-03-31"
+
+    again = client.get("/dashboard", params=params, headers={"If-None-Match": r.headers["etag"]})
+    assert again.status_code == 304
@@ -0,0 +1,45 @@
+import enum
+import json
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import TypedDict
+
+import orjson
+import pytest
+from fastapi.encoders import jsonable_encoder
+
+from app.utils.jsonResponse import FastJSONResponse, to_rows
+
+
+class _Type(str, enum.Enum):
+    income = "income"
+
+
+def test_render_matches_jsonable_encoder():
+    content = {
+        "amount": Decimal("12.50"),
+        "count": Decimal("3"),
+        "type": _Type.income,
+        "at": datetime(2026, 3, 5, 9, 30),
+        "title": "ข้าวมันไก่",
+        1: "non-str key",
+    }
+    rendered = orjson.loads(FastJSONResponse(content).body)
+    assert rendered == json.loads(json.dumps(jsonable_encoder(content)))
+    assert rendered["count"] == 3 and isinstance(rendered["count"], int)
+
+
+def test_render_rejects_unknown_types():
+    with pytest.raises(TypeError):
+        FastJSONResponse({"x": object()})
+
+
+class _Row(TypedDict):
+    id: int
+    title: str
+
+
+def test_to_rows_keeps_only_schema_fields():
+    objs = [SimpleNamespace(id=1, title="a", user_id_line="secret")]
+    assert to_rows(objs, _Row) == [{"id": 1, "title": "a"}]
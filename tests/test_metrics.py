@@ -0,0 +1,29 @@
+from app.utils.metrics import Counter, Histogram, render, snapshot_lines
+
+
+def test_histogram_renders_cumulative_buckets():
+    h = Histogram("t_seconds", "help", ("route",), (0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        h.observe(("/a",), value)
+
+    assert h.render() == [
+        "# HELP t_seconds help",
+        "# TYPE t_seconds histogram",
+        't_seconds_bucket{route="/a",le="0.1"} 2',
+        't_seconds_bucket{route="/a",le="1.0"} 3',
+        't_seconds_bucket{route="/a",le="+Inf"} 4',
+        't_seconds_sum{route="/a"} 3.65',
+        't_seconds_count{route="/a"} 4',
+    ]
+
+
+def test_label_values_are_escaped():
+    c = Counter("t_total", "help", ("route",))
+    c.inc(('/a"b\\c\n',), 2)
+    assert c.render()[-1] == 't_total{route="/a\\"b\\\\c\\n"} 2'
+
+
+def test_snapshot_lines_and_render_end_with_newline():
+    lines = snapshot_lines("pool_in_use", "gauge", "help", [({"pool": "primary"}, 3)])
+    assert lines[-1] == 'pool_in_use{pool="primary"} 3'
+    assert render(lines).endswith('pool_in_use{pool="primary"} 3\n')
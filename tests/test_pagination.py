@@ -0,0 +1,57 @@
+import base64
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.config.database import get_read_db
+from app.routes.transactions import router
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+def _raw(value: bytes) -> str:
+    return base64.urlsafe_b64encode(value).decode().rstrip("=")
+
+
+def test_cursor_round_trip():
+    at = datetime(2026, 3, 5, 9, 30, 15, 123456)
+    cursor = encode_cursor(at, 42)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (at, 42)
+
+
+@pytest.mark.parametrize("cursor", [
+    "%%%",
+    _raw(b"not json"),
+    _raw(b"[1]"),
+    _raw(b'["2026-03-05T09:00:00", 1, 2]'),
+    _raw(b'["yesterday", 1]'),
+    _raw(b'[5, 1]'),
+    _raw(b'["2026-03-05T09:00:00", "x"]'),
+    _raw(b'{"a": 1, "b": 2}'),
+    _raw(b"\xff\xfe"),
+])
+def test_invalid_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError, match="invalid cursor"):
+        decode_cursor(cursor)
+
+
+@pytest.fixture
+def client():
+    # cursor ผิดต้องตอบ 400 ก่อนแตะ DB: session เป็น None
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_read_db] = lambda: None
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("path, params", [
+    ("/transactions", {"mode": "today"}),
+    ("/transactions/v2", {"mode": "today"}),
+    ("/transactions/today/v2", {}),
+])
+def test_listing_rejects_invalid_cursor(client, path, params):
+    r = client.get(path, params={"user_id_line": "u", "cursor": "%%%", **params})
+    assert r.status_code == 400
+    assert r.json()["detail"] == "invalid cursor"
@@ -0,0 +1,66 @@
+from datetime import date, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.config.database import get_read_db
+from app.dto.peroidSummary import SeriesGranularity
+from app.routes.periodSummary import router
+from app.utils.summarySeries import (
+    MAX_SERIES_BUCKETS, MAX_SERIES_DATE, MIN_SERIES_DATE, series_bucket_count, series_buckets,
+)
+
+
+@pytest.fixture
+def client():
+    # ทุกกรณีในไฟล์นี้ต้องตอบ 400 ก่อนแตะ DB: session เป็น None
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_read_db] = lambda: None
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("granularity", list(SeriesGranularity))
+@pytest.mark.parametrize("start, end", [
+    (date(2026, 3, 5), date(2026, 3, 5)),
+    (date(2026, 3, 1), date(2026, 3, 31)),
+    (date(2026, 1, 31), date(2026, 3, 1)),
+    (date(2025, 12, 28), date(2026, 1, 4)),   # อาทิตย์ -> อาทิตย์ ข้ามปี
+    (date(2025, 12, 29), date(2026, 1, 5)),   # จันทร์ -> จันทร์
+    (date(2024, 2, 29), date(2026, 10, 18)),
+])
+def test_bucket_count_matches_buckets(granularity, start, end):
+    assert series_bucket_count(start, end, granularity) == \
+        len(series_buckets(start, end + timedelta(days=1), granularity))
+
+
+@pytest.mark.parametrize("granularity", list(SeriesGranularity))
+def test_bucket_count_at_date_bounds(granularity):
+    assert series_bucket_count(MIN_SERIES_DATE, MAX_SERIES_DATE, granularity) > MAX_SERIES_BUCKETS
+
+
+@pytest.mark.parametrize("params", [
+    {"end": "9999-12-31"},
+    {"start": "9999-12-31", "end": "9999-12-31"},
+    {"start": "0001-01-01", "end": "0001-01-02", "granularity": "day"},
+    {"end": "0001-01-01", "granularity": "month"},
+])
+def test_series_rejects_dates_outside_bounds(client, params):
+    r = client.get("/period-summary/series", params={"user_id_line": "u", **params})
+    assert r.status_code == 400
+    assert "between" in r.json()["detail"]
+
+
+def test_series_rejects_too_many_buckets(client):
+    r = client.get("/period-summary/series", params={
+        "user_id_line": "u", "granularity": "day",
+        "start": str(MIN_SERIES_DATE), "end": str(MAX_SERIES_DATE)})
+    assert r.status_code == 400
+    assert "too many day buckets" in r.json()["detail"]
+
+
+def test_series_rejects_reversed_range(client):
+    r = client.get("/period-summary/series", params={
+        "user_id_line": "u", "start": "2026-03-02", "end": "2026-03-01"})
+    assert r.status_code == 400
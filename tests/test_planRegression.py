@@ -0,0 +1,41 @@
+"""
+plan ของ query หลักบนข้อมูลจาก bench.seedData (ตัวตรวจเดียวกับ python -m bench.planRegression)
+ไม่มี DB หรือยังไม่ได้ seed -> skip
+"""
+from datetime import date
+
+import pytest
+from sqlalchemy import func, select
+
+from app.models.transactionModel import Transaction
+from bench.partitionPruning import explain
+from bench.planRegression import cases, check, parents, vacuum
+from bench.seedData import BENCH_PREFIX
+
+YEAR = date.today().year
+CASE_NAMES = [case.name for case in cases("", YEAR)]
+
+
+@pytest.fixture(scope="module")
+def seeded_user(db_engine):
+    from app.config.database import SessionLocal
+
+    with SessionLocal() as db:
+        user_id_line = db.scalar(
+            select(Transaction.user_id_line)
+            .where(Transaction.user_id_line.like(f"{BENCH_PREFIX}%"))
+            .group_by(Transaction.user_id_line)
+            .order_by(func.count().desc())
+            .limit(1))
+    if user_id_line is None:
+        pytest.skip("no seeded data (python -m bench.seedData)")
+    # index only scan ต้องการ visibility map ที่อัปเดตแล้ว
+    vacuum()
+    return user_id_line
+
+
+@pytest.mark.parametrize("name", CASE_NAMES)
+def test_plan_uses_expected_indexes(db, seeded_user, name):
+    case = next(c for c in cases(seeded_user, YEAR) if c.name == name)
+    check(case, explain(db, case.stmt), parents(db))
+    assert case.problems == []
@@ -0,0 +1,53 @@
+import pytest
+
+from app.config.readReplica import ReplicaRouter, check_replica_config
+
+
+@pytest.fixture
+def router():
+    router = ReplicaRouter(sticky_seconds=60, max_lag_seconds=2, check_seconds=1)
+    router.lag_seconds = 0.0
+    return router
+
+
+def test_routes_to_replica_when_lag_is_low(router):
+    assert router.route("u1") == "replica"
+
+
+def test_unknown_user_reads_from_primary(router):
+    assert router.route(None) == "unknown_user"
+
+
+@pytest.mark.parametrize("lag", [None, 2.5])
+def test_unmeasured_or_high_lag_reads_from_primary(router, lag):
+    router.lag_seconds = lag
+    assert router.route("u1") == "lag"
+
+
+def test_writer_reads_own_writes_from_primary(router):
+    router.mark_write("u1")
+    assert router.route("u1") == "recent_write"
+    assert router.route("u2") == "replica"
+
+
+def test_write_of_unknown_user_sends_everyone_to_primary(router):
+    router.mark_write(None)
+    assert router.route("u2") == "recent_write"
+
+
+def test_sticky_window_covers_max_lag_plus_check_interval():
+    assert ReplicaRouter(sticky_seconds=1, max_lag_seconds=5, check_seconds=2).sticky_seconds == 7
+
+
+def test_route_counts_reasons(router):
+    router.route("u1")
+    router.route(None)
+    assert router.stats()["routes"] == {
+        "replica": 1, "recent_write": 0, "lag": 0, "unknown_user": 1}
+
+
+def test_replica_requires_redis_pub_sub():
+    with pytest.raises(RuntimeError, match="CACHE_REDIS_URL"):
+        check_replica_config("postgresql://replica/acc", "")
+    check_replica_config("postgresql://replica/acc", "redis://localhost:6379/0")
+    check_replica_config("", "")
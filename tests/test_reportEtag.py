@@ -0,0 +1,34 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.config.database import get_read_db
+from app.routes import report
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # If-None-Match ตรงเสมอ: payload ที่ถูกต้องได้ 304 โดยไม่ต้องสร้างรายงาน (ไม่แตะ DB)
+    monkeypatch.setattr(report, "data_version", lambda db, user_id_line: 1)
+    monkeypatch.setattr(report, "etag_matches", lambda request, etag: True)
+    app = FastAPI()
+    app.include_router(report.router)
+    app.dependency_overrides[get_read_db] = lambda: None
+    return TestClient(app)
+
+
+def test_matching_etag_returns_not_modified(client):
+    r = client.post("/reports/tags", json={"user_id_line": "u", "mode": "year", "year": 2026},
+                    headers={"If-None-Match": '"any"'})
+    assert r.status_code == 304
+
+
+@pytest.mark.parametrize("payload", [
+    {"mode": "range", "start_date": "2026-03-01"},
+    {"mode": "range", "start_date": "2026-03-01", "end_date": "not-a-date"},
+    {"mode": "month", "month": 13, "year": 2026},
+])
+def test_invalid_range_is_rejected_before_etag(client, payload):
+    r = client.post("/reports/tags", json={"user_id_line": "u", **payload},
+                    headers={"If-None-Match": '"any"'})
+    assert r.status_code == 400
@@ -0,0 +1,50 @@
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import text
+
+from app.dto.transactions import TransactionPayload
+from app.routes.transactions import _create_transaction
+from app.utils.summaryDelta import apply_summary_deltas, lock_users
+
+
+def _create(db, user, amount, type_, at):
+    return _create_transaction(db, TransactionPayload(
+        title="delta", amount=amount, type=type_, userIdLine=user,
+        transactionAt=at, tags=["food"]))["id"]
+
+
+def _day(db, user, day):
+    return db.execute(text("""
+        SELECT total_income, total_expense, total_balance FROM period_summary
+        WHERE user_id_line = :user AND summary_date = :day
+    """), {"user": user, "day": day}).one()
+
+
+def test_signed_deltas_add_and_remove_per_day(db, make_user):
+    user = make_user()
+    at = datetime(2026, 3, 5, 9)
+    income = _create(db, user, 100, "income", at)
+    expense = _create(db, user, 30, "expense", at)
+    assert tuple(_day(db, user, date(2026, 3, 5))) == (100, 30, 70)
+
+    lock_users(db, [user])
+    apply_summary_deltas(db, {income: -1, expense: -1}, {income: at, expense: at})
+    db.commit()
+    assert tuple(_day(db, user, date(2026, 3, 5))) == (0, 0, 0)
+
+
+def test_mismatched_transaction_at_raises_instead_of_skipping(db, make_user):
+    user = make_user()
+    at = datetime(2026, 3, 5, 9)
+    tx_id = _create(db, user, 100, "income", at)
+
+    lock_users(db, [user])
+    with pytest.raises(RuntimeError, match="matched 0 of 1"):
+        apply_summary_deltas(db, {tx_id: -1}, {tx_id: datetime(2026, 3, 6, 9)})
+    db.rollback()
+
+    with pytest.raises(RuntimeError, match="matched 1 of 2"):
+        apply_summary_deltas(db, {tx_id: -1, -1: -1})
+    db.rollback()
+    assert tuple(_day(db, user, date(2026, 3, 5))) == (100, 0, 100)
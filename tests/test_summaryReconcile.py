@@ -0,0 +1,74 @@
+from datetime import date, datetime
+
+from sqlalchemy import text
+
+from app.config.database import SessionLocal
+from app.dto.transactions import TransactionPayload
+from app.jobs import summaryReconcile
+from app.routes.transactions import _create_transaction
+from app.utils.summaryDelta import lock_users
+
+START, END = date(2026, 3, 1), date(2026, 4, 1)
+
+
+def _seed(db, user):
+    _create_transaction(db, TransactionPayload(
+        title="reconcile", amount=100, type="income", userIdLine=user,
+        transactionAt=datetime(2026, 3, 5, 9), tags=["food"]))
+
+
+def _drift(db, user):
+    db.execute(text("""
+        UPDATE period_summary SET total_income = total_income + 1, total_balance = total_balance + 1
+        WHERE user_id_line = :user
+    """), {"user": user})
+    db.commit()
+
+
+def _income(db, user):
+    return db.scalar(text("""
+        SELECT total_income FROM period_summary
+        WHERE user_id_line = :user AND summary_date = '2026-03-05'
+    """), {"user": user})
+
+
+def _held_lock(user):
+    """API ที่ยังไม่ commit: ถือ lock ของ user ไว้"""
+    holder = SessionLocal()
+    lock_users(holder, [user])
+    return holder
+
+
+def test_rebuild_fixes_only_drifted_users(db, make_user):
+    clean, drifted = make_user(), make_user()
+    _seed(db, clean)
+    _seed(db, drifted)
+    _drift(db, drifted)
+
+    holder = _held_lock(clean)
+    try:
+        # user ที่ยอดตรงไม่ถูกล็อก: ไม่ต้องรอ API ที่ถือ lock อยู่
+        fixed, skipped = summaryReconcile.reconcile_shard([clean, drifted], START, END)
+    finally:
+        holder.close()
+
+    assert fixed == {"period_summary": 1, "tag_summary_daily": 0}
+    assert skipped == []
+    assert _income(db, drifted) == 100
+
+
+def test_rebuild_skips_users_locked_past_the_timeout(db, make_user, monkeypatch):
+    monkeypatch.setattr(summaryReconcile, "RECONCILE_LOCK_TIMEOUT_MS", 50)
+    user = make_user()
+    _seed(db, user)
+    _drift(db, user)
+
+    holder = _held_lock(user)
+    try:
+        fixed, skipped = summaryReconcile.reconcile_shard([user], START, END)
+    finally:
+        holder.close()
+
+    assert fixed == {"period_summary": 0, "tag_summary_daily": 0}
+    assert skipped == [user]
+    assert _income(db, user) == 101
@@ -0,0 +1,101 @@
+from app.utils import tagIndex
+from app.utils.tagIndex import TagIndexRegistry
+
+
+class _Rows:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def mappings(self):
+        return self
+
+    def all(self):
+        return self._rows
+
+
+class _TagsDb:
+    """tags ของ user ตามที่อยู่ใน DB (worker อื่นเขียนเพิ่มได้โดย registry นี้ไม่รู้)"""
+
+    def __init__(self):
+        self.rows = []
+        self.loads = 0
+
+    def execute(self, _stmt):
+        self.loads += 1
+        return _Rows([dict(r) for r in self.rows])
+
+
+def test_index_reloads_after_ttl_without_invalidation(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(tagIndex.time, "monotonic", lambda: now[0])
+    db = _TagsDb()
+    registry = TagIndexRegistry(max_users=10, ttl=60)
+
+    assert registry.search(db, "u1", "fo", 10) == []
+    db.rows.append({"id": 1, "name": "Food", "slug": "food", "usage_count": 3})
+
+    now[0] += 59
+    assert registry.search(db, "u1", "fo", 10) == []
+    assert db.loads == 1
+
+    now[0] += 2
+    assert [t["slug"] for t in registry.search(db, "u1", "fo", 10)] == ["food"]
+    assert db.loads == 2
+
+
+def test_evicted_users_drop_their_load_time():
+    db = _TagsDb()
+    registry = TagIndexRegistry(max_users=2, ttl=60)
+    for user in ("u1", "u2", "u3"):
+        registry.get(db, user)
+
+    assert list(registry._users) == ["u2", "u3"]
+    assert set(registry._loaded_at) == {"u2", "u3"}
+
+
+def test_prefix_search_includes_tags_outside_the_bmp():
+    index = tagIndex.UserTagIndex([
+        {"id": 1, "name": "a😀", "slug": "a😀", "usage_count": 0},
+        {"id": 2, "name": "a𠀀x", "slug": "a𠀀x", "usage_count": 0},
+        {"id": 3, "name": "b", "slug": "b", "usage_count": 0},
+    ])
+    assert [t["id"] for t in index.search("a", 1)] == [1]
+    assert [t["id"] for t in index.search("a", 10)] == [1, 2]
+    assert tagIndex.prefix_end("a\U0010ffff") == "b"
+    assert tagIndex.prefix_end("\U0010ffff") is None
+
+
+class _WriteDuringLoad(_TagsDb):
+    """worker นี้ commit tag ใหม่ระหว่างที่อีก request กำลังโหลด index (ผลที่โหลดไม่มี tag นั้น)"""
+
+    def __init__(self, write):
+        super().__init__()
+        self.write = write
+
+    def execute(self, stmt):
+        result = super().execute(stmt)
+        if self.loads == 1:
+            self.write()
+        return result
+
+
+def test_write_during_load_is_not_lost():
+    registry = TagIndexRegistry(max_users=10, ttl=60)
+    food = {"id": 1, "name": "Food", "slug": "food", "usage_count": 1}
+
+    def write():
+        db.rows.append(food)
+        registry.record("u1", [food])
+
+    db = _WriteDuringLoad(write)
+    assert registry.search(db, "u1", "fo", 10) == []
+    assert [t["slug"] for t in registry.search(db, "u1", "fo", 10)] == ["food"]
+    assert db.loads == 2
+    assert registry._loading == {} and registry._generations == {}
+
+
+def test_clear_during_load_is_not_stored():
+    registry = TagIndexRegistry(max_users=10, ttl=60)
+    db = _WriteDuringLoad(registry.clear)
+    registry.get(db, "u1")
+    assert "u1" not in registry._users
@@ -0,0 +1,28 @@
+import pytest
+from pydantic import ValidationError
+
+from app.dto.transactions import TAGS_MAX_ITEMS, TransactionPayload
+from app.utils.summaryDelta import lock_users
+from app.utils.tagResolver import resolve_tag_ids
+
+
+def test_resolves_more_tags_than_the_parameter_limit(db, make_user):
+    user = make_user()
+    # 3 คอลัมน์ต่อ tag เคยเป็น 3 parameter ต่อ tag: เกิน 65535 ที่ ~21,846 tag
+    names = [f"tag-{i}" for i in range(25_000)]
+    lock_users(db, [user])
+
+    created = resolve_tag_ids(db, [(user, name) for name in names])
+    again = resolve_tag_ids(db, [(user, name) for name in names[::-1]])
+    db.commit()
+
+    assert len(created) == len(names)
+    assert again == created
+
+
+def test_transaction_tags_are_capped():
+    payload = {"title": "t", "amount": 1, "type": "expense", "userIdLine": "u",
+               "transactionAt": "2026-03-01T12:00:00"}
+    TransactionPayload(**payload, tags=[f"t{i}" for i in range(TAGS_MAX_ITEMS)])
+    with pytest.raises(ValidationError):
+        TransactionPayload(**payload, tags=[f"t{i}" for i in range(TAGS_MAX_ITEMS + 1)])
@@ -0,0 +1,76 @@
+import asyncio
+import csv
+import io
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.config.database import DB_ASYNC, read_from_replica
+from app.dto.transactions import TransactionPayload
+from app.routes.transactions import _create_transaction_v2, router
+from app.utils import transactionExport
+from app.utils.transactionExport import (
+    EXPORT_COLUMNS, aiter_export, csv_header, format_chunk, iter_export,
+)
+
+
+def _row(**overrides):
+    row = dict(id=1, title='ข้าว, "มัน"\nไก่', amount=12.5, type="expense", status="active",
+               source="line", created_at=None, transaction_at=datetime(2026, 3, 5, 9))
+    return SimpleNamespace(**{**row, **overrides})
+
+
+def test_csv_chunk_quotes_fields_and_joins_tags():
+    text = csv_header() + format_chunk([_row()], {1: ["food", "rice"]}, "csv")
+    header, row = list(csv.reader(io.StringIO(text)))
+    assert header == EXPORT_COLUMNS
+    assert row == ["1", 'ข้าว, "มัน"\nไก่', "12.5", "expense", "active", "line", "",
+                   "2026-03-05T09:00:00", "food|rice"]
+
+
+def test_ndjson_chunk_is_one_object_per_line():
+    lines = format_chunk([_row(), _row(id=2, type=SimpleNamespace(value="income"))],
+                         {2: ["pay"]}, "ndjson").splitlines()
+    first, second = (json.loads(line) for line in lines)
+    assert first["title"] == 'ข้าว, "มัน"\nไก่' and first["tags"] == []
+    assert second["type"] == "income" and second["tags"] == ["pay"]
+    assert "ข้าว" in lines[0]
+
+
+def test_export_rejects_invalid_range():
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[read_from_replica] = lambda: False
+    r = TestClient(app).get("/transactions/export", params={
+        "user_id_line": "u", "mode": "range", "start_date": "2026-03-01"})
+    assert r.status_code == 400
+
+
+@pytest.mark.parametrize("fmt", ["csv", "ndjson"])
+def test_export_streams_every_row_across_chunks(db, make_user, monkeypatch, fmt):
+    monkeypatch.setattr(transactionExport, "EXPORT_CHUNK_SIZE", 2)
+    user = make_user()
+    for day in range(1, 6):
+        _create_transaction_v2(db, TransactionPayload(
+            title=f"t{day}", amount=day, type="expense", userIdLine=user,
+            transactionAt=datetime(2026, 3, day, 9), tags=[f"tag{day}"]))
+
+    args = (user, datetime(2026, 3, 1), datetime(2026, 4, 1), fmt)
+    if DB_ASYNC:
+        async def collect():
+            return [chunk async for chunk in aiter_export(*args)]
+        chunks = asyncio.run(collect())
+    else:
+        chunks = list(iter_export(*args))
+    if fmt == "csv":
+        rows = list(csv.DictReader(io.StringIO("".join(chunks))))
+    else:
+        rows = [json.loads(line) for line in "".join(chunks).splitlines()]
+
+    assert len(chunks) == (4 if fmt == "csv" else 3)
+    assert [r["title"] for r in rows] == ["t5", "t4", "t3", "t2", "t1"]
+    assert rows[0]["tags"] in ("tag5", ["tag5"])
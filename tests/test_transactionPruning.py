@@ -0,0 +1,75 @@
+from datetime import datetime
+
+from sqlalchemy import event, text
+
+from app.dto.transactions import TransactionPayload, TransactionUpdatePayload
+from app.routes.transactions import (
+    _cancel_transaction, _create_transaction_v2, _delete_transaction, _update_transaction,
+)
+from bench.partitionPruning import scanned_partitions
+
+
+def _create(db, user_id_line: str, tags: list[str] = ()) -> int:
+    return _create_transaction_v2(db, TransactionPayload(
+        title="prune", amount=10, type="expense", userIdLine=user_id_line,
+        transactionAt=datetime(2026, 3, 15, 12), tags=list(tags)))["id"]
+
+
+def _flush_updates(db, fn, *args) -> list[tuple[str, dict]]:
+    """UPDATE transactions ที่ ORM ส่งตอน flush ระหว่างเรียก fn"""
+    updates = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("UPDATE TRANSACTIONS"):
+            updates.append((statement, parameters))
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        fn(db, *args)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return updates
+
+
+def _assert_single_partition(db, updates, partition: str):
+    assert updates
+    for statement, parameters in updates:
+        assert "transaction_at = " in statement.split("WHERE", 1)[1]
+        plan = db.connection().exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()[0]["Plan"]
+        assert scanned_partitions(plan) == {partition}
+    db.rollback()
+
+
+def test_update_delete_cancel_touch_one_partition(db, make_user):
+    user = make_user()
+
+    tx_id = _create(db, user)
+    updates = _flush_updates(db, _update_transaction, tx_id,
+                             TransactionUpdatePayload(amount=20), user)
+    _assert_single_partition(db, updates, "transactions_p2026_03")
+
+    updates = _flush_updates(db, _delete_transaction, tx_id, user)
+    _assert_single_partition(db, updates, "transactions_p2026_03")
+
+    tx_id = _create(db, user)
+    updates = _flush_updates(db, _cancel_transaction, tx_id, user)
+    _assert_single_partition(db, updates, "transactions_p2026_03")
+
+
+def test_moving_to_another_month_keeps_row_and_tags(db, make_user):
+    user = make_user()
+    tx_id = _create(db, user, ["move"])
+
+    updates = _flush_updates(db, _update_transaction, tx_id,
+                             TransactionUpdatePayload(transactionAt=datetime(2026, 4, 2, 9)), user)
+    # WHERE ใช้ transaction_at เดิม -> อ่าน partition เดิมแล้ว Postgres ย้ายแถวไปเดือนใหม่
+    _assert_single_partition(db, updates, "transactions_p2026_03")
+
+    row = db.execute(text("""
+        SELECT tableoid::regclass::text, transaction_at,
+               (SELECT count(*) FROM transaction_tags WHERE transaction_id = t.id)
+        FROM transactions t WHERE id = :id
+    """), {"id": tx_id}).one()
+    assert tuple(row) == ("transactions_p2026_04", datetime(2026, 4, 2, 9), 1)
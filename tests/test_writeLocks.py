@@ -0,0 +1,104 @@
+import threading
+from datetime import datetime
+
+from sqlalchemy import event, text
+
+from app.config.database import SessionLocal
+from app.dto.transactions import TransactionBulkPayload
+from app.routes.transactions import _create_transactions_bulk
+
+
+def _item(user_id_line: str, tags: list[str], day: int = 1) -> dict:
+    return {"title": "lock", "amount": 10, "type": "expense", "userIdLine": user_id_line,
+            "transactionAt": datetime(2026, 3, day, 12).isoformat(), "tags": tags}
+
+
+def test_bulk_locks_every_user_once_before_the_summary(db, make_user):
+    u1, u2 = sorted([make_user(), make_user()])
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        # u1 ไม่มี tag: ต้องถูกล็อกพร้อม u2 ไม่ใช่ทีหลังตอนปรับ summary
+        _create_transactions_bulk(db, TransactionBulkPayload(items=[
+            _item(u2, ["lock-tag"]), _item(u1, [])]))
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    def first(prefix):
+        return next(i for i, (s, _) in enumerate(statements)
+                    if " ".join(s.split()).upper().startswith(prefix))
+
+    locks = [i for i, (s, _) in enumerate(statements) if "pg_advisory_xact_lock" in s]
+    assert len(locks) == 1
+    assert statements[locks[0]][1]["lock_users"] == [u1, u2]
+    # insert รายการ / tag / link ไม่ถือ lock ของ user, summary ต้องอยู่หลัง lock
+    assert first("INSERT INTO TRANSACTION_TAGS") < locks[0] < first("SELECT APPLY_SUMMARY_DELTAS")
+
+
+def test_bulk_with_tags_on_different_users_does_not_deadlock(make_user):
+    u1, u2 = make_user(), make_user()
+    # A มี tag เฉพาะ u2, B มี tag เฉพาะ u1 (เคย deadlock: ล็อกรอบ tag กับรอบ summary คนละชุด)
+    payloads = [
+        TransactionBulkPayload(items=[_item(u1, [], 1), _item(u2, ["a"], 2)]),
+        TransactionBulkPayload(items=[_item(u2, [], 3), _item(u1, ["b"], 4)]),
+    ]
+    errors = []
+
+    def run(payload, barrier):
+        barrier.wait()
+        try:
+            with SessionLocal() as db:
+                _create_transactions_bulk(db, payload)
+        except Exception as e:
+            errors.append(e)
+
+    for _ in range(10):
+        barrier = threading.Barrier(len(payloads))
+        threads = [threading.Thread(target=run, args=(p, barrier)) for p in payloads]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=30)
+
+    assert errors == []
+
+
+def test_concurrent_writes_for_one_user_do_not_deadlock(make_user):
+    user = make_user()
+    # วันเดียวกันคนละลำดับ + tag ชุดเดียวกันคนละลำดับ: แถว summary และแถว tag ถูกล็อกข้ามกัน
+    payloads = [
+        TransactionBulkPayload(items=[_item(user, tags, day) for day in days])
+        for tags, days in [(["a", "b", "c"], [1, 20]), (["c", "b", "a"], [20, 2]),
+                           (["b", "d"], [3, 1]), (["d", "a"], [2, 3])]
+    ]
+    errors = []
+
+    def run(payload, barrier):
+        barrier.wait()
+        try:
+            with SessionLocal() as db:
+                _create_transactions_bulk(db, payload)
+        except Exception as e:
+            errors.append(e)
+
+    for _ in range(5):
+        barrier = threading.Barrier(len(payloads))
+        threads = [threading.Thread(target=run, args=(p, barrier)) for p in payloads]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=30)
+
+    assert errors == []
+    with SessionLocal() as db:
+        total = db.execute(text("""
+            SELECT (SELECT sum(total_expense) FROM period_summary WHERE user_id_line = :u),
+                   (SELECT total_expense FROM period_summary_rollup
+                    WHERE user_id_line = :u AND period_level = 'year')
+        """), {"u": user}).one()
+    assert tuple(total) == (5 * 8 * 10, 5 * 8 * 10)